@@ -0,0 +1,188 @@
+"""
+Render benchmark suite.
+
+Renders each benchmark scene at several resolutions, measuring wall time, rays per second and peak
+memory, and saves the results as JSON. Given a baseline from an earlier run, it exits with an error
+when any result regresses past the threshold:
+
+    python -m benchmarks.run --output bench.json --baseline baseline.json --threshold 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import typing as t
+from pathlib import Path
+
+from benchmarks.scenes import SCENES, Scene
+from raytracer.camera import ENGINES, Camera
+from raytracer.precision import PRECISIONS
+
+DEFAULT_RESOLUTIONS = ((32, 24), (64, 48), (128, 96))
+
+# Fraction by which a result may be worse than its baseline before it counts as a regression
+DEFAULT_THRESHOLD = 0.2
+
+
+def run_benchmark(
+    name: str,
+    scene: Scene,
+    width: int,
+    height: int,
+    engine: str = "wavefront",
+    repeat: int = 1,
+    measure_memory: bool = True,
+    precision: str = "float64",
+) -> dict[str, t.Any]:
+    """
+    Render the scene at `width` by `height` in `precision`, keeping the fastest of `repeat` renders.
+    Peak memory is measured with `tracemalloc` over a separate render, since tracing allocations
+    slows it down.
+    """
+    world, scene_camera = scene()
+    camera = Camera(width, height, scene_camera.fov, transform=scene_camera.transform)
+    # Camera.render traces one primary ray per pixel of its (width - 1) by (height - 1) area
+    rays = (width - 1) * (height - 1)
+
+    seconds = min(_timed_render(camera, world, engine, precision) for _ in range(repeat))
+
+    peak_memory = None
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            camera.render(world, engine=engine, precision=precision)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "scene": name,
+        "width": width,
+        "height": height,
+        "engine": engine,
+        "precision": precision,
+        "rays": rays,
+        "seconds": seconds,
+        "rays_per_second": rays / seconds if seconds > 0 else float("inf"),
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def _timed_render(camera: Camera, world: t.Any, engine: str, precision: str = "float64") -> float:
+    start = time.perf_counter()
+    camera.render(world, engine=engine, precision=precision)
+    return time.perf_counter() - start
+
+
+def run_suite(
+    scenes: t.Iterable[str] = SCENES,
+    resolutions: t.Iterable[tuple[int, int]] = DEFAULT_RESOLUTIONS,
+    engine: str = "wavefront",
+    repeat: int = 1,
+    measure_memory: bool = True,
+    precision: str = "float64",
+) -> list[dict[str, t.Any]]:
+    resolutions = list(resolutions)
+    return [
+        run_benchmark(name, SCENES[name], width, height, engine, repeat, measure_memory, precision)
+        for name in scenes
+        for width, height in resolutions
+    ]
+
+
+def find_regressions(
+    results: list[dict[str, t.Any]], baseline: list[dict[str, t.Any]], threshold: float = DEFAULT_THRESHOLD
+) -> list[str]:
+    """
+    Compare results against the baseline run with the same scene, resolution, engine and precision.
+    A result regresses when its rays per second drop, or its peak memory grows, by more than
+    `threshold`.
+
+    Results without a matching baseline are skipped.
+    """
+    baseline_by_key = {_key(result): result for result in baseline}
+
+    regressions = []
+    for result in results:
+        base = baseline_by_key.get(_key(result))
+        if base is None:
+            continue
+
+        label = f"{result['scene']} at {result['width']}x{result['height']} ({result['engine']}, {_precision(result)})"
+        if result["rays_per_second"] < base["rays_per_second"] * (1 - threshold):
+            regressions.append(
+                f"{label}: {result['rays_per_second']:.0f} rays/s, down from {base['rays_per_second']:.0f}"
+            )
+
+        memory, base_memory = result["peak_memory_bytes"], base["peak_memory_bytes"]
+        if memory is not None and base_memory is not None and memory > base_memory * (1 + threshold):
+            regressions.append(f"{label}: peak memory {memory} bytes, up from {base_memory}")
+
+    return regressions
+
+
+def _key(result: dict[str, t.Any]) -> tuple[str, int, int, str, str]:
+    return result["scene"], result["width"], result["height"], result["engine"], _precision(result)
+
+
+def _precision(result: dict[str, t.Any]) -> str:
+    # Results saved before precisions could be picked were all float64
+    return result.get("precision", "float64")
+
+
+def _resolution(text: str) -> tuple[int, int]:
+    width, _, height = text.partition("x")
+    try:
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a resolution like 64x48. Received: {text!r}.") from None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scene", action="append", choices=[*SCENES], help="Scene to run, all by default.")
+    parser.add_argument(
+        "--resolution", action="append", type=_resolution, help="WIDTHxHEIGHT to render at, repeatable."
+    )
+    parser.add_argument("--engine", choices=ENGINES, default="wavefront")
+    parser.add_argument("--precision", choices=[*PRECISIONS], default="float64")
+    parser.add_argument("--repeat", type=int, default=1, help="Renders per benchmark, keeping the fastest.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip measuring peak memory.")
+    parser.add_argument("--output", type=Path, help="JSON file to save the results to.")
+    parser.add_argument("--baseline", type=Path, help="JSON results to check for regressions against.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        args.scene or SCENES,
+        args.resolution or DEFAULT_RESOLUTIONS,
+        args.engine,
+        args.repeat,
+        not args.no_memory,
+        args.precision,
+    )
+    for result in results:
+        memory = "" if result["peak_memory_bytes"] is None else f", {result['peak_memory_bytes'] / 2 ** 20:.1f} MiB"
+        print(
+            f"{result['scene']:>14} {result['width']:>5}x{result['height']:<5} "
+            f"{result['seconds']:8.3f}s {result['rays_per_second']:12.0f} rays/s{memory}"
+        )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.baseline is not None:
+        regressions = find_regressions(results, json.loads(args.baseline.read_text()), args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import typing as t
+from math import pi
+
+import numpy as np
+
+from raytracer.camera import Camera
+from raytracer.color import WHITE, Color
+from raytracer.lights import PointLight
+from raytracer.materials import Material
+from raytracer.patterns import Stripe
+from raytracer.shapes import Group, Plane, Sphere
+from raytracer.transforms import rotate, scaling, translation, view_transform
+from raytracer.tuple import point, vector
+from raytracer.world import World
+from raytracer_demo.first_camera import first_camera_scene
+
+# A benchmark scene builds its world along with a camera aimed at it; the camera's size is replaced
+# by each benchmarked resolution
+Scene = t.Callable[[], tuple[World, Camera]]
+
+
+def default_world() -> tuple[World, Camera]:
+    camera = Camera(100, 100, pi / 2, transform=view_transform(point(0, 0, -5), point(0, 0, 0), vector(0, 1, 0)))
+    return World.default_world(), camera
+
+
+def glass() -> tuple[World, Camera]:
+    """Nested glass and mirrored spheres over a mirrored floor, to stress reflection and refraction."""
+    floor = Plane(
+        translation(0, -1, 0),
+        Material(pattern=Stripe(Color(0.9, 0.9, 0.9), Color(0.2, 0.2, 0.3)), reflective=0.5, specular=0),
+    )
+    glass_material = Material(Color(0.1, 0.1, 0.1), transparency=0.9, reflective=0.9, refractive_index=1.5)
+    outer = Sphere(material=glass_material)
+    inner = Sphere(scaling(0.5, 0.5, 0.5), Material(Color(0.1, 0.1, 0.1), transparency=0.9, refractive_index=1.00029))
+    mirror = Sphere(translation(-2, 0, 1.5) * scaling(0.75, 0.75, 0.75), Material(Color(0.2, 0.2, 0.2), reflective=1))
+    red_glass = Sphere(
+        translation(2, -0.25, 1) * scaling(0.75, 0.75, 0.75),
+        Material(Color(0.6, 0.1, 0.1), transparency=0.6, reflective=0.3, refractive_index=1.33),
+    )
+
+    world = World(PointLight(point(-10, 10, -10), WHITE), [floor, outer, inner, mirror, red_glass])
+    camera = Camera(100, 50, pi / 3, transform=view_transform(point(0, 1.5, -5), point(0, 0, 0), vector(0, 1, 0)))
+    return world, camera
+
+
+def deep_group(depth: int = 8) -> tuple[World, Camera]:
+    """Binary tree of nested, transformed groups with a small sphere at each of its `2 ** depth` leaves."""
+
+    def subtree(level: int) -> Group | Sphere:
+        if level == depth:
+            return Sphere(scaling(0.8, 0.8, 0.8), Material(Color(0.3, 0.5, 0.8)))
+
+        # Split the parent's space along the next axis, halving it each time
+        axis = level % 3
+        group = Group()
+        for side in (-1, 1):
+            offset = [0.0, 0.0, 0.0]
+            offset[axis] = side
+            child = Group(translation(*offset) * scaling(0.5, 0.5, 0.5))
+            child.add_child(subtree(level + 1))
+            group.add_child(child)
+        return group
+
+    root = Group(rotate(y=pi / 6) * scaling(2, 2, 2))
+    root.add_child(subtree(0))
+    floor = Plane(translation(0, -2.5, 0), Material(Color(1, 0.9, 0.9), specular=0))
+    world = World(PointLight(point(-10, 10, -10), WHITE), [floor, root])
+    camera = Camera(100, 50, pi / 3, transform=view_transform(point(0, 2, -8), point(0, 0, 0), vector(0, 1, 0)))
+    return world, camera
+
+
+def many_spheres(count: int, seed: int = 0) -> tuple[World, Camera]:
+    """`count` randomly placed and colored spheres, to measure how render time scales with scene size."""
+    rng = np.random.default_rng(seed)
+    size = 10 / np.cbrt(count)
+    objects = [
+        Sphere(
+            translation(*center) * scaling(size / 2, size / 2, size / 2),
+            Material(Color(*color), diffuse=0.7, specular=0.3),
+        )
+        for center, color in zip(rng.uniform(-5, 5, (count, 3)).tolist(), rng.uniform(0.1, 1, (count, 3)).tolist())
+    ]
+    world = World(PointLight(point(-20, 20, -20), WHITE), objects)
+    camera = Camera(100, 100, pi / 3, transform=view_transform(point(0, 0, -15), point(0, 0, 0), vector(0, 1, 0)))
+    return world, camera
+
+
+SCENES: dict[str, Scene] = {
+    "default_world": default_world,
+    "first_camera": first_camera_scene,
+    "glass": glass,
+    "deep_group": deep_group,
+    "spheres_100": lambda: many_spheres(100),
+    "spheres_1000": lambda: many_spheres(1000),
+}
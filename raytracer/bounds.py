@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from raytracer.matrix import Matrix
+from raytracer.rays import Ray
+from raytracer.tuple import Tuple, point
+
+INF = math.inf
+
+
+@dataclass(frozen=True, slots=True)
+class BoundingBox:
+    """
+    Axis aligned bounding box. Defaults to an empty box, which grows as points and boxes are added.
+    """
+    minimum: Tuple = point(INF, INF, INF)
+    maximum: Tuple = point(-INF, -INF, -INF)
+
+    def add_point(self, pt: Tuple) -> BoundingBox:
+        return BoundingBox(
+            point(min(self.minimum.x, pt.x), min(self.minimum.y, pt.y), min(self.minimum.z, pt.z)),
+            point(max(self.maximum.x, pt.x), max(self.maximum.y, pt.y), max(self.maximum.z, pt.z)),
+        )
+
+    def merge(self, other: BoundingBox) -> BoundingBox:
+        return self.add_point(other.minimum).add_point(other.maximum)
+
+    def is_empty(self) -> bool:
+        return any(lo > hi for lo, hi in zip(self.minimum, self.maximum))
+
+    def is_finite(self) -> bool:
+        return all(math.isfinite(v) for v in (*self.minimum, *self.maximum))
+
+    def contains_point(self, pt: Tuple) -> bool:
+        return all(lo <= v <= hi for lo, v, hi in zip(self.minimum, pt, self.maximum))
+
+    def contains_box(self, other: BoundingBox) -> bool:
+        return self.contains_point(other.minimum) and self.contains_point(other.maximum)
+
+    def transform(self, matrix: Matrix) -> BoundingBox:
+        """
+        Bounds of this box after applying the transformation, i.e. the box around its 8 transformed
+        corners. For an affine transform that is the transformed center, extended by the box's half
+        extents projected through the absolute values of the linear part.
+
+        Boxes that aren't finite can't be transformed this way (infinities turn into NaNs), so they
+        conservatively become infinite in every direction.
+        """
+        if self.is_empty():
+            return self
+        if not self.is_finite():
+            return INFINITE_BOX
+
+        lo = np.array([*self.minimum])
+        hi = np.array([*self.maximum])
+        center = matrix.matrix[:3, :3] @ ((lo + hi) / 2) + matrix.matrix[:3, 3]
+        half_extent = np.abs(matrix.matrix[:3, :3]) @ ((hi - lo) / 2)
+
+        return BoundingBox(point(*(center - half_extent).tolist()), point(*(center + half_extent).tolist()))
+
+    def intersects(self, ray: Ray) -> bool:
+        """Whether the ray's line, extended in both directions, passes through the box."""
+        return _slab_test(
+            (*self.minimum,), (*self.maximum,), (*ray.origin,), _inverse_direction(ray), -INF, INF
+        )
+
+
+EMPTY_BOX = BoundingBox()
+INFINITE_BOX = BoundingBox(point(-INF, -INF, -INF), point(INF, INF, INF))
+
+
+def _inverse_direction(ray: Ray) -> tuple[float, float, float]:
+    """Reciprocal of the ray's direction, with infinities for the axes it is parallel to."""
+    return tuple(1 / d if d != 0 else math.copysign(INF, d) for d in ray.direction)  # type: ignore[return-value]
+
+
+def _slab_test(
+    lo: tuple[float, ...],
+    hi: tuple[float, ...],
+    origin: tuple[float, ...],
+    inv_dir: tuple[float, ...],
+    t_min: float,
+    t_max: float,
+) -> bool:
+    """
+    Slab test of a ray against the box `[lo, hi]`, limited to times in `[t_min, t_max]`.
+    """
+    for axis in range(3):
+        o = origin[axis]
+        inv = inv_dir[axis]
+        if math.isinf(inv):
+            # Parallel to this slab, so the origin has to lie between its planes
+            if o < lo[axis] or o > hi[axis]:
+                return False
+            continue
+
+        t0 = (lo[axis] - o) * inv
+        t1 = (hi[axis] - o) * inv
+        if t0 > t1:
+            t0, t1 = t1, t0
+        if t0 > t_min:
+            t_min = t0
+        if t1 < t_max:
+            t_max = t1
+        if t_min > t_max:
+            return False
+
+    return True
+
+
+def _slab_test_batch(
+    lo: np.ndarray, hi: np.ndarray, origins: np.ndarray, inv_dirs: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batched slab test of N rays against N boxes, given as (N, 3) arrays. Returns the times each ray
+    enters and leaves its box, which it misses where it would leave before entering.
+    """
+    with np.errstate(invalid="ignore"):
+        t0 = (lo - origins) * inv_dirs
+        t1 = (hi - origins) * inv_dirs
+    # A ray parallel to a slab gets NaN there when its origin is on one of the slab's planes, which
+    # is inside the slab, so it doesn't limit the ray
+    near = np.minimum(t0, t1)
+    far = np.maximum(t0, t1)
+    near[np.isnan(near)] = -INF
+    far[np.isnan(far)] = INF
+    return near.max(axis=1), far.min(axis=1)
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import typing as t
+
+import numpy as np
+
+from raytracer.bounds import _inverse_direction, _slab_test
+from raytracer.intersections import Intersection, Intersections
+from raytracer.rays import Ray
+
+if t.TYPE_CHECKING:
+    from raytracer.shapes import Shape
+
+# Shapes per leaf below which a node is never split
+LEAF_SIZE = 4
+# Number of centroid bins evaluated by the surface area heuristic on each split
+SAH_BINS = 12
+
+
+class BVHNode:
+    """Node of a bounding volume hierarchy; leaves hold shapes, inner nodes hold two children."""
+    __slots__ = ("lo", "hi", "left", "right", "shapes")
+
+    def __init__(
+        self,
+        lo: tuple[float, ...],
+        hi: tuple[float, ...],
+        left: BVHNode | None = None,
+        right: BVHNode | None = None,
+        shapes: list[Shape] | np.ndarray | None = None,
+    ) -> None:
+        self.lo = lo
+        self.hi = hi
+        self.left = left
+        self.right = right
+        self.shapes = shapes
+
+    def depth(self) -> int:
+        if self.shapes is not None:
+            return 1
+        return 1 + max(self.left.depth(), self.right.depth())
+
+
+class BVH:
+    """
+    Bounding volume hierarchy over a collection of shapes, built with a binned surface area heuristic.
+
+    Shapes are bounded in their parent's space, so rays passed in must be in that same space. With
+    `world`, they are bounded and intersected in world space instead, through their composed
+    transforms, so shapes from anywhere in a hierarchy can share one flat tree. Shapes with infinite
+    bounds, such as planes, can't be placed in the tree and are tested against every ray.
+    """
+
+    def __init__(self, shapes: t.Iterable[Shape], world: bool = False) -> None:
+        self.shapes = list(shapes)
+        self.world = world
+        self.unbounded: list[Shape] = []
+        self.root: BVHNode | None = None
+
+        bounded: list[Shape] = []
+        boxes = []
+        for shape in self.shapes:
+            box = shape.world_bounds() if world else shape.parent_space_bounds()
+            if box.is_empty():
+                continue
+            if not box.is_finite():
+                self.unbounded.append(shape)
+                continue
+            bounded.append(shape)
+            boxes.append((*box.minimum, *box.maximum))
+
+        if bounded:
+            boxes_arr = np.array(boxes, dtype=float)
+            self.root = _build(bounded, np.arange(len(bounded)), boxes_arr[:, :3], boxes_arr[:, 3:])
+
+    def __len__(self) -> int:
+        return len(self.shapes)
+
+    def candidates(self, ray: Ray, t_min: float = -np.inf, t_max: float = np.inf) -> t.Generator[Shape, None, None]:
+        """
+        Yield the shapes whose bounds the ray passes through within `[t_min, t_max]`, followed by the
+        unbounded shapes.
+        """
+        if self.root is not None:
+            origin = (*ray.origin,)
+            inv_dir = _inverse_direction(ray)
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                if not _slab_test(node.lo, node.hi, origin, inv_dir, t_min, t_max):
+                    continue
+                if node.shapes is not None:
+                    yield from node.shapes
+                else:
+                    stack.append(node.right)
+                    stack.append(node.left)
+
+        yield from self.unbounded
+
+    def intersect(self, ray: Ray) -> Intersections:
+        """Calculate all of the ray's intersections with the shapes, sorted by time."""
+        all_inters = Intersections([])
+        for shape in self.candidates(ray):
+            all_inters.extend(shape.intersect(ray, self.world))
+
+        all_inters.sort()
+        return all_inters
+
+    def closest_hit(self, ray: Ray, t_max: float = np.inf) -> Intersection | None:
+        """
+        Find the ray's lowest non negative intersection before `t_max`. Nodes that are farther away
+        than the closest hit found so far are skipped.
+        """
+        closest = None
+        for shape in self.unbounded:
+            hit = shape.intersect_closest(ray, t_max, self.world)
+            if hit is not None:
+                closest, t_max = hit, hit.t
+
+        if self.root is None:
+            return closest
+
+        origin = (*ray.origin,)
+        inv_dir = _inverse_direction(ray)
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not _slab_test(node.lo, node.hi, origin, inv_dir, 0, t_max):
+                continue
+            if node.shapes is None:
+                stack.append(node.right)
+                stack.append(node.left)
+                continue
+
+            for shape in node.shapes:
+                hit = shape.intersect_closest(ray, t_max, self.world)
+                if hit is not None:
+                    closest, t_max = hit, hit.t
+
+        return closest
+
+    def occluder(self, ray: Ray, distance: float) -> Shape | None:
+        """
+        Find any shape the ray intersects in `(0, distance)`, returning the first one found.
+        """
+        for shape in self.candidates(ray, 0, distance):
+            if shape.occludes(ray, distance, self.world):
+                return shape
+
+        return None
+
+
+def build_index_tree(mins: np.ndarray, maxs: np.ndarray, leaf_size: int = LEAF_SIZE) -> BVHNode | None:
+    """
+    Build a hierarchy over the (N, 3) boxes `mins` to `maxs` whose leaves hold arrays of box indices
+    rather than shapes, for primitives stored in arrays such as the triangles of a mesh.
+    """
+    if not len(mins):
+        return None
+
+    idx = np.arange(len(mins))
+    return _build(idx, idx, mins, maxs, leaf_size)
+
+
+def flatten_index_tree(root: BVHNode | None) -> dict[str, np.ndarray]:
+    """
+    Pack a tree from `build_index_tree` into arrays, with nodes numbered in depth first order:
+    the `lo` and `hi` corners of each node's box, the `children` of inner nodes (-1 for leaves) and
+    the `start` and `count` of each leaf's indices within `order`.
+    """
+    nodes: list[BVHNode] = []
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        if node.shapes is None:
+            stack.append(node.right)
+            stack.append(node.left)
+
+    number = {id(node): i for i, node in enumerate(nodes)}
+    children = np.full((len(nodes), 2), -1, dtype=np.int64)
+    leaves = np.zeros((len(nodes), 2), dtype=np.int64)
+    order = []
+    start = 0
+    for i, node in enumerate(nodes):
+        if node.shapes is None:
+            children[i] = number[id(node.left)], number[id(node.right)]
+        else:
+            leaves[i] = start, len(node.shapes)
+            order.append(node.shapes)
+            start += len(node.shapes)
+
+    return {
+        "lo": np.array([node.lo for node in nodes], dtype=float).reshape(-1, 3),
+        "hi": np.array([node.hi for node in nodes], dtype=float).reshape(-1, 3),
+        "children": children,
+        "leaves": leaves,
+        "order": np.concatenate(order) if order else np.zeros(0, dtype=np.int64),
+    }
+
+
+def unflatten_index_tree(
+    lo: np.ndarray, hi: np.ndarray, children: np.ndarray, leaves: np.ndarray, order: np.ndarray
+) -> BVHNode | None:
+    """Rebuild a tree packed by `flatten_index_tree`, with leaves holding slices of `order`."""
+    if not len(lo):
+        return None
+
+    nodes: list[BVHNode | None] = [None] * len(lo)
+    # Children are numbered after their parents, so they are always rebuilt first
+    for i, (node_lo, node_hi, (left, right), (start, count)) in reversed(list(enumerate(zip(
+        lo.tolist(), hi.tolist(), children.tolist(), leaves.tolist()
+    )))):
+        if left < 0:
+            nodes[i] = BVHNode(tuple(node_lo), tuple(node_hi), shapes=order[start:start + count])
+        else:
+            nodes[i] = BVHNode(tuple(node_lo), tuple(node_hi), left=nodes[left], right=nodes[right])
+
+    return nodes[0]
+
+
+def _build(
+    shapes: t.Sequence[t.Any], idx: np.ndarray, mins: np.ndarray, maxs: np.ndarray, leaf_size: int = LEAF_SIZE
+) -> BVHNode:
+    """
+    Recursively build the node holding `shapes[idx]`, whose boxes are `mins[idx]` to `maxs[idx]`.
+    Leaves of arrays hold arrays, otherwise lists.
+    """
+    lo = tuple(mins[idx].min(axis=0).tolist())
+    hi = tuple(maxs[idx].max(axis=0).tolist())
+
+    split = _sah_split(mins[idx], maxs[idx]) if len(idx) > leaf_size else None
+    if split is None:
+        leaf = shapes[idx] if isinstance(shapes, np.ndarray) else [shapes[i] for i in idx]
+        return BVHNode(lo, hi, shapes=leaf)
+
+    return BVHNode(
+        lo,
+        hi,
+        left=_build(shapes, idx[split], mins, maxs, leaf_size),
+        right=_build(shapes, idx[~split], mins, maxs, leaf_size),
+    )
+
+
+def _surface_area(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    extent = np.clip(hi - lo, 0, None)
+    return 2 * (extent[..., 0] * extent[..., 1] + extent[..., 1] * extent[..., 2] + extent[..., 2] * extent[..., 0])
+
+
+def _sah_split(mins: np.ndarray, maxs: np.ndarray) -> np.ndarray | None:
+    """
+    Pick the split with the lowest surface area heuristic cost, binning the box centroids along the
+    axis where they are most spread out.
+
+    Returns the mask of boxes that go to the left child, or `None` if they can't be separated.
+    """
+    centroids = (mins + maxs) / 2
+    c_lo = centroids.min(axis=0)
+    extent = centroids.max(axis=0) - c_lo
+    axis = int(extent.argmax())
+    if extent[axis] <= 0:
+        # Every centroid coincides, so there is nothing to split on
+        return None
+
+    bins = ((centroids[:, axis] - c_lo[axis]) / extent[axis] * SAH_BINS).astype(int)
+    bins = np.clip(bins, 0, SAH_BINS - 1)
+
+    counts = np.bincount(bins, minlength=SAH_BINS)
+    bin_lo = np.full((SAH_BINS, 3), np.inf)
+    bin_hi = np.full((SAH_BINS, 3), -np.inf)
+    np.minimum.at(bin_lo, bins, mins)
+    np.maximum.at(bin_hi, bins, maxs)
+
+    # Cost of splitting after each bin, sweeping the bounds from the left and from the right
+    left_counts = np.cumsum(counts)[:-1]
+    right_counts = np.cumsum(counts[::-1])[::-1][1:]
+    left_area = _surface_area(np.minimum.accumulate(bin_lo)[:-1], np.maximum.accumulate(bin_hi)[:-1])
+    right_area = _surface_area(
+        np.minimum.accumulate(bin_lo[::-1])[::-1][1:], np.maximum.accumulate(bin_hi[::-1])[::-1][1:]
+    )
+    costs = np.where(
+        (left_counts > 0) & (right_counts > 0), left_area * left_counts + right_area * right_counts, np.inf
+    )
+
+    best = int(costs.argmin())
+    if not np.isfinite(costs[best]):
+        return None
+
+    return bins <= best
@@ -1,17 +1,44 @@
+from __future__ import annotations
+
+import contextlib
 import math
+import os
+import time
+import typing as t
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from itertools import product
 
-from raytracer import NUMERIC_T
+import numpy as np
+
+from raytracer import NUMERIC_T, render_stats
 from raytracer.canvas import Canvas
+from raytracer.precision import Precision, working_precision
+from raytracer.profiling import SamplingProfiler
+from raytracer.render_stats import CostMap, RenderStats
+from raytracer.sinks import ImageSink
 from raytracer.tuple import point
+from raytracer.tuple_array import Points
 from raytracer.rays import Ray
-from raytracer.transforms import Matrix
+from raytracer.matrix import Matrix, Transformable
 from raytracer.world import World
+from raytracer.compiler import CompiledScene, compile_world
+from raytracer.wavefront import trace
+
+ENGINES = ("scalar", "wavefront")
+
+# Number of rays the wavefront engine traces per pass, bounding its working memory
+WAVEFRONT_BATCH = 1 << 16
+
+DEFAULT_TILE_SIZE = 32
+
+# (x0, y0, x1, y1) pixel bounds of a tile, exclusive of x1 and y1
+Tile = tuple[int, int, int, int]
 
 
 @dataclass(slots=True)
-class Camera: 
+class Camera(Transformable):
     h_size: int
     v_size: int
     fov: NUMERIC_T  # radians
@@ -44,19 +71,327 @@ class Camera:
         world_x = self._half_width - x_offset
         world_y = self._half_height - y_offset
 
-        inv_trans = self.transform.inverse()
+        inv_trans = self.inverse
         pixel = inv_trans * point(world_x, world_y, -1)
         origin = inv_trans * point(0, 0, 0)
         direction = (pixel - origin).normalize()
 
         return Ray(origin, direction)
 
-    def render(self, world: World) -> Canvas:
-        """Render the camera's current fiew of the world."""
-        img = Canvas(self.h_size, self.v_size)
-        for y,x in product(range(self.v_size - 1), range(self.h_size - 1)):
-            r = self.ray_for_pixel(x, y)
-            c = world.color_at(r)
-            img.write_pixel(x, y, c)
+    def rays_for_pixels(self, xs: np.ndarray, ys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the rays through the centers of the given pixels in a single NumPy pass.
+
+        Returns `(origins, directions)` arrays of shape (N, 4), laid out like `Tuple.as_array`, that
+        match what `ray_for_pixel` gives for each XY pair.
+        """
+        xs = np.asarray(xs, dtype=float).ravel()
+        ys = np.asarray(ys, dtype=float).ravel()
+        if xs.shape != ys.shape:
+            raise ValueError(f"Pixel coordinate arrays must match. Received: {xs.shape} and {ys.shape}.")
+
+        world_xy = np.empty((xs.size, 3))
+        world_xy[:, 0] = self._half_width - (xs + 0.5) * self.pixel_size
+        world_xy[:, 1] = self._half_height - (ys + 0.5) * self.pixel_size
+        world_xy[:, 2] = -1
+
+        pixels = Points(world_xy).transform(self.inverse)
+        # the origin is the inverse transform applied to point(0, 0, 0), i.e. its last column
+        origins = Points(np.tile(self.inverse.matrix[:, 3], (len(pixels), 1)))
+        directions = (pixels - origins).normalize()
+
+        return origins.data, directions.data
+
+    def rays_for_tile(self, x0: int, y0: int, x1: int, y1: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the rays for the pixels in `[x0, x1) x [y0, y1)`, in row-major order.
+        """
+        ys, xs = np.mgrid[y0:y1, x0:x1]
+        return self.rays_for_pixels(xs, ys)
+
+    def rays_for_image(self) -> tuple[np.ndarray, np.ndarray]:
+        """Compute the rays for every pixel of the image, in row-major order."""
+        return self.rays_for_tile(0, 0, self.h_size, self.v_size)
+
+    def render(
+        self,
+        world: World,
+        engine: str = "scalar",
+        workers: int | None = 1,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        sink: ImageSink | None = None,
+        canvas: Canvas | None = None,
+        stats: bool = False,
+        cost_map: CostMap | None = None,
+        profiler: SamplingProfiler | None = None,
+        precision: Precision | None = None,
+    ) -> Canvas | None | tuple[Canvas | None, RenderStats]:
+        """
+        Render the camera's current fiew of the world.
+
+        `engine` selects between tracing one ray at a time through `World.color_at` ("scalar") and
+        tracing packets of rays as NumPy arrays ("wavefront").
+
+        With more than one worker (`None` meaning one per CPU), the image is split into square tiles
+        of `tile_size` pixels that are rendered by a process pool. Each worker receives the world once
+        and tiles are handed out as workers free up, producing the same pixels as a serial render.
+
+        Given a `sink`, such as an `ImageSink`, each tile is pushed into it as soon as it is rendered
+        rather than collected into a `Canvas`, and nothing is returned. The sink is left open.
+
+        Given a `canvas` of the camera's size, it is rendered into tile by tile and returned instead
+        of a new one. Workers write their tiles straight into a memory-mapped canvas's file.
+
+        With `stats`, the rays traced are counted into a `RenderStats` that is returned alongside the
+        result, merging the counts of every worker.
+
+        Given a `cost_map` of the camera's size, the time spent on each pixel and the number of rays
+        it cast are recorded into it.
+
+        Given a `profiler`, the render's call stacks are sampled into it. In parallel renders, each
+        worker samples the tiles it renders and the samples are merged into the profiler.
+
+        `precision` ("float64" or "float32") overrides the active precision for this render, see
+        `raytracer.precision`. It sets the precision the wavefront engine traces in and, unless a
+        `canvas` is given, that of the returned canvas.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown render engine {engine!r}, expected one of {ENGINES}.")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError(f"Worker count must be positive. Received: {workers}.")
+        if tile_size < 1:
+            raise ValueError(f"Tile size must be positive. Received: {tile_size}.")
+        if sink is not None and canvas is not None:
+            raise ValueError("Can't render into both a sink and a canvas.")
+        for name, target in (("Canvas", canvas), ("Cost map", cost_map)):
+            if target is not None and (target.width, target.height) != (self.h_size, self.v_size):
+                raise ValueError(
+                    f"{name} of {target.width}x{target.height} doesn't match the camera's "
+                    f"{self.h_size}x{self.v_size}."
+                )
+
+        working = working_precision(precision) if precision is not None else contextlib.nullcontext()
+        collecting = render_stats.collecting() if stats else contextlib.nullcontext()
+        # Parallel renders leave sampling to the workers, as the parent mostly waits on them
+        sampling = profiler if profiler is not None and workers == 1 else contextlib.nullcontext()
+
+        with working:
+            # Done once up front, so parallel workers receive the world ready to trace. The compiled
+            # scene carries the precision to them
+            world.freeze()
+            scene = compile_world(world) if engine == "wavefront" else None
+
+            start = time.perf_counter()
+            with collecting as collected, sampling:
+                img = self._render(world, engine, workers, tile_size, sink, canvas, cost_map, profiler, scene)
+        if not stats:
+            return img
+
+        collected.seconds = time.perf_counter() - start
+        return img, collected
+
+    def _render(
+        self,
+        world: World,
+        engine: str,
+        workers: int,
+        tile_size: int,
+        sink: ImageSink | None,
+        canvas: Canvas | None,
+        cost_map: CostMap | None,
+        profiler: SamplingProfiler | None,
+        scene: CompiledScene | None = None,
+    ) -> Canvas | None:
+        if sink is not None:
+            tiles = self._render_tiles(
+                world, engine, workers, tile_size, cost_map=cost_map, profiler=profiler, scene=scene
+            )
+            for tile, pixels in tiles:
+                sink.write_block(tile[0], tile[1], self._pad_tile(tile, pixels))
+            return None
+
+        if canvas is None and workers == 1:
+            # With nothing to stream tiles into, a serial render traces the whole image as one tile
+            tile_size = max(self.h_size, self.v_size)
 
+        img = canvas if canvas is not None else Canvas(self.h_size, self.v_size)
+        shared = img if img.path is not None else None
+        tiles = self._render_tiles(world, engine, workers, tile_size, shared, cost_map, profiler, scene)
+        for (x0, y0, _, _), pixels in tiles:
+            if pixels is not None:
+                img.write_block(x0, y0, pixels)
+
+        img.flush()
         return img
+
+    def _render_tiles(
+        self,
+        world: World,
+        engine: str,
+        workers: int,
+        tile_size: int,
+        shared: Canvas | None = None,
+        cost_map: CostMap | None = None,
+        profiler: SamplingProfiler | None = None,
+        scene: CompiledScene | None = None,
+    ) -> t.Iterator[tuple[Tile, np.ndarray | None]]:
+        """
+        Render the image tile by tile, yielding each tile as it completes. Workers write their tiles
+        into the `shared` memory-mapped canvas if there is one, yielding `None` in place of pixels.
+
+        While statistics are being collected, each worker counts its tile separately and the counts
+        are merged into the active collector. Likewise, per pixel costs are sent back with each tile
+        and written into the `cost_map`, and each worker's stack samples are merged into the
+        `profiler`.
+        """
+        if workers == 1:
+            for tile in self.tiles(tile_size):
+                costs = _tile_costs(tile) if cost_map is not None else None
+                pixels = self._render_tile(world, tile, engine, costs, scene)
+                if costs is not None:
+                    cost_map.write_block(tile[0], tile[1], costs)
+                yield tile, pixels
+            return
+
+        stats = render_stats.active
+        interval = profiler.interval if profiler is not None else None
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self, world, shared, scene)) as pool:
+            futures = [
+                pool.submit(_render_tile_task, tile, engine, stats is not None, cost_map is not None, interval)
+                for tile in self.tiles(tile_size)
+            ]
+            for future in as_completed(futures):
+                tile, pixels, tile_stats, costs, samples = future.result()
+                if samples is not None:
+                    profiler.merge(samples)
+                if tile_stats is not None:
+                    stats.merge(tile_stats)
+                if costs is not None:
+                    cost_map.write_block(tile[0], tile[1], costs)
+                yield tile, pixels
+
+    def _pad_tile(self, tile: Tile, pixels: np.ndarray) -> np.ndarray:
+        """
+        Extend tiles on the last column or row of the rendered area with the black pixels left along
+        the image's right and bottom edges, so that the tiles cover the whole image.
+        """
+        _, _, x1, y1 = tile
+        pad_x = 1 if x1 == self.h_size - 1 else 0
+        pad_y = 1 if y1 == self.v_size - 1 else 0
+        if pad_x or pad_y:
+            pixels = np.pad(pixels, ((0, pad_y), (0, pad_x), (0, 0)))
+
+        return pixels
+
+    def tiles(self, tile_size: int) -> list[Tile]:
+        """Split the rendered area into `(x0, y0, x1, y1)` tiles of at most `tile_size` square pixels."""
+        width, height = self.h_size - 1, self.v_size - 1
+        return [
+            (x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+            for y0, x0 in product(range(0, height, tile_size), range(0, width, tile_size))
+        ]
+
+    def _render_tile(
+        self,
+        world: World,
+        tile: Tile,
+        engine: str,
+        costs: np.ndarray | None = None,
+        scene: CompiledScene | None = None,
+    ) -> np.ndarray:
+        """
+        Render the pixels in `[x0, x1) x [y0, y1)` into an (h, w, 3) array.
+
+        Given an (h, w, 2) `costs` array, the seconds spent on each pixel and the rays it cast are
+        written into it. The wavefront engine traces pixels together, so each pixel is attributed a
+        share of its batch's time in proportion to its rays. It traces against the world's compiled
+        `scene`, compiling it for the tile if not given.
+        """
+        x0, y0, x1, y1 = tile
+        if engine == "wavefront" and scene is None:
+            scene = compile_world(world)
+        pixels = np.zeros((max(y1 - y0, 0), max(x1 - x0, 0), 3), dtype=float if scene is None else scene.dtype)
+
+        stats = render_stats.active
+        if stats is not None:
+            stats.primary_rays += pixels.shape[0] * pixels.shape[1]
+
+        if engine == "wavefront":
+            ys, xs = np.mgrid[y0:y1, x0:x1]
+            ys, xs = ys.ravel(), xs.ravel()
+            for start in range(0, len(xs), WAVEFRONT_BATCH):
+                batch = slice(start, start + WAVEFRONT_BATCH)
+                started = time.perf_counter()
+                rays = np.zeros(len(xs[batch]), dtype=int) if costs is not None else None
+                origins, directions = self.rays_for_pixels(xs[batch], ys[batch])
+                pixels[ys[batch] - y0, xs[batch] - x0] = trace(world, origins, directions, ray_counts=rays, scene=scene)
+                if costs is not None:
+                    elapsed = time.perf_counter() - started
+                    costs[ys[batch] - y0, xs[batch] - x0, 0] = elapsed * rays / rays.sum()
+                    costs[ys[batch] - y0, xs[batch] - x0, 1] = rays
+            return pixels
+
+        if costs is None:
+            for y,x in product(range(y0, y1), range(x0, x1)):
+                r = self.ray_for_pixel(x, y)
+                c = world.color_at(r)
+                pixels[y - y0, x - x0] = [*c]
+
+            return pixels
+
+        # Each pixel's rays are the primary ray plus whatever it adds to a collector's count. Unless
+        # statistics were asked for too, the collector only counts rays, leaving the timing as close
+        # to a plain render's as possible
+        with render_stats.collecting(stats if stats is not None else RenderStats(count_tests=False)):
+            counter = render_stats.active
+            for y, x in product(range(y0, y1), range(x0, x1)):
+                started, rays = time.perf_counter(), counter.rays
+                pixels[y - y0, x - x0] = [*world.color_at(self.ray_for_pixel(x, y))]
+                costs[y - y0, x - x0] = time.perf_counter() - started, counter.rays - rays + 1
+
+        return pixels
+
+
+# Camera, world, shared canvas and compiled scene of the current render worker process, set once by
+# `_init_worker`
+_worker_scene: tuple[Camera, World, Canvas | None, CompiledScene | None] | None = None
+
+
+def _init_worker(
+    camera: Camera, world: World, shared: Canvas | None = None, scene: CompiledScene | None = None
+) -> None:
+    global _worker_scene
+    _worker_scene = (camera, world, shared, scene)
+
+
+def _render_tile_task(
+    tile: Tile,
+    engine: str,
+    collect_stats: bool = False,
+    collect_costs: bool = False,
+    profile_interval: float | None = None,
+) -> tuple[Tile, np.ndarray | None, RenderStats | None, np.ndarray | None, Counter[str] | None]:
+    camera, world, shared, scene = _worker_scene
+    costs = _tile_costs(tile) if collect_costs else None
+    profiler = SamplingProfiler(profile_interval) if profile_interval is not None else None
+
+    with (
+        render_stats.collecting() if collect_stats else contextlib.nullcontext() as stats,
+        profiler if profiler is not None else contextlib.nullcontext(),
+    ):
+        pixels = camera._render_tile(world, tile, engine, costs, scene)
+    samples = profiler.stacks if profiler is not None else None
+
+    if shared is None:
+        return tile, pixels, stats, costs, samples
+
+    shared.write_block(tile[0], tile[1], pixels)
+    shared.flush()
+    return tile, None, stats, costs, samples
+
+
+def _tile_costs(tile: Tile) -> np.ndarray:
+    x0, y0, x1, y1 = tile
+    return np.zeros((max(y1 - y0, 0), max(x1 - x0, 0), 2))
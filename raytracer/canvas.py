@@ -1,19 +1,79 @@
 from __future__ import annotations
+from raytracer import precision
 from raytracer.color import Color
+from raytracer.sinks import FORMATS, ImageSink, _build_ppm_header  # noqa: F401
 from pathlib import Path
-import textwrap
+import typing as t
 
 import numpy as np
+import numpy.typing as npt
+
+# Rows encoded at a time by `Canvas.to_file`
+STREAM_ROWS = 64
 
 
 class Canvas:
+    """
+    Grid of RGB pixels, stored as a (height, width, 3) array of `dtype` floats, by default in the
+    active precision (see `raytracer.precision`).
+
+    Canvases too large to keep in memory can be backed by a memory-mapped `.npy` file instead, see
+    `Canvas.memmap`. Pickling such a canvas only sends its path, so render workers in other processes
+    write into the same file.
+    """
     _pixels: np.ndarray
 
-    def __init__(self, width: int, height: int) -> None:
+    def __init__(self, width: int, height: int, dtype: npt.DTypeLike | None = None) -> None:
         self.width = width
         self.height = height
+        # File backing the pixels when they are memory-mapped
+        self.path: Path | None = None
+
+        self._pixels = np.zeros(shape=(height, width, 3), dtype=precision.active if dtype is None else dtype)
+
+    @classmethod
+    def memmap(cls, path: Path, width: int, height: int, dtype: npt.DTypeLike = np.float32) -> Canvas:
+        """Create a black canvas backed by a new memory-mapped `.npy` file at `path`."""
+        canvas = cls.__new__(cls)
+        canvas.width = width
+        canvas.height = height
+        canvas.path = path
+        canvas._pixels = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(height, width, 3))
+        return canvas
+
+    @classmethod
+    def open(cls, path: Path) -> Canvas:
+        """Open an existing memory-mapped canvas for reading and writing."""
+        pixels = np.load(path, mmap_mode="r+")
+        if pixels.ndim != 3 or pixels.shape[2] != 3:
+            raise ValueError(f"Expected an (height, width, 3) array in {path}. Received shape: {pixels.shape}.")
+
+        canvas = cls.__new__(cls)
+        canvas.height, canvas.width, _ = pixels.shape
+        canvas.path = path
+        canvas._pixels = pixels
+        return canvas
+
+    def __getstate__(self) -> dict[str, t.Any]:
+        state = self.__dict__.copy()
+        if self.path is not None:
+            # The pixels are reopened from the mapped file rather than copied
+            del state["_pixels"]
+        return state
+
+    def __setstate__(self, state: dict[str, t.Any]) -> None:
+        self.__dict__.update(state)
+        if self.path is not None:
+            self._pixels = np.load(self.path, mmap_mode="r+")
 
-        self._pixels = np.zeros(shape=(height, width, 3))
+    @property
+    def dtype(self) -> np.dtype:
+        return self._pixels.dtype
+
+    def flush(self) -> None:
+        """Write any changes to a memory-mapped canvas back to its file."""
+        if isinstance(self._pixels, np.memmap):
+            self._pixels.flush()
 
     def write_pixel(self, x: int, y: int, color: Color) -> None:
         if not isinstance(color, Color):
@@ -21,37 +81,39 @@ class Canvas:
         self._pixels[y, x, :] = [*color]  # using the color objects iterator to unpack color to the r, g and b value
 
     def pixel_at(self, x: int, y: int) -> Color:
-        return Color(*self._pixels[y, x, :])
-
-    def to_file(self, out_filepath: Path) -> None:
-        """
-        Output the current canvas as a Portable Pixmap (PPM).
-        """
-        full_text = (
-            f"{_build_ppm_header(self.width, self.height)}\n"
-            f"{_pixels_to_ppm(self._pixels)}\n"
-        )
-        out_filepath.write_text(full_text)
+        return Color(*self._pixels[y, x, :].tolist())
 
+    def write_block(self, x0: int, y0: int, pixels: np.ndarray) -> None:
+        """Copy an (h, w, 3) array of colors into the canvas with its top left corner at `(x0, y0)`."""
+        pixels = np.asarray(pixels)
+        self._check_block(x0, y0, pixels.shape)
+        height, width, _ = pixels.shape
+        self._pixels[y0:y0 + height, x0:x0 + width] = pixels
 
-def _build_ppm_header(width: int, height: int):
-    header = f"P3\n{width} {height}\n255"
-    return header
+    def read_block(self, x0: int, y0: int, width: int, height: int) -> np.ndarray:
+        """Copy the `width` by `height` block of pixels at `(x0, y0)` out into an (h, w, 3) array."""
+        self._check_block(x0, y0, (height, width, 3))
+        return self._pixels[y0:y0 + height, x0:x0 + width].copy()
 
+    def _check_block(self, x0: int, y0: int, shape: tuple[int, ...]) -> None:
+        if len(shape) != 3 or shape[2] != 3:
+            raise ValueError(f"Expected an (h, w, 3) block. Received shape: {shape}.")
+        height, width, _ = shape
+        if x0 < 0 or y0 < 0 or width < 0 or height < 0 or x0 + width > self.width or y0 + height > self.height:
+            raise ValueError(
+                f"Block of {width}x{height} at ({x0}, {y0}) is outside the {self.width}x{self.height} canvas."
+            )
 
-def _pixels_to_ppm(pixels: np.ndarray, maxval: int = 255, maxlen: int | None = 70):
-    scaled = (pixels * maxval).astype(int)
-    scaled[scaled > maxval] = maxval
-    scaled[scaled < 0] = 0
-
-    # Now unwrap into the pixel rows
-    _, height, *_ = pixels.shape
-    scaled = scaled.reshape([height, -1])
-
-    # There's probably a way to get numpy to do what we want but this is fine
-    # Temporarily remove numpy's print setting since we're manually delimiting
-    with np.printoptions(linewidth=np.inf, threshold=np.inf):  # type: ignore[arg-type]
-        tmp = np.array2string(scaled)
-        tmp = "\n".join(" ".join(row.strip("[] ").split()) for row in tmp.splitlines())
+    def to_file(self, out_filepath: Path, fmt: str | None = None) -> None:
+        """
+        Output the current canvas, in a format picked from the file extension unless `fmt` is given.
 
-    return textwrap.fill(tmp, width=maxlen)
\ No newline at end of file
+        Supported formats are ASCII ("p3", `.ppm`) and binary ("p6", `.pnm`) Portable Pixmaps, 8-bit
+        PNG ("png", `.png`) and the floating point Portable Float Map ("pfm", `.pfm`) which keeps
+        the unclamped HDR values. Rows are encoded in bands, so the encoded image is never held in
+        memory in full.
+        """
+        with ImageSink(out_filepath, self.width, self.height, fmt) as sink:
+            for y0 in range(0, self.height, STREAM_ROWS):
+                rows = min(STREAM_ROWS, self.height - y0)
+                sink.write_block(0, y0, self.read_block(0, y0, self.width, rows))
@@ -0,0 +1,819 @@
+"""
+Scene compiler.
+
+`compile_world` lowers a `World` into flat tables: every concrete shape becomes a row of per-type
+arrays, with its composed world-to-object matrix and the ID of its material in the scene's material
+arrays. Shapes of the same primitive type are stored next to each other, so the intersection and
+normal kernels run on all of a type's candidates at once instead of dispatching through each shape's
+methods. Rows map back to the original shapes through each table's `shape`.
+
+Triangle meshes are compiled once into a table of their faces, read straight from the mesh's arrays
+and searched through the mesh's own BVH, and the shared shape of instances is compiled once into
+tables of its own. Both are placed in the scene by rows holding the transform they are placed
+under, so memory grows with the unique geometry rather than the number of placements.
+
+A BVH over the rows' world space bounds culls the rows each ray is tested against. Rays walk it
+together, a level at a time, as arrays of (ray, node) pairs, and the pairs reaching a leaf are
+tested against the leaf's rows with one kernel call per table. Closest hit queries drop the pairs
+beyond the nearest hit found so far, and any hit queries drop a ray's pairs once it hits anything,
+so nothing of size rays x shapes is ever built.
+
+Shape types without a kernel of their own are still compiled, and are intersected through their
+batched methods.
+
+Tables are stored in the scene's precision, see `raytracer.precision`, which rays traced against
+it are converted to.
+"""
+from __future__ import annotations
+
+import typing as t
+
+import numpy as np
+
+from raytracer import precision, render_stats
+from raytracer.bounds import _slab_test_batch
+from raytracer.bvh import BVHNode, build_index_tree, flatten_index_tree
+from raytracer.lights import PointLight, phong_batch
+from raytracer.materials import Material
+from raytracer.patterns import Pattern
+from raytracer.shapes import (
+    Group, Instance, Plane, Shape, SmoothTriangle, Sphere, Triangle, TriangleMesh, _moller_trumbore
+)
+from raytracer.world import World
+
+# Query modes: the nearest intersection of each ray, any one of them, or every one
+CLOSEST, ANY, ALL = "closest", "any", "all"
+
+
+def _leaves(objects: t.Iterable[Shape]) -> t.Generator[Shape, None, None]:
+    """Walk the group hierarchy, yielding the meshes, instances and concrete shapes in intersection order."""
+    for obj in objects:
+        if isinstance(obj, Group):
+            yield from _leaves(obj.children)
+        else:
+            yield obj
+
+
+def _kind(leaf: Shape) -> type[Shape]:
+    """The primitive type whose kernel intersects the leaf, or `Shape` for the generic fallback."""
+    # Subclasses may override the geometry, so only the exact types go to the kernels
+    return _KERNEL_TYPES.get(type(leaf), Shape)
+
+
+_KERNEL_TYPES: dict[type[Shape], type[Shape]] = {
+    Sphere: Sphere,
+    Plane: Plane,
+    Triangle: Triangle,
+    SmoothTriangle: Triangle,
+    TriangleMesh: TriangleMesh,
+    Instance: Instance,
+}
+
+
+def _ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenation of the index ranges `start:start + count`."""
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+
+
+def _first_per_ray(rays: np.ndarray, keys: np.ndarray | None = None) -> np.ndarray:
+    """Index of the first entry of each ray, after sorting the entries by ray and then by `keys`."""
+    order = np.lexsort((keys, rays)) if keys is not None else np.argsort(rays, kind="stable")
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = rays[order[1:]] != rays[order[:-1]]
+    return order[first]
+
+
+class Hits:
+    """
+    Intersections found by a scene query, as parallel arrays: the `ray` each belongs to, its time
+    `t`, its barycentric `u` and `v` on triangles, the `table` and `row` of the shape it is on, the
+    shape's `material` ID and surface `key`, and for closest hits the `inverse` world-to-object
+    matrix of the shape.
+    """
+    __slots__ = ("ray", "t", "u", "v", "table", "row", "material", "key", "inverse")
+
+    def __init__(
+        self,
+        ray: np.ndarray,
+        t: np.ndarray,
+        u: np.ndarray,
+        v: np.ndarray,
+        table: np.ndarray,
+        row: np.ndarray,
+        material: np.ndarray,
+        key: np.ndarray,
+        inverse: np.ndarray | None = None,
+    ) -> None:
+        self.ray = ray
+        self.t = t
+        self.u = u
+        self.v = v
+        self.table = table
+        self.row = row
+        self.material = material
+        self.key = key
+        self.inverse = inverse
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def __getitem__(self, idx: np.ndarray) -> Hits:
+        return Hits(*(None if value is None else value[idx] for value in self._values()))
+
+    def _values(self) -> list[np.ndarray | None]:
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def misses(cls, n: int, dtype: np.dtype) -> Hits:
+        """Hits of `n` rays that all miss, at infinite times."""
+        return cls(
+            np.arange(n),
+            np.full(n, np.inf, dtype=dtype),
+            np.zeros(n, dtype=dtype),
+            np.zeros(n, dtype=dtype),
+            *(np.zeros(n, dtype=np.int64) for _ in range(4)),
+            np.zeros((n, 4, 4), dtype=dtype),
+        )
+
+    @classmethod
+    def concatenate(cls, parts: list[Hits], dtype: np.dtype) -> Hits:
+        if not parts:
+            return cls.misses(0, dtype)
+        columns = zip(*(part._values() for part in parts))
+        return cls(*(None if any(v is None for v in values) else np.concatenate(values) for values in columns))
+
+
+class _Table:
+    """Rows of a compiled scene sharing a primitive type, each one the leaf shape `shapes[row]`."""
+
+    # Whether rows are shapes tested by the table's own kernel, rather than geometry searched further
+    concrete = True
+
+    def __init__(self, scene: CompiledScene, shapes: list[Shape]) -> None:
+        self.scene = scene
+        self.id = len(scene.tables)
+        scene.tables.append(self)
+        self.shapes = shapes
+        self.inverse = np.array(
+            [leaf.world_inverse.matrix for leaf in shapes], dtype=scene.dtype
+        ).reshape(-1, 4, 4)
+        self.material = np.array([self._material_id(leaf) for leaf in shapes], dtype=np.int64)
+        # Surface keys tell the shapes apart when working out which ones contain a hit, given once
+        # the rows are numbered
+        self.keys = np.zeros(len(shapes), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.shapes)
+
+    def shape(self, row: int) -> Shape:
+        """The shape behind a row."""
+        return self.shapes[row]
+
+    def _material_id(self, leaf: Shape) -> int:
+        return self.scene.material_id(leaf.material)
+
+    def surfaces(self) -> np.ndarray:
+        """Number of surface keys each row needs."""
+        return np.ones(len(self), dtype=np.int64)
+
+    def _inverses(self, rows: np.ndarray) -> np.ndarray:
+        return self.inverse[rows]
+
+    def bounds(self) -> np.ndarray:
+        """World space bounds of the rows, as an (R, 6) array of minimum and maximum corners."""
+        boxes = [leaf.world_bounds() for leaf in self.shapes]
+        return np.array(
+            [(lo.x, lo.y, lo.z, hi.x, hi.y, hi.z) for lo, hi in ((box.minimum, box.maximum) for box in boxes)],
+            dtype=float,
+        ).reshape(-1, 6)
+
+    def _local_rays(
+        self, origins: np.ndarray, directions: np.ndarray, rows: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Rays moved into the space of the shape each is paired with, as (P, 4) arrays."""
+        inverse = self.inverse[rows]
+        return (inverse @ origins[:, :, np.newaxis])[..., 0], (inverse @ directions[:, :, np.newaxis])[..., 0]
+
+    def hits(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        rows: np.ndarray,
+        t_lo: np.ndarray,
+        t_hi: np.ndarray,
+        mode: str,
+    ) -> Hits:
+        """
+        Intersections of P rays with the shapes at `rows` they are paired with, within each pair's
+        `(t_lo, t_hi)`. The hits' `ray` is the index of their pair. Only the nearest intersection of
+        each pair is kept unless `mode` is `ALL`.
+        """
+        raise NotImplementedError
+
+    def _window(
+        self,
+        ts: np.ndarray,
+        rows: np.ndarray,
+        t_lo: np.ndarray,
+        t_hi: np.ndarray,
+        mode: str,
+        u: np.ndarray | None = None,
+        v: np.ndarray | None = None,
+    ) -> Hits:
+        """Hits from the (P, k) intersection times of P pairs, `inf` where there are none."""
+        inside = (ts > t_lo[:, np.newaxis]) & (ts < t_hi[:, np.newaxis])
+        if mode != ALL and ts.shape[1] > 1:
+            column = np.where(inside, ts, np.inf).argmin(axis=1)
+            pairs = np.flatnonzero(inside.any(axis=1))
+            column = column[pairs]
+        else:
+            pairs, column = np.nonzero(inside)
+
+        rows = rows[pairs]
+        zeros = np.zeros(len(pairs), dtype=ts.dtype)
+        return Hits(
+            pairs,
+            ts[pairs, column],
+            zeros if u is None else u[pairs],
+            zeros if v is None else v[pairs],
+            np.full(len(pairs), self.id, dtype=np.int64),
+            rows,
+            self.material[rows],
+            self.keys[rows],
+            self._inverses(rows) if mode == CLOSEST else None,
+        )
+
+    def local_normals(self, rows: np.ndarray, local_points: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Object space normals at (M, 4) points on the shapes at table `rows`, hit at `u` and `v`."""
+        raise NotImplementedError
+
+
+class _SphereTable(_Table):
+
+    def hits(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        rows: np.ndarray,
+        t_lo: np.ndarray,
+        t_hi: np.ndarray,
+        mode: str,
+    ) -> Hits:
+        origins, directions = self._local_rays(origins, directions, rows)
+        # The ray's origin is also the vector from the sphere's center to it
+        o, d = origins[:, :3], directions[:, :3]
+        a = np.einsum("ij,ij->i", d, d)
+        b = 2 * np.einsum("ij,ij->i", d, o)
+        c = np.einsum("ij,ij->i", o, o) - 1
+        discriminant = b**2 - (4 * a * c)
+
+        missed = discriminant < 0
+        root = np.sqrt(np.where(missed, 0, discriminant))
+
+        ts = np.stack(((-b - root) / (2 * a), (-b + root) / (2 * a)), axis=1)
+        ts[missed] = np.inf
+        return self._window(ts, rows, t_lo, t_hi, mode)
+
+    def local_normals(self, rows: np.ndarray, local_points: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        normals = local_points.copy()
+        normals[:, 3] = 0
+        return normals
+
+
+class _PlaneTable(_Table):
+
+    def hits(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        rows: np.ndarray,
+        t_lo: np.ndarray,
+        t_hi: np.ndarray,
+        mode: str,
+    ) -> Hits:
+        origins, directions = self._local_rays(origins, directions, rows)
+        dir_y = directions[:, 1]
+        parallel = np.abs(dir_y) < self.scene.epsilon
+        ts = -origins[:, 1] / np.where(parallel, 1, dir_y)
+        ts[parallel] = np.inf
+        return self._window(ts[:, np.newaxis], rows, t_lo, t_hi, mode)
+
+    def local_normals(self, rows: np.ndarray, local_points: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        normals = np.zeros_like(local_points)
+        normals[:, 1] = 1
+        return normals
+
+
+class _TriangleTable(_Table):
+    """
+    Flat and smooth triangles, with each one's first corner `p1` and edges `e1` and `e2`. Smooth
+    triangles also have their corner normals `n1` to `n3`, while flat ones repeat their face normal.
+    """
+
+    def __init__(self, scene: CompiledScene, shapes: list[Shape]) -> None:
+        super().__init__(scene, shapes)
+
+        def rows(attr: t.Callable[[Triangle], t.Any]) -> np.ndarray:
+            return np.array([[*attr(shape)][:3] for shape in shapes], dtype=scene.dtype).reshape(-1, 3)
+
+        self.p1, self.e1, self.e2 = rows(lambda s: s.p1), rows(lambda s: s.e1), rows(lambda s: s.e2)
+        self.corner_normals = np.stack(
+            [rows(lambda s, n=n: getattr(s, n, s.normal)) for n in ("n1", "n2", "n3")], axis=1
+        )
+
+    def hits(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        rows: np.ndarray,
+        t_lo: np.ndarray,
+        t_hi: np.ndarray,
+        mode: str,
+    ) -> Hits:
+        origins, directions = self._local_rays(origins, directions, rows)
+        ts, u, v = _moller_trumbore(origins[:, :3], directions[:, :3], self.p1[rows], self.e1[rows], self.e2[rows])
+        return self._window(ts[:, np.newaxis], rows, t_lo, t_hi, mode, u, v)
+
+    def local_normals(self, rows: np.ndarray, local_points: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        n1, n2, n3 = np.moveaxis(self.corner_normals[rows], 1, 0)
+        normals = np.zeros_like(local_points)
+        normals[:, :3] = n2 * u[:, np.newaxis] + n3 * v[:, np.newaxis] + n1 * (1 - u - v)[:, np.newaxis]
+        return normals
+
+
+class _GenericTable(_Table):
+    """Shapes without a kernel, intersected through their own batched methods."""
+
+    def hits(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        rows: np.ndarray,
+        t_lo: np.ndarray,
+        t_hi: np.ndarray,
+        mode: str,
+    ) -> Hits:
+        origins, directions = self._local_rays(origins, directions, rows)
+        parts = []
+        for row in np.unique(rows):
+            pairs = np.flatnonzero(rows == row)
+            ts = self.shapes[row]._local_intersect_batch(origins[pairs], directions[pairs])
+            hits = self._window(ts.astype(origins.dtype), rows[pairs], t_lo[pairs], t_hi[pairs], mode)
+            hits.ray = pairs[hits.ray]
+            parts.append(hits)
+        return Hits.concatenate(parts, self.scene.dtype)
+
+    def local_normals(self, rows: np.ndarray, local_points: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        normals = np.empty_like(local_points)
+        for row in np.unique(rows):
+            on_row = rows == row
+            normals[on_row] = self.shapes[row]._local_normal_at_batch(local_points[on_row])
+        return normals
+
+
+class _FaceTable(_TriangleTable):
+    """
+    Faces of a triangle mesh in the mesh's object space, read from its `_p1`, `_e1` and `_e2` arrays
+    with no `Triangle` created for them. Rows are face indices.
+    """
+
+    def __init__(self, scene: CompiledScene, mesh: TriangleMesh) -> None:
+        self.scene = scene
+        self.id = len(scene.tables)
+        scene.tables.append(self)
+        self.mesh = mesh
+        self.shapes = []
+
+        dtype = scene.dtype
+        self.p1 = mesh._p1.astype(dtype, copy=False)
+        self.e1 = mesh._e1.astype(dtype, copy=False)
+        self.e2 = mesh._e2.astype(dtype, copy=False)
+        self.material = np.broadcast_to(np.int64(scene.material_id(mesh.material)), len(mesh))
+        self.keys = np.zeros(len(mesh), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.mesh)
+
+    def shape(self, row: int) -> Shape:
+        return self.mesh.triangle(row)
+
+    def _inverses(self, rows: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(np.eye(4, dtype=self.scene.dtype), (len(rows), 4, 4))
+
+    def hits(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        rows: np.ndarray,
+        t_lo: np.ndarray,
+        t_hi: np.ndarray,
+        mode: str,
+    ) -> Hits:
+        ts, u, v = _moller_trumbore(origins[:, :3], directions[:, :3], self.p1[rows], self.e1[rows], self.e2[rows])
+        return self._window(ts[:, np.newaxis], rows, t_lo, t_hi, mode, u, v)
+
+    def local_normals(self, rows: np.ndarray, local_points: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        mesh = self.mesh
+        normals = np.zeros_like(local_points)
+        if mesh.normals is None:
+            normals[:, :3] = np.cross(self.e2[rows], self.e1[rows])
+            return normals
+
+        n1, n2, n3 = np.moveaxis(mesh.normals[mesh.normal_faces[rows]], 1, 0)
+        normals[:, :3] = n2 * u[:, np.newaxis] + n3 * v[:, np.newaxis] + n1 * (1 - u - v)[:, np.newaxis]
+        return normals
+
+
+class _NestedTable(_Table):
+    """
+    Meshes or instances, whose geometry is compiled on its own, with each row placing that geometry
+    in the scene under the row's transform. Rays are moved into the row's space and search the
+    geometry through its own BVH, so it is stored once however many rows place it. Hits are reported
+    on the geometry's shapes, with the row's transform applied and, where the row has one, its
+    material override.
+    """
+
+    concrete = False
+
+    def __init__(self, scene: CompiledScene, shapes: list[Shape]) -> None:
+        super().__init__(scene, shapes)
+        self.geometries: list[_Geometry] = []
+        numbers: dict[int, int] = {}
+        geometry_id = []
+        for leaf in shapes:
+            geometry = scene.faces(leaf) if isinstance(leaf, TriangleMesh) else scene.geometry(leaf.shape)
+            geometry_id.append(numbers.setdefault(id(geometry), len(numbers)))
+            if len(numbers) > len(self.geometries):
+                self.geometries.append(geometry)
+        self.geometry_id = np.array(geometry_id, dtype=np.int64)
+
+    def _material_id(self, leaf: Shape) -> int:
+        # -1 keeps the materials of the geometry's own shapes
+        override = leaf.material_override if isinstance(leaf, Instance) else None
+        return -1 if override is None else self.scene.material_id(override)
+
+    def surfaces(self) -> np.ndarray:
+        return np.array([self.geometries[i].surfaces for i in self.geometry_id], dtype=np.int64)
+
+    def hits(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        rows: np.ndarray,
+        t_lo: np.ndarray,
+        t_hi: np.ndarray,
+        mode: str,
+    ) -> Hits:
+        origins, directions = self._local_rays(origins, directions, rows)
+        geometry_id = self.geometry_id[rows]
+        parts = []
+        for i in np.unique(geometry_id):
+            pairs = np.flatnonzero(geometry_id == i)
+            hits = self.geometries[i].query(origins[pairs], directions[pairs], t_lo[pairs], t_hi[pairs], mode)
+            hits.ray = pairs[hits.ray]
+            hit_rows = rows[hits.ray]
+            hits.key = hits.key + self.keys[hit_rows]
+            override = self.material[hit_rows]
+            hits.material = np.where(override >= 0, override, hits.material)
+            if hits.inverse is not None:
+                hits.inverse = hits.inverse @ self.inverse[hit_rows]
+            parts.append(hits)
+        return Hits.concatenate(parts, self.scene.dtype)
+
+
+_TABLES: dict[type, type[_Table]] = {
+    Sphere: _SphereTable,
+    Plane: _PlaneTable,
+    Triangle: _TriangleTable,
+    TriangleMesh: _NestedTable,
+    Instance: _NestedTable,
+    Shape: _GenericTable,
+}
+
+
+class _Geometry:
+    """
+    Tables of shapes in one space, with a BVH over their rows. Rows are numbered as items across the
+    tables in order; items with infinite bounds are tested against every ray instead. The BVH is
+    built over the rows' bounds unless a `tree` over the items, from `build_index_tree`, is given.
+
+    Every surface reachable from the geometry has a key of its own, out of `surfaces` keys.
+    """
+
+    def __init__(self, tables: list[_Table], tree: BVHNode | None = None) -> None:
+        self.tables = tables
+        self.item_table = np.repeat(np.arange(len(tables)), [len(table) for table in tables])
+        self.item_row = np.concatenate([np.arange(len(table)) for table in tables] or [np.zeros(0, dtype=np.int64)])
+        self.surfaces = 0
+        for table in tables:
+            surfaces = table.surfaces()
+            table.keys = self.surfaces + np.cumsum(surfaces) - surfaces
+            self.surfaces += int(surfaces.sum())
+
+        if tree is not None:
+            self.unbounded = np.zeros(0, dtype=np.int64)
+            flat = flatten_index_tree(tree)
+            self.order = flat["order"]
+        else:
+            boxes = np.concatenate([table.bounds() for table in tables] or [np.zeros((0, 6))])
+            empty = (boxes[:, :3] > boxes[:, 3:]).any(axis=1)
+            infinite = ~empty & ~np.isfinite(boxes).all(axis=1)
+            bounded = np.flatnonzero(~empty & ~infinite)
+            self.unbounded = np.flatnonzero(infinite)
+            flat = flatten_index_tree(build_index_tree(boxes[bounded, :3], boxes[bounded, 3:]))
+            self.order = bounded[flat["order"]]
+
+        self.lo, self.hi = flat["lo"], flat["hi"]
+        self.children, self.leaves = flat["children"], flat["leaves"]
+
+    def query(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        t_lo: np.ndarray,
+        t_hi: np.ndarray,
+        mode: str,
+    ) -> Hits:
+        """
+        Intersections of N rays within their `(t_lo, t_hi)`: the nearest one of each ray that hits
+        anything for `CLOSEST`, any one for `ANY`, and all of them for `ALL`.
+        """
+        n = len(origins)
+        # Closest hit queries narrow each ray's window down to the nearest hit found so far
+        bound = t_hi.copy()
+        done = np.zeros(n, dtype=bool)
+        found: list[Hits] = []
+
+        def test(rays: np.ndarray, items: np.ndarray) -> None:
+            if mode == ANY:
+                keep = ~done[rays]
+                rays, items = rays[keep], items[keep]
+            hits = self._test(origins, directions, rays, items, t_lo, bound, mode)
+            if not len(hits):
+                return
+            if mode == CLOSEST:
+                np.minimum.at(bound, hits.ray, hits.t)
+            elif mode == ANY:
+                done[hits.ray] = True
+            found.append(hits)
+
+        if n and len(self.unbounded):
+            test(np.repeat(np.arange(n), len(self.unbounded)), np.tile(self.unbounded, n))
+
+        if n and len(self.lo):
+            with np.errstate(divide="ignore"):
+                inv_dirs = 1 / directions[:, :3]
+            rays, nodes = np.arange(n), np.zeros(n, dtype=np.int64)
+            while len(rays):
+                near, far = _slab_test_batch(self.lo[nodes], self.hi[nodes], origins[rays, :3], inv_dirs[rays])
+                keep = (near <= far) & (far > t_lo[rays]) & (near < bound[rays])
+                if mode == ANY:
+                    keep &= ~done[rays]
+                rays, nodes = rays[keep], nodes[keep]
+
+                leaf = self.children[nodes, 0] < 0
+                if leaf.any():
+                    starts, counts = self.leaves[nodes[leaf]].T
+                    test(np.repeat(rays[leaf], counts), self.order[_ranges(starts, counts)])
+
+                inner, rays = nodes[~leaf], rays[~leaf]
+                rays = np.concatenate((rays, rays))
+                nodes = np.concatenate((self.children[inner, 0], self.children[inner, 1]))
+
+        hits = Hits.concatenate(found, origins.dtype)
+        if mode == CLOSEST:
+            hits = hits[hits.t <= bound[hits.ray]]
+            return hits[_first_per_ray(hits.ray, hits.t)]
+        if mode == ANY:
+            return hits[_first_per_ray(hits.ray)]
+        return hits
+
+    def _test(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        rays: np.ndarray,
+        items: np.ndarray,
+        t_lo: np.ndarray,
+        t_hi: np.ndarray,
+        mode: str,
+    ) -> Hits:
+        """Intersections of the rays with the items they are paired with, a table at a time."""
+        stats = render_stats.active
+        tables, rows = self.item_table[items], self.item_row[items]
+        parts = []
+        for i in np.unique(tables):
+            pairs = np.flatnonzero(tables == i)
+            pair_rays = rays[pairs]
+            hits = self.tables[i].hits(
+                origins[pair_rays], directions[pair_rays], rows[pairs], t_lo[pair_rays], t_hi[pair_rays], mode
+            )
+            hits.ray = pair_rays[hits.ray]
+            parts.append(hits)
+            if stats is not None and stats.count_tests and self.tables[i].concrete:
+                stats.local_intersects += len(pairs)
+        return Hits.concatenate(parts, origins.dtype)
+
+
+class CompiledScene:
+    """
+    The concrete shapes of a world as flat tables, for the wavefront engine's batched kernels.
+
+    `tables` holds a table per primitive type, for the world and for each instanced shape, and one
+    of faces per mesh, and hits point back to the shape they are on by their `table` and `row` in
+    it. Materials are numbered too, and the per-material arrays such as `color` or `reflective` are
+    indexed by a hit's `material`.
+
+    Floating point tables are in `dtype`, the active precision unless another is given.
+    """
+
+    def __init__(self, world: World, dtype: precision.Precision | None = None) -> None:
+        self.world = world
+        self.dtype = precision.resolve(dtype)
+        self.epsilon = precision.epsilon(self.dtype)
+        self.materials: list[Material] = []
+        self._material_ids: dict[int, int] = {}
+        self.tables: list[_Table] = []
+        self._geometries: dict[int, _Geometry] = {}
+        self._faces: dict[int, _Geometry] = {}
+        self.root = self._compile(world.objects)
+
+        materials = self.materials
+        self.color = np.array([[*m.color] for m in materials], dtype=self.dtype).reshape(-1, 3)
+        self.ambient = np.array([m.ambient for m in materials], dtype=self.dtype)
+        self.diffuse = np.array([m.diffuse for m in materials], dtype=self.dtype)
+        self.specular = np.array([m.specular for m in materials], dtype=self.dtype)
+        self.shininess = np.array([m.shininess for m in materials], dtype=self.dtype)
+        self.reflective = np.array([m.reflective for m in materials], dtype=self.dtype)
+        self.transparency = np.array([m.transparency for m in materials], dtype=self.dtype)
+        self.refractive_index = np.array([m.refractive_index for m in materials], dtype=self.dtype)
+
+        # Patterns are shared between materials using the same one, and -1 marks a plain color
+        self.patterns: list[Pattern] = []
+        pattern_ids: dict[int, int] = {}
+        for m in materials:
+            if m.pattern is not None and id(m.pattern) not in pattern_ids:
+                pattern_ids[id(m.pattern)] = len(self.patterns)
+                self.patterns.append(m.pattern)
+        self.pattern_id = np.array(
+            [-1 if m.pattern is None else pattern_ids[id(m.pattern)] for m in materials], dtype=np.int64
+        )
+
+    def __len__(self) -> int:
+        return sum(len(table) for table in self.tables)
+
+    def material_id(self, material: Material) -> int:
+        """Number of the material in the scene's material arrays, adding it if it is new."""
+        material_id = self._material_ids.get(id(material))
+        if material_id is None:
+            material_id = self._material_ids[id(material)] = len(self.materials)
+            self.materials.append(material)
+        return material_id
+
+    def _compile(self, objects: t.Iterable[Shape]) -> _Geometry:
+        by_kind: dict[type, list[Shape]] = {kind: [] for kind in _TABLES}
+        for leaf in _leaves(objects):
+            by_kind[_kind(leaf)].append(leaf)
+        return _Geometry([_TABLES[kind](self, leaves) for kind, leaves in by_kind.items() if leaves])
+
+    def geometry(self, shape: Shape) -> _Geometry:
+        """The geometry of an instanced shape, compiled on first use and shared by every instance of it."""
+        geometry = self._geometries.get(id(shape))
+        if geometry is None:
+            geometry = self._geometries[id(shape)] = self._compile([shape])
+        return geometry
+
+    def faces(self, mesh: TriangleMesh) -> _Geometry:
+        """The faces of a mesh, compiled on first use and shared by every row placing the mesh."""
+        geometry = self._faces.get(id(mesh))
+        if geometry is None:
+            geometry = self._faces[id(mesh)] = _Geometry([_FaceTable(self, mesh)], mesh.tree)
+        return geometry
+
+    def closest(self, origins: np.ndarray, directions: np.ndarray) -> Hits:
+        """
+        The hit of each of N rays, i.e. its nearest positive intersection. There is one hit per ray,
+        in order, at an infinite time for the rays that miss.
+        """
+        n = len(origins)
+        found = self.root.query(
+            origins, directions, np.zeros(n, dtype=self.dtype), np.full(n, np.inf, dtype=self.dtype), CLOSEST
+        )
+        hits = Hits.misses(n, self.dtype)
+        for name in Hits.__slots__[1:]:
+            getattr(hits, name)[found.ray] = getattr(found, name)
+        return hits
+
+    def occluded(self, origins: np.ndarray, directions: np.ndarray, distance: np.ndarray) -> np.ndarray:
+        """Whether each ray intersects anything in (0, distance), each stopping at the first intersection found."""
+        n = len(origins)
+        found = self.root.query(origins, directions, np.zeros(n, dtype=self.dtype), distance, ANY)
+        occluded = np.zeros(n, dtype=bool)
+        occluded[found.ray] = True
+        return occluded
+
+    def normals(self, hits: Hits, points: np.ndarray) -> np.ndarray:
+        """World space normals at the (N, 4) points of the hits."""
+        local_points = (hits.inverse @ points[:, :, np.newaxis])[..., 0]
+        local_normals = np.empty_like(points)
+        for i in np.unique(hits.table):
+            on_table = hits.table == i
+            local_normals[on_table] = self.tables[i].local_normals(
+                hits.row[on_table], local_points[on_table], hits.u[on_table], hits.v[on_table]
+            )
+
+        # Normals go back to world space through the transpose of the world-to-object matrix
+        normals = np.zeros_like(points)
+        normals[:, :3] = np.einsum("nji,nj->ni", hits.inverse[:, :3, :3], local_normals[:, :3])
+        normals /= np.sqrt(np.einsum("ij,ij->i", normals, normals))[:, np.newaxis]
+        return normals
+
+    def shade(
+        self,
+        light: PointLight,
+        hits: Hits,
+        points: np.ndarray,
+        eye_v: np.ndarray,
+        normals: np.ndarray,
+        in_shadow: np.ndarray,
+    ) -> np.ndarray:
+        """Batched `lighting` of the (N, 4) points of the hits, from their material arrays."""
+        material = hits.material
+        surf_color = self.color[material]
+        pattern_id = self.pattern_id[material]
+        for i in np.unique(pattern_id[pattern_id >= 0]):
+            with_pattern = pattern_id == i
+            pattern = self.patterns[i]
+            object_points = (hits.inverse[with_pattern] @ points[with_pattern, :, np.newaxis])[..., 0]
+            surf_color[with_pattern] = pattern.at_point_batch(pattern.inverse * object_points)
+
+        return phong_batch(
+            light,
+            surf_color,
+            points,
+            eye_v,
+            normals,
+            in_shadow,
+            self.ambient[material],
+            self.diffuse[material],
+            self.specular[material],
+            self.shininess[material],
+        )
+
+    def refractive_indices(
+        self, origins: np.ndarray, directions: np.ndarray, hits: Hits
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Batched `_calc_refractive_indices` for the hits of N rays.
+
+        Every intersection before the hit is only collected for these rays. A surface contains the
+        hit if the ray crossed it an odd number of times before the hit, and the innermost container
+        is the one entered most recently.
+        """
+        n = len(hits)
+        crossings = self.root.query(origins, directions, np.full(n, -np.inf, dtype=self.dtype), hits.t, ALL)
+
+        # Group the crossings by ray and surface, in time order within each group
+        order = np.lexsort((crossings.t, crossings.key, crossings.ray))
+        ray, key = crossings.ray[order], crossings.key[order]
+        starts = np.flatnonzero((np.diff(ray, prepend=-1) != 0) | (np.diff(key, prepend=-1) != 0))
+        counts = np.diff(starts, append=len(ray))
+        last_t = crossings.t[order][starts + counts - 1]
+        ray, key, material = ray[starts], key[starts], crossings.material[order][starts]
+        # Time each surface was last entered, or -inf if it doesn't contain the hit
+        entered = np.where(counts % 2 == 1, last_t, -np.inf)
+
+        def innermost(entered: np.ndarray) -> np.ndarray:
+            indices = np.ones(n, dtype=self.dtype)
+            inside = np.flatnonzero(np.isfinite(entered))
+            latest = inside[_first_per_ray(ray[inside], -entered[inside])]
+            indices[ray[latest]] = self.refractive_index[material[latest]]
+            return indices
+
+        n1 = innermost(entered)
+
+        # The hit surface is exited if it already contained the hit, otherwise it is entered
+        on_hit = key == hits.key[ray]
+        exiting = np.zeros(n, dtype=bool)
+        exiting[ray[on_hit & np.isfinite(entered)]] = True
+        entered[on_hit] = -np.inf
+        n2 = np.where(exiting, innermost(entered), self.refractive_index[hits.material])
+
+        return n1, n2
+
+
+def compile_world(world: World, dtype: precision.Precision | None = None) -> CompiledScene:
+    """
+    The world's compiled scene. It is kept on the world and reused for as long as the world's BVH
+    is current, so repeat renders of an unchanged world skip compiling it.
+    """
+    dtype = precision.resolve(dtype)
+    world.freeze()
+    bvh = world.bvh
+    if world._compiled is not None and world._compiled[0] is bvh and world._compiled[1].dtype == dtype:
+        return world._compiled[1]
+
+    scene = CompiledScene(world, dtype)
+    world._compiled = bvh, scene
+    return scene
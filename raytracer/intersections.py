@@ -6,6 +6,8 @@ from collections import UserList
 from dataclasses import dataclass, field
 from functools import cached_property
 
+import numpy as np
+
 from raytracer import NUMERIC_T, EPSILON
 from raytracer.rays import Ray
 from raytracer.tuple import Tuple, dot
@@ -41,6 +43,20 @@ class Intersections(UserList):
         return None
 
 
+def hit_batch(ts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batched counterpart of `Intersections.hit`.
+
+    Takes an (N, k) array of intersection times (`inf` where there is none) and returns the lowest
+    positive time of each row, `inf` if there isn't one, along with a mask of the rows that hit.
+    """
+    if ts.shape[1] == 0:
+        return np.full(len(ts), np.inf), np.zeros(len(ts), dtype=bool)
+
+    nearest = np.where(ts > 0, ts, np.inf).min(axis=1)
+    return nearest, np.isfinite(nearest)
+
+
 @dataclass(slots=True)
 class IntersectionComp:
     t: NUMERIC_T
@@ -137,3 +153,19 @@ def schlick(comps: IntersectionComp) -> float:
 
     r0 = ((comps.n1 - comps.n2) / (comps.n1 + comps.n2)) ** 2
     return r0 + (1 - r0) * (1 - cos) ** 5
+
+
+def schlick_batch(eye_v: np.ndarray, normal: np.ndarray, n1: np.ndarray, n2: np.ndarray) -> np.ndarray:
+    """
+    Batched `schlick`, taking (N, 4) eye and normal vectors and (N,) refractive indices.
+    """
+    cos = np.einsum("ij,ij->i", eye_v, normal)
+
+    # Total internal reflection can only occur if n1 > n2
+    n = n1 / n2
+    sin2_t = n**2 * (1.0 - cos**2)
+    total_internal = (n1 > n2) & (sin2_t > 1)
+    cos = np.where(n1 > n2, np.sqrt(np.clip(1.0 - sin2_t, 0, None)), cos)
+
+    r0 = ((n1 - n2) / (n1 + n2)) ** 2
+    return np.where(total_internal, 1.0, r0 + (1 - r0) * (1 - cos) ** 5)
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+import numpy as np
+
+from raytracer import NUMERIC_T
 from raytracer.color import BLUE
 from raytracer.materials import Material
 from raytracer.tuple import Tuple, TupleType, dot
@@ -66,3 +69,82 @@ def lighting(
             specular = light.intensity * material.specular * factor
 
     return ambient + diffuse + specular
+
+
+def lighting_batch(
+    material: Material,
+    obj: Shape,
+    light: PointLight,
+    surf_pos: np.ndarray,
+    eye_v: np.ndarray,
+    normal: np.ndarray,
+    in_shadow: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Batched `lighting` for N points on the same object.
+
+    Positions, eye and normal vectors are (N, 4) arrays and `in_shadow` an optional (N,) mask. Returns
+    the (N, 3) shaded colors.
+    """
+    if material.pattern:
+        surf_color = material.pattern.at_object_batch(obj, surf_pos)
+    else:
+        surf_color = np.broadcast_to(np.array([*material.color], dtype=float), (len(surf_pos), 3))
+
+    return phong_batch(
+        light,
+        surf_color,
+        surf_pos,
+        eye_v,
+        normal,
+        in_shadow,
+        material.ambient,
+        material.diffuse,
+        material.specular,
+        material.shininess,
+    )
+
+
+def phong_batch(
+    light: PointLight,
+    surf_color: np.ndarray,
+    surf_pos: np.ndarray,
+    eye_v: np.ndarray,
+    normal: np.ndarray,
+    in_shadow: np.ndarray | None,
+    ambient: NUMERIC_T | np.ndarray,
+    diffuse: NUMERIC_T | np.ndarray,
+    specular: NUMERIC_T | np.ndarray,
+    shininess: NUMERIC_T | np.ndarray,
+) -> np.ndarray:
+    """
+    The Phong model behind `lighting_batch`, given the (N, 3) surface colors and the material's
+    coefficients, either shared by all N points or as (N,) arrays.
+    """
+    # Computed in the precision of the surface points, see `raytracer.precision`
+    dtype = np.result_type(surf_pos, np.float32)
+    ambient, diffuse, specular = (np.asarray(k, dtype=dtype)[..., np.newaxis] for k in (ambient, diffuse, specular))
+
+    intensity = np.array([*light.intensity], dtype=dtype)
+    effective_color = surf_color * intensity
+    ambient = effective_color * ambient
+
+    light_vec = np.array([*light.position, 1], dtype=dtype) - surf_pos
+    light_vec /= np.sqrt(np.einsum("ij,ij->i", light_vec, light_vec))[:, np.newaxis]
+    light_dot_normal = np.einsum("ij,ij->i", light_vec, normal)
+
+    # A negative light_dot_normal means the light is on the other side of the surface
+    lit = light_dot_normal >= 0
+    if in_shadow is not None:
+        lit &= ~in_shadow
+
+    diffuse = effective_color * diffuse * np.where(lit, light_dot_normal, 0)[:, np.newaxis]
+
+    # -light_vec.reflect(normal)
+    reflect_vec = 2 * light_dot_normal[:, np.newaxis] * normal - light_vec
+    reflect_dot_eye = np.einsum("ij,ij->i", reflect_vec, eye_v)
+    specular_mask = lit & (reflect_dot_eye > 0)
+    factor = np.where(specular_mask, np.where(specular_mask, reflect_dot_eye, 0) ** shininess, 0)
+    specular = intensity * specular * factor[:, np.newaxis]
+
+    return ambient + diffuse + specular
@@ -1,27 +1,46 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from raytracer.tuple import Tuple
+from raytracer.tuple_array import TupleArray
 import numpy as np
+import typing as t
 
 
 @dataclass(slots=True)
 class Matrix:
     """
     Matrix is build using ndarrays and supports multiplication.
+
+    Besides a `Tuple` or another `Matrix`, it multiplies whole batches at once: `Points` and `Vectors`
+    keep their type, and (N, 4) arrays laid out like `Tuple.as_array` give (N, 4) arrays back.
+
+    `Matrix.inversions` counts every call to `inverse`, which is handy to check how many inversions
+    a render performed.
     """
 
     matrix: np.ndarray
 
-    def __mul__(self, other: object) -> Matrix | Tuple:
+    inversions: t.ClassVar[int] = 0
+
+    def __mul__(self, other: object) -> Matrix | Tuple | TupleArray | np.ndarray:
         if isinstance(other, Tuple):
             dotprod = self.matrix.dot(other.as_array())
 
             return Tuple.from_array(dotprod)
         elif isinstance(other, Matrix):
             return Matrix(self.matrix.dot(other.matrix))
+        elif isinstance(other, TupleArray):
+            return other.transform(self)
+        elif isinstance(other, np.ndarray):
+            return self._apply_array(other)
 
         return NotImplemented
 
+    def _apply_array(self, array: np.ndarray) -> np.ndarray:
+        if array.ndim != 2 or array.shape[1] != 4:
+            raise ValueError(f"Expected an (N, 4) array. Received shape: {array.shape}.")
+        return array @ self.matrix.T
+
     def __rmul__(self, other: object) -> Matrix | Tuple:
         if isinstance(other, Tuple):
             dotprod = self.matrix.dot(other.as_array())
@@ -38,11 +57,172 @@ class Matrix:
         return np.allclose(self.matrix, other.matrix, rtol=1e-4)
 
     def inverse(self) -> Matrix:
+        Matrix.inversions += 1
         return Matrix(np.linalg.inv(self.matrix))
 
     def transpose(self) -> Matrix:
         return Matrix(self.matrix.T)
 
+    def linear_transpose(self) -> Affine:
+        """
+        Transpose of the upper left 3x3 block alone, without translation, with (0, 0, 0, 1) as its last
+        row so vectors stay vectors. Applied to the inverse of a transform, it is the matrix taking
+        normals through that transform.
+        """
+        matrix = np.eye(4)
+        matrix[:3, :3] = self.matrix[:3, :3].T
+        return Affine(matrix)
+
     @staticmethod
     def identity() -> Matrix:
-        return Matrix(np.identity(4))
+        return Affine.identity()
+
+    @staticmethod
+    def reset_inversions() -> int:
+        """Reset the inversion counter, returning its previous value."""
+        count = Matrix.inversions
+        Matrix.inversions = 0
+        return count
+
+
+@dataclass(slots=True, eq=False)
+class Affine(Matrix):
+    """
+    Matrix whose last row is (0, 0, 0, 1), i.e. a 3x3 linear part followed by a translation, as built
+    by `raytracer.transforms`. It equals and multiplies like any other `Matrix`, but inverts in closed
+    form and transforms tuples in plain Python rather than through NumPy.
+
+    `rows` holds the first three rows of the matrix flattened into 12 floats. It is derived from
+    `matrix` on first use when not given. So that it can't go stale, `matrix` is kept as a read-only
+    array (copying it if it was writable) and reassigning it drops `rows`.
+    """
+
+    _rows: tuple[float, ...] | None = field(default=None, repr=False)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        if name == "matrix":
+            value = _read_only(value)
+            object.__setattr__(self, "_rows", None)
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_rows(cls, rows: t.Sequence[float]) -> Affine:
+        """Build from the first three rows of the matrix, flattened."""
+        rows = tuple(rows)
+        matrix = np.fromiter(rows + (0.0, 0.0, 0.0, 1.0), float, 16).reshape(4, 4)
+        matrix.flags.writeable = False
+        return cls(matrix, rows)
+
+    @property
+    def rows(self) -> tuple[float, ...]:
+        rows = self._rows
+        if rows is None:
+            rows = self._rows = tuple(self.matrix[:3].ravel().tolist())
+        return rows
+
+    def __mul__(self, other: object) -> Matrix | Tuple | TupleArray | np.ndarray:
+        if isinstance(other, Tuple):
+            return self._apply(other)
+        elif isinstance(other, Affine):
+            return Affine(self.matrix.dot(other.matrix))
+
+        return Matrix.__mul__(self, other)
+
+    def __rmul__(self, other: object) -> Matrix | Tuple:
+        if isinstance(other, Tuple):
+            return self._apply(other)
+        elif isinstance(other, Matrix):
+            # Python tries this before the plain matrix's own __mul__, as Affine is a subclass
+            return Matrix(other.matrix.dot(self.matrix))
+
+        return NotImplemented
+
+    def _apply(self, tup: Tuple) -> Tuple:
+        a, b, c, tx, d, e, f, ty, g, h, i, tz = self.rows
+        x, y, z, w = tup.x, tup.y, tup.z, tup.w
+        return Tuple(
+            a * x + b * y + c * z + tx * w,
+            d * x + e * y + f * z + ty * w,
+            g * x + h * y + i * z + tz * w,
+            w,
+        )
+
+    def inverse(self) -> Affine:
+        Matrix.inversions += 1
+        a, b, c, tx, d, e, f, ty, g, h, i, tz = self.rows
+
+        # Cofactors of the linear part, which make up the first column of its adjugate
+        co_a = e * i - f * h
+        co_b = f * g - d * i
+        co_c = d * h - e * g
+        det = a * co_a + b * co_b + c * co_c
+        if det == 0:
+            raise np.linalg.LinAlgError("Singular matrix")
+
+        r = 1 / det
+        ia, ib, ic = co_a * r, (c * h - b * i) * r, (b * f - c * e) * r
+        id_, ie, if_ = co_b * r, (a * i - c * g) * r, (c * d - a * f) * r
+        ig, ih, ii = co_c * r, (b * g - a * h) * r, (a * e - b * d) * r
+        # The inverse translation undoes the translation after the inverse linear part
+        return Affine.from_rows((
+            ia, ib, ic, -(ia * tx + ib * ty + ic * tz),
+            id_, ie, if_, -(id_ * tx + ie * ty + if_ * tz),
+            ig, ih, ii, -(ig * tx + ih * ty + ii * tz),
+        ))
+
+    def linear_transpose(self) -> Affine:
+        a, b, c, _, d, e, f, _, g, h, i, _ = self.rows
+        return Affine.from_rows((a, d, g, 0.0, b, e, h, 0.0, c, f, i, 0.0))
+
+    @staticmethod
+    def identity() -> Affine:
+        return Affine.from_rows((1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0))
+
+
+def _read_only(matrix: np.ndarray) -> np.ndarray:
+    if matrix.flags.writeable:
+        matrix = matrix.copy()
+        matrix.flags.writeable = False
+    return matrix
+
+
+class Transformable:
+    """
+    Mixin for slotted dataclasses with a `transform` field.
+
+    Caches the inverse and inverse transpose of `transform` so they are only computed once, rather
+    than once per ray. The cache is dropped whenever `transform` is reassigned; mutating the
+    underlying ndarray in place is not detected.
+    """
+    __slots__ = ("_inverse", "_inverse_transpose")
+
+    transform: Matrix
+
+    def __setattr__(self, name: str, value: object) -> None:
+        if name == "transform":
+            self._invalidate_transform()
+        object.__setattr__(self, name, value)
+
+    def _invalidate_transform(self) -> None:
+        object.__setattr__(self, "_inverse", None)
+        object.__setattr__(self, "_inverse_transpose", None)
+
+    @property
+    def inverse(self) -> Matrix:
+        """Inverse of `transform`."""
+        # frozen dataclasses bypass __setattr__ in __init__ (and when unpickled), so the cache
+        # slots may not be initialised yet
+        inverse = getattr(self, "_inverse", None)
+        if inverse is None:
+            inverse = self.transform.inverse()
+            object.__setattr__(self, "_inverse", inverse)
+        return inverse
+
+    @property
+    def inverse_transpose(self) -> Matrix:
+        """Inverse transpose of `transform`, used to move normals back to world space."""
+        inverse_transpose = getattr(self, "_inverse_transpose", None)
+        if inverse_transpose is None:
+            inverse_transpose = self.inverse.transpose()
+            object.__setattr__(self, "_inverse_transpose", inverse_transpose)
+        return inverse_transpose
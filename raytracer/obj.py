@@ -0,0 +1,226 @@
+"""
+Wavefront OBJ loader.
+
+Reads vertices (`v`), vertex normals (`vn`) and faces (`f`) into a `TriangleMesh`; faces with more
+than three corners are split into a fan of triangles. Every other statement, such as texture
+coordinates, groups and materials, is ignored.
+
+Parsing is slow for large files, so `load_obj` keeps a binary cache of each mesh next to its source,
+named after it with a `.cache` suffix. The cache is a JSON header followed by the mesh's arrays and
+its packed BVH, laid out so that loading it is a single memory map. It is keyed by the source's
+modification time and SHA-256 hash: a file whose time changed is hashed again, and reparsed only if
+its contents changed too.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import typing as t
+from pathlib import Path
+
+import numpy as np
+
+from raytracer.bvh import flatten_index_tree, unflatten_index_tree
+from raytracer.materials import Material
+from raytracer.shapes import TriangleMesh
+
+CACHE_SUFFIX = ".cache"
+CACHE_MAGIC = b"RTMESH01"
+# Arrays in a cache file start on multiples of this many bytes
+CACHE_ALIGNMENT = 64
+
+
+def _index(text: str, count: int, line_no: int) -> int:
+    """Zero based index of a one based, or negative and relative to the end, OBJ index."""
+    try:
+        index = int(text)
+    except ValueError:
+        raise ValueError(f"Line {line_no}: invalid index {text!r}.") from None
+
+    if index > 0 and index <= count:
+        return index - 1
+    if index < 0 and -index <= count:
+        return count + index
+    raise ValueError(f"Line {line_no}: index {index} is out of range for {count} elements.")
+
+
+def parse_obj(lines: t.Iterable[str], material: Material = Material()) -> TriangleMesh:
+    """Build a mesh from the lines of an OBJ file."""
+    vertices: list[list[float]] = []
+    normals: list[list[float]] = []
+    faces: list[tuple[int, int, int]] = []
+    normal_faces: list[tuple[int, int, int]] = []
+
+    for line_no, line in enumerate(lines, 1):
+        keyword, *args = line.split("#", 1)[0].split() or [""]
+        if keyword == "v":
+            vertices.append([float(x) for x in args[:3]])
+        elif keyword == "vn":
+            normals.append([float(x) for x in args[:3]])
+        elif keyword == "f":
+            if len(args) < 3:
+                raise ValueError(f"Line {line_no}: a face needs at least 3 vertices.")
+
+            corners = [arg.split("/") for arg in args]
+            verts = [_index(corner[0], len(vertices), line_no) for corner in corners]
+            # Faces count as smooth only when all their corners have normals
+            norms = (
+                [_index(corner[2], len(normals), line_no) for corner in corners]
+                if all(len(corner) > 2 and corner[2] for corner in corners)
+                else None
+            )
+            for i in range(1, len(corners) - 1):
+                faces.append((verts[0], verts[i], verts[i + 1]))
+                normal_faces.append((norms[0], norms[i], norms[i + 1]) if norms else (-1, -1, -1))
+
+    vertex_array = np.array(vertices, dtype=float).reshape(-1, 3)
+    face_array = np.array(faces, dtype=np.int64).reshape(-1, 3)
+    normal_face_array = np.array(normal_faces, dtype=np.int64).reshape(-1, 3)
+    flat = normal_face_array[:, 0] < 0
+    if flat.all():
+        return TriangleMesh(material=material, vertices=vertex_array, faces=face_array)
+
+    # Faces without normals in an otherwise smooth mesh get their flat normal at every corner
+    normal_array = np.array(normals, dtype=float).reshape(-1, 3)
+    if flat.any():
+        corners = vertex_array[face_array[flat]]
+        flat_normals = np.cross(corners[:, 2] - corners[:, 0], corners[:, 1] - corners[:, 0])
+        flat_normals /= np.linalg.norm(flat_normals, axis=1)[:, np.newaxis]
+        normal_face_array[flat] = (len(normal_array) + np.arange(len(flat_normals)))[:, np.newaxis]
+        normal_array = np.concatenate((normal_array, flat_normals))
+
+    return TriangleMesh(
+        material=material,
+        vertices=vertex_array,
+        faces=face_array,
+        normals=normal_array,
+        normal_faces=normal_face_array,
+    )
+
+
+def load_obj(in_filepath: Path, material: Material = Material(), cache: bool = True) -> TriangleMesh:
+    """
+    Load the mesh in an OBJ file, through its cache unless `cache` is False. A missing or stale cache
+    is rewritten, if the directory allows it.
+    """
+    in_filepath = Path(in_filepath)
+    if not cache:
+        with open(in_filepath) as f:
+            return parse_obj(f, material)
+
+    cache_path = cache_path_for(in_filepath)
+    stat = in_filepath.stat()
+    header, arrays = _read_cache(cache_path)
+
+    digest = None
+    if header is not None and header["mtime_ns"] != stat.st_mtime_ns:
+        digest = _file_digest(in_filepath)
+        if header["sha256"] != digest:
+            header = None
+
+    if header is None:
+        with open(in_filepath) as f:
+            mesh = parse_obj(f, material)
+    else:
+        mesh = _mesh_from_arrays(arrays, material)
+        if header["mtime_ns"] == stat.st_mtime_ns:
+            return mesh
+
+    # The source is new, changed, or only touched, in which case the cache just needs its new time
+    try:
+        write_cache(cache_path, mesh, stat.st_mtime_ns, digest or _file_digest(in_filepath))
+    except OSError:
+        pass
+    return mesh
+
+
+def cache_path_for(in_filepath: Path) -> Path:
+    return in_filepath.with_name(in_filepath.name + CACHE_SUFFIX)
+
+
+def _file_digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _mesh_arrays(mesh: TriangleMesh) -> dict[str, np.ndarray]:
+    arrays = {"vertices": mesh.vertices, "faces": mesh.faces}
+    if mesh.normals is not None:
+        arrays["normals"] = mesh.normals
+        arrays["normal_faces"] = mesh.normal_faces
+    for name, array in flatten_index_tree(mesh.tree).items():
+        arrays[f"bvh_{name}"] = array
+    return arrays
+
+
+def _mesh_from_arrays(arrays: dict[str, np.ndarray], material: Material) -> TriangleMesh:
+    return TriangleMesh(
+        material=material,
+        vertices=arrays["vertices"],
+        faces=arrays["faces"],
+        normals=arrays.get("normals"),
+        normal_faces=arrays.get("normal_faces"),
+        tree=unflatten_index_tree(*(arrays[f"bvh_{name}"] for name in ("lo", "hi", "children", "leaves", "order"))),
+    )
+
+
+def write_cache(cache_path: Path, mesh: TriangleMesh, mtime_ns: int, sha256: str) -> None:
+    """
+    Write the mesh's cache file, recording the source file's modification time and hash. The file is
+    written under a temporary name and moved into place, so readers never see it half written.
+    """
+    arrays = _mesh_arrays(mesh)
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": array.shape, "offset": offset}
+        offset += _align(array.nbytes)
+
+    header = json.dumps({"mtime_ns": mtime_ns, "sha256": sha256, "arrays": layout}).encode()
+    # The arrays start after the magic number, header length and header
+    data_start = _align(len(CACHE_MAGIC) + 8 + len(header))
+
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(CACHE_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, cache_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _read_cache(cache_path: Path) -> tuple[dict[str, t.Any] | None, dict[str, np.ndarray]]:
+    """The header and memory mapped arrays of a cache file, or no header if it is missing or invalid."""
+    try:
+        with open(cache_path, "rb") as f:
+            if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                return None, {}
+            header_length = int.from_bytes(f.read(8), "little")
+            if header_length > os.fstat(f.fileno()).st_size:
+                return None, {}
+            header = json.loads(f.read(header_length))
+        data = np.memmap(cache_path, dtype=np.uint8, mode="r")
+
+        data_start = _align(len(CACHE_MAGIC) + 8 + header_length)
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            start = data_start + spec["offset"]
+            nbytes = int(np.prod(spec["shape"], dtype=np.int64)) * dtype.itemsize
+            arrays[name] = data[start:start + nbytes].view(dtype).reshape(spec["shape"])
+    except (OSError, ValueError, KeyError):
+        # Unreadable, truncated or from an older format, so rebuilt like a missing cache
+        return None, {}
+
+    return header, arrays
+
+
+def _align(nbytes: int) -> int:
+    return -(-nbytes // CACHE_ALIGNMENT) * CACHE_ALIGNMENT
@@ -4,16 +4,18 @@ import math
 import typing as t
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from raytracer.color import BLACK, WHITE, Color
 from raytracer.tuple import Tuple
-from raytracer.transforms import Matrix
+from raytracer.matrix import Matrix, Transformable
 
 if t.TYPE_CHECKING:
     from raytracer.shapes import Shape
 
 
 @dataclass(frozen=True, slots=True)
-class Pattern:
+class Pattern(Transformable):
     """
     Base class for creating pattern objects; this is not intended to be instantiated.
     """
@@ -27,10 +29,20 @@ class Pattern:
 
     def at_object(self, obj: Shape, world_pt: Tuple) -> Color:
         object_pt = obj.world_to_object(world_pt)
-        pattern_pt = self.transform.inverse() * object_pt
+        pattern_pt = self.inverse * object_pt
 
         return self.at_point(pattern_pt)
 
+    def at_point_batch(self, pts: np.ndarray) -> np.ndarray:
+        """Batched `at_point`, taking an (N, 4) array of points and returning (N, 3) colors."""
+        raise NotImplementedError
+
+    def at_object_batch(self, obj: Shape, world_pts: np.ndarray) -> np.ndarray:
+        object_pts = obj.world_to_object_batch(world_pts)
+        pattern_pts = self.inverse * object_pts
+
+        return self.at_point_batch(pattern_pts)
+
 
 @dataclass(frozen=True, slots=True)
 class Stripe(Pattern):
@@ -39,3 +51,7 @@ class Stripe(Pattern):
             return self.a
         else:
             return self.b
+
+    def at_point_batch(self, pts: np.ndarray) -> np.ndarray:
+        even = (np.floor(pts[:, 0]) % 2 == 0)[:, np.newaxis]
+        return np.where(even, [*self.a], [*self.b])
@@ -0,0 +1,84 @@
+"""
+Floating point precision of the vectorized render pipeline.
+
+The wavefront engine's compiled scene and rays, and the canvases renders are written into, use the
+active precision: float64 by default, or float32 to halve their memory and bandwidth at the cost of
+accuracy. Set it for the whole process with `set_precision`, for a block with `working_precision`,
+or for one render with `Camera.render`'s `precision`. The scalar engine always traces in Python
+floats.
+
+Points offset from surfaces to avoid acne have to clear the rounding error of the precision, so the
+vectorized code takes its epsilon from `epsilon` rather than `raytracer.EPSILON`. The error of a hit
+grows with the size of its coordinates and with how far along the ray it is, so hit points are
+offset by `surface_offsets`, which scales the epsilon by both.
+"""
+from __future__ import annotations
+
+import typing as t
+from contextlib import contextmanager
+
+import numpy as np
+import numpy.typing as npt
+
+from raytracer import EPSILON
+
+PRECISIONS = {
+    "float64": np.dtype(np.float64),
+    "float32": np.dtype(np.float32),
+}
+
+# Surface offsets are kept this many times above the machine epsilon of the precision, which is
+# about 1e-4 in float32 for hits near the origin. In float64 that is far below `raytracer.EPSILON`,
+# which is used instead
+EPSILON_ULPS = 1000
+
+Precision = t.Union[str, npt.DTypeLike]
+
+# Precision the current process renders in
+active: np.dtype = PRECISIONS["float64"]
+
+
+def resolve(precision: Precision | None = None) -> np.dtype:
+    """The dtype of a precision, given by name or dtype, or the active one for None."""
+    if precision is None:
+        return active
+
+    try:
+        dtype = np.dtype(precision)
+    except TypeError:
+        dtype = None
+    if dtype is None or dtype not in PRECISIONS.values():
+        raise ValueError(f"Unknown precision {precision!r}, expected one of {tuple(PRECISIONS)}.")
+    return dtype
+
+
+def epsilon(precision: Precision | None = None) -> float:
+    """Surface offset for a precision, the active one by default."""
+    return max(EPSILON, EPSILON_ULPS * float(np.finfo(resolve(precision)).eps))
+
+
+def surface_offsets(points: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """
+    Distances to move each of the (N, 4) hit `points`, found at times `t` along their rays, off their
+    surfaces, in the points' precision. At least `epsilon`, and growing with the points' largest
+    coordinate and their hit time as the rounding error of the hits does.
+    """
+    dtype = points.dtype
+    scale = 1 + np.abs(points[:, :3]).max(axis=1, initial=0) + t
+    return np.maximum(epsilon(dtype), EPSILON_ULPS * float(np.finfo(dtype).eps) * scale).astype(dtype, copy=False)
+
+
+def set_precision(precision: Precision) -> None:
+    global active
+    active = resolve(precision)
+
+
+@contextmanager
+def working_precision(precision: Precision) -> t.Iterator[np.dtype]:
+    """Render in `precision` within the block."""
+    global active
+    previous, active = active, resolve(precision)
+    try:
+        yield active
+    finally:
+        active = previous
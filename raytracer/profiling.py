@@ -0,0 +1,128 @@
+"""
+Sampling profiler for renders.
+
+A background thread periodically records the call stack of the thread being profiled, so nothing
+is instrumented and the render runs at close to full speed. Stacks are kept in the collapsed format
+read by flamegraph tools: one line per distinct stack, with frames from the outermost call inward
+separated by semicolons and followed by the number of samples.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import types
+import typing as t
+from collections import Counter
+from pathlib import Path
+
+# Seconds between samples. Sampling needs the GIL, so in practice it is also limited by the
+# interpreter's switch interval
+DEFAULT_INTERVAL = 0.001
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the thread that starts it, from the frame it is started in inward. Use it as
+    a context manager around the code to profile, or pass it to `Camera.render`.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        if interval <= 0:
+            raise ValueError(f"Sampling interval must be positive. Received: {interval}.")
+
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> SamplingProfiler:
+        self._start(sys._getframe(1))
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start sampling the calling thread, from the caller's frame inward."""
+        self._start(sys._getframe(1))
+
+    def _start(self, root: types.FrameType) -> None:
+        if self._thread is not None:
+            raise RuntimeError("The profiler is already running.")
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, args=(threading.get_ident(), root), name="raytracer-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _sample(self, thread_id: int, root: types.FrameType) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            # Frames outside of the profiled block, i.e. the root's callers, are left out
+            while frame is not None and frame is not root:
+                if frame.f_globals.get("__name__") == __name__:
+                    # Caught starting or stopping the profiler rather than in the profiled code
+                    stack = []
+                    break
+                stack.append(_label(frame))
+                frame = frame.f_back
+
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def merge(self, stacks: t.Mapping[str, int]) -> None:
+        """Add samples taken elsewhere, such as by a render worker's profiler."""
+        self.stacks.update(stacks)
+
+    def collapsed(self) -> str:
+        """The samples in collapsed stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def write_collapsed(self, out_filepath: Path) -> None:
+        out_filepath.write_text(self.collapsed())
+
+    def top(self, n: int = 20) -> list[tuple[str, int, int]]:
+        """
+        The `n` functions with the most samples of their own, as `(function, self, total)` rows where
+        `total` also counts samples in the functions they called.
+        """
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+
+        rows = [(func, own[func], total[func]) for func in total]
+        rows.sort(key=lambda row: (-row[1], -row[2], row[0]))
+        return rows[:n]
+
+    def format_top(self, n: int = 20) -> str:
+        """Table of the `top` functions, with their share of all samples."""
+        samples = max(self.samples, 1)
+        lines = [f"{'self':>7} {'total':>7}  function"]
+        for func, own, total in self.top(n):
+            lines.append(f"{own / samples:7.1%} {total / samples:7.1%}  {func}")
+
+        return "\n".join(lines)
+
+
+def _label(frame: types.FrameType) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
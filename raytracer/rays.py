@@ -1,5 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
+import numpy as np
 from raytracer import NUMERIC_T
 from raytracer.tuple import Tuple, TupleType
 from raytracer.matrix import Matrix
@@ -23,6 +24,14 @@ class Ray:
 
     def transform(self, matrix: Matrix) -> Ray:
         "new ray after applying the transformation on both origin and direction"
-        new_origin = self.origin * matrix
-        new_direction = self.direction * matrix
+        new_origin = matrix * self.origin
+        new_direction = matrix * self.direction
         return Ray(new_origin, new_direction)
+
+
+def transform_batch(origins: np.ndarray, directions: np.ndarray, matrix: Matrix) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batched `Ray.transform`, for N rays given as (N, 4) origin and direction arrays. Returns the
+    transformed `(origins, directions)`.
+    """
+    return matrix * origins, matrix * directions
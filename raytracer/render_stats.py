@@ -0,0 +1,163 @@
+"""
+Opt-in statistics about the rays a render traces.
+
+While a `RenderStats` collector is active, the tracing code counts the rays it casts and the
+intersection tests they run into it. Nothing is counted otherwise, so the only cost of a disabled
+collector is checking `active` for `None`.
+"""
+from __future__ import annotations
+
+import typing as t
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from raytracer.canvas import Canvas
+
+# Collector the current process is counting into, if any
+active: RenderStats | None = None
+
+
+@dataclass(slots=True)
+class RenderStats:
+    primary_rays: int = 0
+    shadow_rays: int = 0
+    reflection_rays: int = 0
+    refraction_rays: int = 0
+    # Intersection tests of a ray against a concrete shape, with each face of a mesh counting as one
+    # shape; groups and instances only lead to tests of the shapes in them
+    local_intersects: int = 0
+    # Deepest reflection or refraction bounce, 0 meaning only primary rays hit anything
+    max_depth: int = 0
+    # Number of rays by how many hits their query found: 1 for traced rays that hit a shape and for
+    # shadow rays that are blocked, 0 otherwise. Taken from the queries the render runs anyway, so
+    # both engines count the same without tracing anything more
+    hits_per_ray: Counter[int] = field(default_factory=Counter)
+    seconds: float = 0.0
+    # Whether intersection tests are counted, or only rays, as when timing pixels for a `CostMap`
+    count_tests: bool = field(default=True, repr=False, compare=False)
+
+    @property
+    def rays(self) -> int:
+        return self.primary_rays + self.shadow_rays + self.reflection_rays + self.refraction_rays
+
+    @property
+    def rays_per_second(self) -> float:
+        return self.rays / self.seconds if self.seconds > 0 else 0.0
+
+    def local_intersect(self, tests: int = 1) -> None:
+        """Count intersection tests of a ray against concrete shapes."""
+        self.local_intersects += tests
+
+    def end_ray(self, hits: int, depth: int = 0) -> None:
+        """Record a ray at `depth` whose query found `hits` hits, as counted by `hits_per_ray`."""
+        self.hits_per_ray[hits] += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def end_rays(self, hits: np.ndarray, depth: int = 0) -> None:
+        """Batched `end_ray`, given the number of hits found by each ray."""
+        for count, rays in enumerate(np.bincount(hits.astype(int)).tolist()):
+            if rays:
+                self.hits_per_ray[count] += rays
+        if len(hits) and depth > self.max_depth:
+            self.max_depth = depth
+
+    def merge(self, other: RenderStats) -> None:
+        """Add the counts of another collector, such as one from a render worker, to this one."""
+        self.primary_rays += other.primary_rays
+        self.shadow_rays += other.shadow_rays
+        self.reflection_rays += other.reflection_rays
+        self.refraction_rays += other.refraction_rays
+        self.local_intersects += other.local_intersects
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.hits_per_ray.update(other.hits_per_ray)
+
+    def summary(self) -> dict[str, t.Any]:
+        """The statistics as a JSON serializable dictionary."""
+        return {
+            "primary_rays": self.primary_rays,
+            "shadow_rays": self.shadow_rays,
+            "reflection_rays": self.reflection_rays,
+            "refraction_rays": self.refraction_rays,
+            "rays": self.rays,
+            "local_intersects": self.local_intersects,
+            "max_depth": self.max_depth,
+            "hits_per_ray": dict(sorted(self.hits_per_ray.items())),
+            "seconds": self.seconds,
+            "rays_per_second": self.rays_per_second,
+        }
+
+
+# Colors of the heatmap scale, spread evenly from the cheapest pixels to the most expensive
+HEATMAP_COLORS = np.array([
+    [0.0, 0.0, 0.0],
+    [0.25, 0.0, 0.5],
+    [0.8, 0.1, 0.2],
+    [1.0, 0.6, 0.0],
+    [1.0, 1.0, 0.6],
+])
+
+
+class CostMap:
+    """
+    Per pixel render cost: the seconds spent on each pixel and the number of rays it cast, stored as
+    (height, width) arrays like a `Canvas`. Fill one by passing it to `Camera.render`.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+
+        self.seconds = np.zeros((height, width))
+        self.rays = np.zeros((height, width), dtype=int)
+
+    def write_block(self, x0: int, y0: int, costs: np.ndarray) -> None:
+        """Copy an (h, w, 2) array of seconds and ray counts in with its top left corner at `(x0, y0)`."""
+        height, width, _ = costs.shape
+        self.seconds[y0:y0 + height, x0:x0 + width] = costs[..., 0]
+        self.rays[y0:y0 + height, x0:x0 + width] = costs[..., 1]
+
+    def heatmap(self, metric: str = "seconds", log: bool = False) -> Canvas:
+        """
+        Draw the metric ("seconds" or "rays") as a false color image, scaled from black for the
+        cheapest pixel up to pale yellow for the most expensive. `log` scales by the logarithm of the
+        values instead, to tell apart the cheaper regions when a few pixels dominate.
+        """
+        if metric not in ("seconds", "rays"):
+            raise ValueError(f"Unknown cost metric {metric!r}, expected 'seconds' or 'rays'.")
+
+        values = getattr(self, metric).astype(float)
+        if log:
+            values = np.log1p(values)
+
+        lo, hi = (values.min(), values.max()) if values.size else (0, 0)
+        scaled = (values - lo) / (hi - lo) if hi > lo else np.zeros_like(values)
+
+        stops = np.linspace(0, 1, len(HEATMAP_COLORS))
+        colors = np.stack([np.interp(scaled, stops, HEATMAP_COLORS[:, c]) for c in range(3)], axis=-1)
+
+        canvas = Canvas(self.width, self.height)
+        canvas.write_block(0, 0, colors)
+        return canvas
+
+    def to_file(self, out_filepath: Path, metric: str = "seconds", log: bool = False, fmt: str | None = None) -> None:
+        """Write the metric's heatmap through `Canvas.to_file`."""
+        self.heatmap(metric, log).to_file(out_filepath, fmt)
+
+
+@contextmanager
+def collecting(stats: RenderStats | None = None) -> t.Iterator[RenderStats]:
+    """Count into `stats`, or a new collector, within the block."""
+    global active
+    if stats is None:
+        stats = RenderStats()
+
+    previous, active = active, stats
+    try:
+        yield stats
+    finally:
+        active = previous
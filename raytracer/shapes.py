@@ -1,18 +1,40 @@
 from __future__ import annotations
 
 import math
+import typing as t
 from dataclasses import dataclass, field
 
-from raytracer import EPSILON
+import numpy as np
+
+from raytracer import EPSILON, render_stats
+from raytracer.bounds import BoundingBox, INF, _inverse_direction, _slab_test
+from raytracer.bvh import BVH, BVHNode, build_index_tree
 from raytracer.materials import Material
-from raytracer.intersections import Intersections, Intersection
-from raytracer.matrix import Matrix
-from raytracer.rays import Ray
-from raytracer.tuple import Tuple, TupleType, vector, point, dot
+from raytracer.intersections import Intersections, Intersection, hit_batch
+from raytracer.matrix import Matrix, Transformable
+from raytracer.rays import Ray, transform_batch
+from raytracer.tuple import Tuple, TupleType, vector, point, dot, cross
+
+# Changes to shapes already in use, see `hierarchy_version`
+_hierarchy_version = 0
+
+
+def hierarchy_version() -> int:
+    """
+    Counter bumped whenever a shape whose composed transforms are cached, such as any frozen shape,
+    is moved or reparented, or a group of them gains a child. Structures built over whole
+    hierarchies, like `World.bvh`, compare it to know when to rebuild.
+    """
+    return _hierarchy_version
+
+
+def _hierarchy_changed() -> None:
+    global _hierarchy_version
+    _hierarchy_version += 1
 
 
 @dataclass(slots=True, eq=False)
-class Shape:
+class Shape(Transformable):
     """child classes must define `_local_intersect` and `_local_normal_at` to calculate their
     respective local values
     Deliberatly setting eq to False, so two instances will equal to true.
@@ -22,17 +44,170 @@ class Shape:
     material: Material = Material()
     parent: Group | None = None
 
+    # Transforms composed with the ancestors' ones, see `world_inverse` and `world_normal`
+    _world_inverse: Matrix | None = field(default=None, init=False, repr=False)
+    _world_normal: Matrix | None = field(default=None, init=False, repr=False)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        if name == "parent":
+            self._invalidate_world()
+        elif name in ("material", "material_override") and getattr(self, "_world_inverse", None) is not None:
+            # Compiled scenes hold the materials of the shapes, so they are rebuilt too
+            _hierarchy_changed()
+        Transformable.__setattr__(self, name, value)
+
+    def _invalidate_transform(self) -> None:
+        Transformable._invalidate_transform(self)
+        self._invalidate_world()
+        # Moving a shape changes the bounds its ancestors were sorted by
+        parent = getattr(self, "parent", None)
+        if parent is not None:
+            parent._invalidate_bvh()
+
+    def _invalidate_world(self) -> None:
+        # Composed transforms are only cached below shapes that have them cached too, so there is
+        # nothing to clear further down when this one has none
+        if getattr(self, "_world_inverse", None) is None:
+            return
+
+        _hierarchy_changed()
+        object.__setattr__(self, "_world_inverse", None)
+        object.__setattr__(self, "_world_normal", None)
+        for child in self._descendants():
+            child._invalidate_world()
+
+    def _descendants(self) -> t.Iterable[Shape]:
+        """Shapes whose composed transforms include this shape's."""
+        return ()
+
+    @property
+    def world_inverse(self) -> Matrix:
+        """
+        Inverse of the shape's transform composed with those of all its ancestors, taking points from
+        world space to object space in one multiplication. Computed on first use and kept until the
+        transform or parent of the shape, or of any of its ancestors, changes.
+        """
+        world_inverse = self._world_inverse
+        if world_inverse is None:
+            world_inverse = self.inverse if self.parent is None else self.inverse * self.parent.world_inverse
+            object.__setattr__(self, "_world_inverse", world_inverse)
+        return world_inverse
+
+    @property
+    def world_normal(self) -> Matrix:
+        """
+        Composed counterpart of `inverse_transpose`, taking object space normals to world space. It
+        has no translation, so the normals it produces are vectors.
+        """
+        world_normal = self._world_normal
+        if world_normal is None:
+            world_normal = self.world_inverse.linear_transpose()
+            object.__setattr__(self, "_world_normal", world_normal)
+        return world_normal
+
+    def freeze(self) -> None:
+        """
+        Precompute the composed transforms of the shape and everything below it, so no hit has to
+        walk the hierarchy. They are recomputed on demand if the hierarchy changes afterwards.
+        """
+        self.world_normal
+        for child in self._descendants():
+            child.freeze()
+
+    def bounds(self) -> BoundingBox:  # pragma: no cover
+        """Bounds of the shape in object space."""
+        raise NotImplementedError
+
+    def parent_space_bounds(self) -> BoundingBox:
+        """Bounds of the shape once its transform is applied, i.e. in its parent's space."""
+        return self.bounds().transform(self.transform)
+
+    @property
+    def world_transform(self) -> Matrix:
+        """The shape's transform composed with those of all its ancestors; the inverse of `world_inverse`."""
+        return self.transform if self.parent is None else self.parent.world_transform * self.transform
+
+    def world_bounds(self) -> BoundingBox:
+        """Bounds of the shape in world space."""
+        return self.bounds().transform(self.world_transform)
+
+    def leaves(self) -> t.Iterator[Shape]:
+        """The shapes at the bottom of the hierarchy under this one, which is its own only leaf."""
+        yield self
+
     def _local_intersect(self, local_ray: Ray) -> Intersections:  # pragma: no cover
         raise NotImplementedError
 
-    def intersect(self, ray: Ray) -> Intersections:
+    def intersect(self, ray: Ray, world: bool = False) -> Intersections:
         """
-        Calculate the time position(s) where the provided Ray intersects the shape.
+        Calculate the time position(s) where the provided Ray intersects the shape. The ray is in the
+        parent's space, or with `world` in world space.
         """
         # Apply the inverse of the shape's transformation to the ray to account for the desired
         # shape transformation
-        transformed_ray = ray.transform(self.transform.inverse())
-        return self._local_intersect(transformed_ray)
+        transformed_ray = ray.transform(self.world_inverse if world else self.inverse)
+        xs = self._local_intersect(transformed_ray)
+
+        stats = render_stats.active
+        if stats is not None and stats.count_tests and not isinstance(self, (Group, Instance, TriangleMesh)):
+            stats.local_intersect()
+        return xs
+
+    def _local_closest(self, local_ray: Ray, t_max: float) -> Intersection | None:
+        for inter in self._local_intersect(local_ray):
+            if inter.t > 0:
+                return inter if inter.t < t_max else None
+
+        return None
+
+    def intersect_closest(self, ray: Ray, t_max: float = INF, world: bool = False) -> Intersection | None:
+        """
+        Calculate the ray's hit on the shape, i.e. its lowest non negative intersection, ignoring any
+        hit at or beyond `t_max`. Only the nearest intersection is tracked, so no `Intersections`
+        list has to be built and sorted.
+        """
+        hit = self._local_closest(ray.transform(self.world_inverse if world else self.inverse), t_max)
+
+        stats = render_stats.active
+        if stats is not None and stats.count_tests and not isinstance(self, (Group, Instance, TriangleMesh)):
+            stats.local_intersect()
+        return hit
+
+    def _local_occludes(self, local_ray: Ray, distance: float) -> bool:
+        return any(0 < i.t < distance for i in self._local_intersect(local_ray))
+
+    def occludes(self, ray: Ray, distance: float, world: bool = False) -> bool:
+        """
+        Determine if the ray intersects the shape anywhere in `(0, distance)`, stopping at the first
+        intersection found rather than collecting and sorting all of them.
+        """
+        occludes = self._local_occludes(ray.transform(self.world_inverse if world else self.inverse), distance)
+
+        stats = render_stats.active
+        if stats is not None and stats.count_tests and not isinstance(self, (Group, Instance, TriangleMesh)):
+            stats.local_intersect()
+        return occludes
+
+    def _local_intersect_batch(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:  # pragma: no cover
+        raise NotImplementedError
+
+    def intersections_batch(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        """
+        Calculate every intersection time of N rays with the shape at once.
+
+        Rays are given as (N, 4) origin and direction arrays. Returns an (N, k) array holding the k
+        possible intersection times of each ray, with `inf` where there is no intersection.
+        """
+        return self._local_intersect_batch(*transform_batch(origins, directions, self.inverse))
+
+    def intersect_batch(self, origins: np.ndarray, directions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate the hit of N rays with the shape at once.
+
+        Returns the lowest non negative intersection time of each ray (`inf` for misses) and a mask
+        of the rays that hit.
+        """
+        return hit_batch(self.intersections_batch(origins, directions))
 
     def _local_normal_at(self, local_point: Tuple, hit: Intersection) -> Tuple:  # pragma: no cover
         raise NotImplementedError
@@ -55,19 +230,29 @@ class Shape:
         return world_normal
 
     def world_to_object(self, pt: Tuple) -> Tuple:
-        if self.parent is not None:
-            pt = self.parent.world_to_object(pt)
-
-        return self.transform.inverse() * pt
+        return self.world_inverse * pt
 
     def normal_to_world(self, norm: Tuple) -> Tuple:
-        norm = self.transform.inverse().transpose() * norm
-        new_norm = vector(*norm).normalize()
+        return vector(*(self.world_normal * norm)).normalize()
 
-        if self.parent is not None:
-            new_norm = self.parent.normal_to_world(new_norm)
+    def _local_normal_at_batch(self, local_points: np.ndarray) -> np.ndarray:  # pragma: no cover
+        raise NotImplementedError
 
-        return new_norm
+    def normal_at_batch(self, points: np.ndarray) -> np.ndarray:
+        """
+        Calculate the world space normal vectors at N surface points, given as an (N, 4) array.
+        """
+        local_points = self.world_to_object_batch(points)
+        local_normals = self._local_normal_at_batch(local_points)
+        return self.normal_to_world_batch(local_normals)
+
+    def world_to_object_batch(self, pts: np.ndarray) -> np.ndarray:
+        return self.world_inverse * pts
+
+    def normal_to_world_batch(self, norms: np.ndarray) -> np.ndarray:
+        norms = self.world_normal * norms
+        norms /= np.sqrt(np.einsum("ij,ij->i", norms, norms))[:, np.newaxis]
+        return norms
 
 
 @dataclass(slots=True, eq=False)
@@ -82,14 +267,72 @@ class Group(Shape):
     """
 
     children: set[Shape] = field(default_factory=set)
+    _bvh: BVH | None = field(default=None, init=False, repr=False)
+    # `flat_bvh` and the `hierarchy_version` it was built at
+    _flat_bvh: tuple[BVH, int] | None = field(default=None, init=False, repr=False)
+    # `bounds` and the `hierarchy_version` they were found at
+    _bounds: tuple[BoundingBox, int] | None = field(default=None, init=False, repr=False)
+
+    @property
+    def bvh(self) -> BVH:
+        """
+        Bounding volume hierarchy over the children, built on first use and rebuilt when a child is
+        moved, or added or removed through `add_child` and `remove_child`.
+        """
+        if self._bvh is None:
+            self._bvh = BVH(self.children)
+        return self._bvh
 
-    def _local_intersect(self, transformed_ray: Ray) -> Intersections:
-        all_inters = Intersections([])
+    @property
+    def flat_bvh(self) -> BVH:
+        """
+        Bounding volume hierarchy over every leaf below the group in world space, so a ray is
+        transformed once per leaf it reaches however deep the leaf is nested. Built on first use and
+        rebuilt when anything below the group changes.
+        """
+        if self._flat_bvh is None or self._flat_bvh[1] != hierarchy_version():
+            self.freeze()
+            self._flat_bvh = BVH(self.leaves(), world=True), hierarchy_version()
+        return self._flat_bvh[0]
+
+    def _invalidate_bvh(self) -> None:
+        if self._world_inverse is not None:
+            _hierarchy_changed()
+        self._bvh = None
+        if self.parent is not None:
+            self.parent._invalidate_bvh()
+
+    def _descendants(self) -> t.Iterable[Shape]:
+        return getattr(self, "children", ())
+
+    def leaves(self) -> t.Iterator[Shape]:
         for child in self.children:
-            all_inters.extend(child.intersect(transformed_ray))
+            yield from child.leaves()
+
+    def bounds(self) -> BoundingBox:
+        # Kept until anything below the group changes, as a shared group is bounded once per instance
+        if self._bounds is None or self._bounds[1] != hierarchy_version():
+            self.freeze()
+            box = BoundingBox()
+            for child in self.children:
+                box = box.merge(child.parent_space_bounds())
+            self._bounds = box, hierarchy_version()
+        return self._bounds[0]
 
-        all_inters.sort()
-        return all_inters
+    def _local_intersect(self, transformed_ray: Ray) -> Intersections:
+        return self.bvh.intersect(transformed_ray)
+
+    def _local_closest(self, local_ray: Ray, t_max: float) -> Intersection | None:
+        return self.bvh.closest_hit(local_ray, t_max)
+
+    def _local_occludes(self, local_ray: Ray, distance: float) -> bool:
+        return self.bvh.occluder(local_ray, distance) is not None
+
+    def _local_intersect_batch(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        if not self.children:
+            return np.full((len(origins), 0), np.inf)
+
+        return np.hstack([child.intersections_batch(origins, directions) for child in self.children])
 
     def _local_normal_at(self, local_point: Tuple, hit: Intersection) -> Tuple:
         raise NotImplementedError("Groups shold be delegating this call to children.")
@@ -98,6 +341,15 @@ class Group(Shape):
         """Add a `Shape` subclass to the group & set its `parent` attribute appropriately."""
         self.children.add(other)
         other.parent = self
+        _hierarchy_changed()
+        self._invalidate_bvh()
+
+    def remove_child(self, other: Shape) -> None:
+        """Remove a child from the group, clearing its `parent`."""
+        self.children.remove(other)
+        other.parent = None
+        _hierarchy_changed()
+        self._invalidate_bvh()
 
 
 @dataclass(slots=True, eq=False)
@@ -106,8 +358,12 @@ class Sphere(Shape):
     Spheres are assumed to be unit spheres, i.e. centered at `(0, 0, 0)` with a radius of `1`.
     """
 
-    def _local_intersect(self, transformed_ray: Ray) -> Intersections:
+    def bounds(self) -> BoundingBox:
+        return BoundingBox(point(-1, -1, -1), point(1, 1, 1))
 
+    @staticmethod
+    def _roots(transformed_ray: Ray) -> tuple[float, float] | None:
+        """Intersection times of the ray with the unit sphere in ascending order, if there are any."""
         sphere_to_ray = transformed_ray.origin - point(0, 0, 0)
         a = dot(transformed_ray.direction, transformed_ray.direction)
         b = 2 * dot(transformed_ray.direction, sphere_to_ray)
@@ -115,28 +371,485 @@ class Sphere(Shape):
         discriminant = b**2 - (4 * a * c)
 
         if discriminant < 0:
-            intersections = []
-        else:
-            intersections = [
-                Intersection(((-b - math.sqrt(discriminant))) / (2 * a), self),
-                Intersection(((-b + math.sqrt(discriminant))) / (2 * a), self),
-            ]
+            return None
+
+        return ((-b - math.sqrt(discriminant))) / (2 * a), ((-b + math.sqrt(discriminant))) / (2 * a)
+
+    def _local_intersect(self, transformed_ray: Ray) -> Intersections:
+        roots = self._roots(transformed_ray)
+        if roots is None:
+            return Intersections([])
+
+        return Intersections([Intersection(roots[0], self), Intersection(roots[1], self)])
+
+    def _local_closest(self, transformed_ray: Ray, t_max: float) -> Intersection | None:
+        roots = self._roots(transformed_ray)
+        if roots is None:
+            return None
+
+        for root in roots:
+            if root > 0:
+                return Intersection(root, self) if root < t_max else None
+
+        return None
+
+    def _local_intersect_batch(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        # sphere_to_ray is the origin minus point(0, 0, 0), so only the xyz components matter
+        sphere_to_ray = origins[:, :3]
+        dirs = directions[:, :3]
+
+        a = np.einsum("ij,ij->i", dirs, dirs)
+        b = 2 * np.einsum("ij,ij->i", dirs, sphere_to_ray)
+        c = np.einsum("ij,ij->i", sphere_to_ray, sphere_to_ray) - 1
+        discriminant = b**2 - (4 * a * c)
 
-        return Intersections(intersections)
+        missed = discriminant < 0
+        root = np.sqrt(np.where(missed, 0, discriminant))
+
+        ts = np.empty((len(origins), 2))
+        ts[:, 0] = (-b - root) / (2 * a)
+        ts[:, 1] = (-b + root) / (2 * a)
+        ts[missed] = np.inf
+
+        return ts
 
     def _local_normal_at(self, local_point: Tuple, hit: Intersection) -> Tuple:
         return local_point - point(0, 0, 0)
 
+    def _local_normal_at_batch(self, local_points: np.ndarray) -> np.ndarray:
+        normals = local_points.copy()
+        normals[:, 3] = 0
+        return normals
+
 
 @dataclass(slots=True, eq=False)
 class Plane(Shape):
 
+    def bounds(self) -> BoundingBox:
+        return BoundingBox(point(-INF, 0, -INF), point(INF, 0, INF))
+
     def _local_intersect(self, transformed_ray: Ray) -> Intersections:
         if abs(transformed_ray.direction.y) < EPSILON:
-            return
-        t = - transformed_ray.origin.y / transformed_ray.y
+            return Intersections([])
+        t = - transformed_ray.origin.y / transformed_ray.direction.y
 
         return Intersections([Intersection(t, self)])
 
+    def _local_closest(self, transformed_ray: Ray, t_max: float) -> Intersection | None:
+        if abs(transformed_ray.direction.y) < EPSILON:
+            return None
+        t = - transformed_ray.origin.y / transformed_ray.direction.y
+
+        return Intersection(t, self) if 0 < t < t_max else None
+
+    def _local_intersect_batch(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        dir_y = directions[:, 1]
+        parallel = np.abs(dir_y) < EPSILON
+
+        ts = np.empty((len(origins), 1))
+        ts[:, 0] = -origins[:, 1] / np.where(parallel, 1, dir_y)
+        ts[parallel] = np.inf
+
+        return ts
+
     def _local_normal_at(self, local_point: Tuple, hit: Intersection) -> Tuple:
         return vector(0, 1, 0)
+
+    def _local_normal_at_batch(self, local_points: np.ndarray) -> np.ndarray:
+        normals = np.zeros_like(local_points)
+        normals[:, 1] = 1
+        return normals
+
+
+def _moller_trumbore(
+    origins: np.ndarray, directions: np.ndarray, p1: np.ndarray, e1: np.ndarray, e2: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Möller–Trumbore intersection of rays with triangles, broadcasting over the leading dimensions of
+    the (..., 3) ray origins and directions, and of the triangles' first corners and edges.
+
+    Returns the intersection times, with `inf` where there is none, and the barycentric `u` and `v`
+    coordinates of the intersections.
+    """
+    dir_cross_e2 = np.cross(directions, e2)
+    det = np.sum(e1 * dir_cross_e2, axis=-1)
+    parallel = np.abs(det) < EPSILON
+    f = 1 / np.where(parallel, 1, det)
+
+    p1_to_origin = origins - p1
+    u = f * np.sum(p1_to_origin * dir_cross_e2, axis=-1)
+    origin_cross_e1 = np.cross(p1_to_origin, e1)
+    v = f * np.sum(directions * origin_cross_e1, axis=-1)
+    t = f * np.sum(e2 * origin_cross_e1, axis=-1)
+
+    missed = parallel | (u < 0) | (u > 1) | (v < 0) | (u + v > 1)
+    return np.where(missed, np.inf, t), u, v
+
+
+@dataclass(slots=True, eq=False)
+class Triangle(Shape):
+    """
+    Flat triangle with corners `p1`, `p2` and `p3`, given as keyword arguments. Intersections record
+    the barycentric `u` and `v` coordinates of the hit, measured along `p2 - p1` and `p3 - p1`.
+    """
+    p1: Tuple = field(kw_only=True)
+    p2: Tuple = field(kw_only=True)
+    p3: Tuple = field(kw_only=True)
+
+    e1: Tuple = field(init=False, repr=False)
+    e2: Tuple = field(init=False, repr=False)
+    normal: Tuple = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.e1 = self.p2 - self.p1
+        self.e2 = self.p3 - self.p1
+        normal = cross(self.e2, self.e1)
+        # Degenerate triangles, common in meshes, can never be hit so any normal will do
+        self.normal = normal.normalize() if normal.magnitude() > 0 else normal
+
+    def bounds(self) -> BoundingBox:
+        return BoundingBox().add_point(self.p1).add_point(self.p2).add_point(self.p3)
+
+    def _local_intersect(self, transformed_ray: Ray) -> Intersections:
+        dir_cross_e2 = cross(transformed_ray.direction, self.e2)
+        det = dot(self.e1, dir_cross_e2)
+        if abs(det) < EPSILON:
+            return Intersections([])
+
+        f = 1 / det
+        p1_to_origin = transformed_ray.origin - self.p1
+        u = f * dot(p1_to_origin, dir_cross_e2)
+        if u < 0 or u > 1:
+            return Intersections([])
+
+        origin_cross_e1 = cross(p1_to_origin, self.e1)
+        v = f * dot(transformed_ray.direction, origin_cross_e1)
+        if v < 0 or u + v > 1:
+            return Intersections([])
+
+        t = f * dot(self.e2, origin_cross_e1)
+        return Intersections([Intersection(t, self, u, v)])
+
+    def _corners(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return np.array([*self.p1]), np.array([*self.e1]), np.array([*self.e2])
+
+    def _local_intersect_batch(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        ts, _, _ = _moller_trumbore(origins[:, :3], directions[:, :3], *self._corners())
+        return ts[:, np.newaxis]
+
+    def _local_normal_at(self, local_point: Tuple, hit: Intersection) -> Tuple:
+        return self.normal
+
+    def _local_normal_at_batch(self, local_points: np.ndarray) -> np.ndarray:
+        return np.tile(self.normal.as_array(), (len(local_points), 1))
+
+    def _barycentric_batch(self, local_points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """The `u` and `v` coordinates of (N, 4) points lying on the triangle."""
+        p1, e1, e2 = self._corners()
+        to_point = local_points[:, :3] - p1
+        d11, d12, d22 = e1 @ e1, e1 @ e2, e2 @ e2
+        d1p, d2p = to_point @ e1, to_point @ e2
+        denom = d11 * d22 - d12 * d12
+
+        return (d22 * d1p - d12 * d2p) / denom, (d11 * d2p - d12 * d1p) / denom
+
+
+@dataclass(slots=True, eq=False)
+class SmoothTriangle(Triangle):
+    """
+    Triangle whose normal is interpolated across its face from the corner normals `n1`, `n2` and
+    `n3`, using the `u` and `v` coordinates of the hit.
+    """
+    n1: Tuple = field(kw_only=True)
+    n2: Tuple = field(kw_only=True)
+    n3: Tuple = field(kw_only=True)
+
+    def _local_normal_at(self, local_point: Tuple, hit: Intersection) -> Tuple:
+        return self.n2 * hit.u + self.n3 * hit.v + self.n1 * (1 - hit.u - hit.v)
+
+    def _local_normal_at_batch(self, local_points: np.ndarray) -> np.ndarray:
+        u, v = self._barycentric_batch(local_points)
+        return (
+            np.outer(u, self.n2.as_array())
+            + np.outer(v, self.n3.as_array())
+            + np.outer(1 - u - v, self.n1.as_array())
+        )
+
+
+# Triangles per leaf of a mesh's BVH, intersected together in one vectorized pass
+MESH_LEAF_SIZE = 16
+
+
+@dataclass(slots=True, eq=False)
+class TriangleMesh(Shape):
+    """
+    Triangle mesh stored as arrays: `vertices` is a (V, 3) array of points and `faces` a (F, 3) array
+    of vertex indices. Given (N, 3) vertex `normals` and the (F, 3) `normal_faces` picking each
+    corner's normal, faces are shaded as smooth triangles.
+
+    The mesh keeps its own BVH over the faces, and each BVH leaf's triangles are intersected in a
+    single vectorized Möller–Trumbore pass. Hits are reported on `Triangle` shapes created for each
+    face as it is first hit, parented to the mesh and sharing its material.
+    """
+    vertices: np.ndarray = field(kw_only=True)
+    faces: np.ndarray = field(kw_only=True)
+    normals: np.ndarray | None = field(default=None, kw_only=True)
+    normal_faces: np.ndarray | None = field(default=None, kw_only=True)
+    # Hierarchy over the faces, from `build_index_tree`; built from the faces when not given
+    tree: BVHNode | None = field(default=None, kw_only=True, repr=False)
+
+    _p1: np.ndarray = field(init=False, repr=False)
+    _e1: np.ndarray = field(init=False, repr=False)
+    _e2: np.ndarray = field(init=False, repr=False)
+    _triangles: dict[int, Triangle] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.vertices = np.asarray(self.vertices, dtype=float).reshape(-1, 3)
+        self.faces = np.asarray(self.faces, dtype=np.int64).reshape(-1, 3)
+        if (self.normals is None) != (self.normal_faces is None):
+            raise ValueError("Vertex normals and normal faces must be given together.")
+        if self.normals is not None:
+            self.normals = np.asarray(self.normals, dtype=float).reshape(-1, 3)
+            self.normal_faces = np.asarray(self.normal_faces, dtype=np.int64).reshape(-1, 3)
+            if self.normal_faces.shape != self.faces.shape:
+                raise ValueError("Every face needs a normal for each of its corners.")
+
+        corners = self.vertices[self.faces]
+        self._p1 = corners[:, 0]
+        self._e1 = corners[:, 1] - corners[:, 0]
+        self._e2 = corners[:, 2] - corners[:, 0]
+        if self.tree is None:
+            self.tree = build_index_tree(corners.min(axis=1), corners.max(axis=1), MESH_LEAF_SIZE)
+        self._triangles = {}
+
+    def __len__(self) -> int:
+        return len(self.faces)
+
+    def triangle(self, face: int) -> Triangle:
+        """The shape standing in for the face, created the first time it is asked for."""
+        tri = self._triangles.get(face)
+        if tri is None:
+            p1, p2, p3 = (point(*corner) for corner in self.vertices[self.faces[face]].tolist())
+            if self.normals is None:
+                tri = Triangle(material=self.material, p1=p1, p2=p2, p3=p3)
+            else:
+                n1, n2, n3 = (vector(*n) for n in self.normals[self.normal_faces[face]].tolist())
+                tri = SmoothTriangle(material=self.material, p1=p1, p2=p2, p3=p3, n1=n1, n2=n2, n3=n3)
+            tri.parent = self
+            self._triangles[face] = tri
+
+        return tri
+
+    def triangles(self) -> list[Triangle]:
+        return [self.triangle(face) for face in range(len(self.faces))]
+
+    def _descendants(self) -> t.Iterable[Shape]:
+        return getattr(self, "_triangles", {}).values()
+
+    def _invalidate_bvh(self) -> None:
+        # The faces are fixed, so only the ancestors' hierarchies can be affected
+        if self.parent is not None:
+            self.parent._invalidate_bvh()
+
+    def bounds(self) -> BoundingBox:
+        if not len(self.faces):
+            return BoundingBox()
+
+        used = self.vertices[self.faces.ravel()]
+        return BoundingBox(point(*used.min(axis=0).tolist()), point(*used.max(axis=0).tolist()))
+
+    def _leaves(
+        self, local_ray: Ray, t_min: float, t_max: t.Callable[[], float]
+    ) -> t.Generator[np.ndarray, None, None]:
+        """
+        Yield the face indices of each leaf the ray passes through between `t_min` and `t_max()`,
+        which is checked again before each node so callers can shrink it as they find hits.
+        """
+        if self.tree is None:
+            return
+
+        origin = (*local_ray.origin,)
+        inv_dir = _inverse_direction(local_ray)
+        stack = [self.tree]
+        while stack:
+            node = stack.pop()
+            if not _slab_test(node.lo, node.hi, origin, inv_dir, t_min, t_max()):
+                continue
+            if node.shapes is None:
+                stack.append(node.right)
+                stack.append(node.left)
+            else:
+                yield node.shapes
+
+    def _intersect_faces(self, local_ray: Ray, faces: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        stats = render_stats.active
+        if stats is not None and stats.count_tests:
+            stats.local_intersect(len(faces))
+        return _moller_trumbore(
+            np.array([*local_ray.origin]),
+            np.array([*local_ray.direction]),
+            self._p1[faces],
+            self._e1[faces],
+            self._e2[faces],
+        )
+
+    def _local_intersect(self, transformed_ray: Ray) -> Intersections:
+        # Negative times count too, so every candidate face is tested in one pass
+        leaves = list(self._leaves(transformed_ray, -INF, lambda: INF))
+        if not leaves:
+            return Intersections([])
+
+        faces = np.concatenate(leaves)
+        ts, u, v = self._intersect_faces(transformed_ray, faces)
+        hit = np.flatnonzero(np.isfinite(ts))
+        return Intersections(
+            Intersection(float(ts[i]), self.triangle(int(faces[i])), float(u[i]), float(v[i])) for i in hit.tolist()
+        )
+
+    def _local_closest(self, local_ray: Ray, t_max: float) -> Intersection | None:
+        closest = None
+        for faces in self._leaves(local_ray, 0, lambda: t_max):
+            ts, u, v = self._intersect_faces(local_ray, faces)
+            ts = np.where(ts > 0, ts, np.inf)
+            i = int(ts.argmin())
+            if ts[i] < t_max:
+                t_max = float(ts[i])
+                closest = (faces[i], t_max, float(u[i]), float(v[i]))
+
+        if closest is None:
+            return None
+
+        face, t_hit, u_hit, v_hit = closest
+        return Intersection(t_hit, self.triangle(int(face)), u_hit, v_hit)
+
+    def _local_occludes(self, local_ray: Ray, distance: float) -> bool:
+        for faces in self._leaves(local_ray, 0, lambda: distance):
+            ts, _, _ = self._intersect_faces(local_ray, faces)
+            if ((ts > 0) & (ts < distance)).any():
+                return True
+
+        return False
+
+    def _local_intersect_batch(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        ts, _, _ = _moller_trumbore(
+            origins[:, np.newaxis, :3], directions[:, np.newaxis, :3], self._p1, self._e1, self._e2
+        )
+        return ts
+
+    def _local_normal_at(self, local_point: Tuple, hit: Intersection) -> Tuple:
+        raise NotImplementedError("Meshes should be delegating this call to their triangles.")
+
+
+@dataclass(slots=True, eq=False)
+class Instance(Shape):
+    """
+    Placement of a shared `shape`, typically a group or mesh, under the instance's own transform and
+    optionally with its own `material_override`. The shared shape is not copied, so memory grows
+    with the unique geometry rather than the number of instances.
+
+    The shared shape must not have a parent of its own, as it is reached through every instance
+    rather than through a single parent chain. Hits are reported on `InstancedShape` views that pair
+    the shape that was hit with the instance it was reached through.
+    """
+    shape: Shape = field(kw_only=True)
+    material_override: Material | None = field(default=None, kw_only=True)
+
+    def __post_init__(self) -> None:
+        if self.shape.parent is not None:
+            raise ValueError("Instanced shapes must not have a parent.")
+
+    def instanced(self, shape: Shape | InstancedShape) -> InstancedShape:
+        """The view of a shape within the shared shape as placed by this instance."""
+        return InstancedShape(shape, self)
+
+    def freeze(self) -> None:
+        Shape.freeze(self)
+        self.shape.freeze()
+
+    def bounds(self) -> BoundingBox:
+        return self.shape.parent_space_bounds()
+
+    # Shared groups are searched through their flat BVH, which is in the instance's space
+    def _local_intersect(self, transformed_ray: Ray) -> Intersections:
+        shape = self.shape
+        xs = shape.flat_bvh.intersect(transformed_ray) if isinstance(shape, Group) else shape.intersect(transformed_ray)
+        return Intersections(Intersection(i.t, self.instanced(i.obj), i.u, i.v) for i in xs)
+
+    def _local_closest(self, local_ray: Ray, t_max: float) -> Intersection | None:
+        shape = self.shape
+        if isinstance(shape, Group):
+            hit = shape.flat_bvh.closest_hit(local_ray, t_max)
+        else:
+            hit = shape.intersect_closest(local_ray, t_max)
+        return None if hit is None else Intersection(hit.t, self.instanced(hit.obj), hit.u, hit.v)
+
+    def _local_occludes(self, local_ray: Ray, distance: float) -> bool:
+        shape = self.shape
+        if isinstance(shape, Group):
+            return shape.flat_bvh.occluder(local_ray, distance) is not None
+        return shape.occludes(local_ray, distance)
+
+    def _local_intersect_batch(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        return self.shape.intersections_batch(origins, directions)
+
+    def _local_normal_at(self, local_point: Tuple, hit: Intersection) -> Tuple:
+        raise NotImplementedError("Instances should be delegating this call to their instanced shapes.")
+
+
+class InstancedShape:
+    """
+    A concrete shape inside an instance's shared shape, seen through that instance. It stands in for
+    the shape in hits, chaining the instance's transforms to the shape's own and taking the
+    instance's material override.
+
+    Views are created for each hit rather than kept, and views of the same shape through the same
+    instance compare equal, as the refractive index calculation needs to recognise the surface.
+    """
+    __slots__ = ("shape", "instance")
+
+    def __init__(self, shape: Shape | InstancedShape, instance: Instance) -> None:
+        self.shape = shape
+        self.instance = instance
+
+    def __repr__(self) -> str:
+        return f"InstancedShape(shape={self.shape!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, InstancedShape):
+            return NotImplemented
+        return self.instance is other.instance and self.shape == other.shape
+
+    def __hash__(self) -> int:
+        return hash((id(self.instance), self.shape))
+
+    @property
+    def material(self) -> Material:
+        override = self.instance.material_override
+        return self.shape.material if override is None else override
+
+    @property
+    def world_inverse(self) -> Matrix:
+        return self.shape.world_inverse * self.instance.world_inverse
+
+    @property
+    def world_normal(self) -> Matrix:
+        return self.instance.world_normal * self.shape.world_normal
+
+    def world_to_object(self, pt: Tuple) -> Tuple:
+        return self.shape.world_to_object(self.instance.world_to_object(pt))
+
+    def normal_at(self, query: Tuple, hit: Intersection) -> Tuple:
+        return self.instance.normal_to_world(self.shape.normal_at(self.instance.world_to_object(query), hit))
+
+    def world_to_object_batch(self, pts: np.ndarray) -> np.ndarray:
+        return self.shape.world_to_object_batch(self.instance.world_to_object_batch(pts))
+
+    def _local_intersect_batch(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        return self.shape._local_intersect_batch(origins, directions)
+
+    def _local_normal_at_batch(self, local_points: np.ndarray) -> np.ndarray:
+        return self.shape._local_normal_at_batch(local_points)
+
+    def normal_at_batch(self, points: np.ndarray) -> np.ndarray:
+        local_normals = self.shape.normal_at_batch(self.instance.world_to_object_batch(points))
+        return self.instance.normal_to_world_batch(local_normals)
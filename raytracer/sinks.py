@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import struct
+import typing as t
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+# Output format picked for each file extension
+FORMATS = {
+    ".ppm": "p3",
+    ".pnm": "p6",
+    ".png": "png",
+    ".pfm": "pfm",
+}
+
+# Maximum line length of ASCII PPM files
+PPM_LINE_LENGTH = 70
+
+# Decimal strings of every byte value, so ASCII PPM rows are formatted by table lookup
+_BYTE_STRINGS = np.array([str(i) for i in range(256)])
+_BYTE_STRING_LENGTHS = np.array([len(s) for s in _BYTE_STRINGS])
+
+
+def format_for(path: Path, fmt: str | None = None) -> str:
+    """Pick the output format for the path from its extension, unless `fmt` is given."""
+    if fmt is None:
+        fmt = FORMATS.get(path.suffix.lower())
+        if fmt is None:
+            raise ValueError(f"Can't pick an output format for {path}, expected one of {[*FORMATS]}.")
+    elif fmt not in _ENCODERS:
+        raise ValueError(f"Unknown output format {fmt!r}, expected one of {[*_ENCODERS]}.")
+
+    return fmt
+
+
+def _build_ppm_header(width: int, height: int):
+    header = f"P3\n{width} {height}\n255"
+    return header
+
+
+def _quantize(pixels: np.ndarray, maxval: int = 255) -> np.ndarray:
+    """Scale colors to `[0, maxval]` bytes, truncating the fractional part."""
+    return np.clip(pixels * maxval, 0, maxval).astype(np.uint8)
+
+
+class _Encoder:
+    """Writes consecutive rows of an image to an open binary file, top to bottom."""
+
+    def __init__(self, file: t.BinaryIO, width: int, height: int) -> None:
+        self.file = file
+        self.width = width
+        self.height = height
+
+    def start(self) -> None:  # pragma: no cover
+        raise NotImplementedError
+
+    def write_rows(self, y0: int, pixels: np.ndarray) -> None:  # pragma: no cover
+        raise NotImplementedError
+
+    def finish(self) -> None:
+        pass
+
+
+class _P3Encoder(_Encoder):
+    """
+    ASCII Portable Pixmap. Values are wrapped across rows into lines of at most 70 characters, so the
+    last, possibly incomplete, line is carried over to the next batch of rows.
+    """
+
+    def start(self) -> None:
+        self._carry: list[str] = []
+        self.file.write(f"{_build_ppm_header(self.width, self.height)}\n".encode("ascii"))
+
+    def write_rows(self, y0: int, pixels: np.ndarray) -> None:
+        values = _quantize(pixels).ravel()
+        tokens = self._carry + _BYTE_STRINGS[values].tolist()
+        # Each token takes its length plus a separating space
+        widths = np.concatenate((
+            np.array([len(tok) for tok in self._carry], dtype=int), _BYTE_STRING_LENGTHS[values]
+        )) + 1
+        ends = np.cumsum(widths)
+
+        lines = []
+        start = 0
+        line_start = 0
+        while True:
+            # Greedily take every token that keeps the line within the limit
+            stop = int(np.searchsorted(ends, line_start + PPM_LINE_LENGTH + 1, side="right"))
+            if stop >= len(tokens):
+                break
+            lines.append(" ".join(tokens[start:stop]))
+            start = stop
+            line_start = ends[stop - 1]
+
+        if lines:
+            self.file.write(("\n".join(lines) + "\n").encode("ascii"))
+        self._carry = tokens[start:]
+
+    def finish(self) -> None:
+        self.file.write((" ".join(self._carry) + "\n").encode("ascii"))
+
+
+class _P6Encoder(_Encoder):
+    """Binary Portable Pixmap."""
+
+    def start(self) -> None:
+        self.file.write(f"P6\n{self.width} {self.height}\n255\n".encode("ascii"))
+
+    def write_rows(self, y0: int, pixels: np.ndarray) -> None:
+        self.file.write(_quantize(pixels).tobytes())
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+class _PNGEncoder(_Encoder):
+    """
+    8-bit RGB PNG, compressed incrementally with zlib from the standard library. Compressed data is
+    written out in IDAT chunks of about `chunk_size` bytes.
+    """
+    compression = 6
+    chunk_size = 1 << 16
+
+    def start(self) -> None:
+        self._compressor = zlib.compressobj(self.compression)
+        self._compressed = bytearray()
+        ihdr = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        self.file.write(b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", ihdr))
+
+    def write_rows(self, y0: int, pixels: np.ndarray) -> None:
+        # Every scanline starts with its filter type, 0 meaning unfiltered
+        scanlines = np.zeros((len(pixels), self.width * 3 + 1), dtype=np.uint8)
+        scanlines[:, 1:] = _quantize(pixels).reshape(len(pixels), self.width * 3)
+
+        self._compressed += self._compressor.compress(scanlines.tobytes())
+        if len(self._compressed) >= self.chunk_size:
+            self.file.write(_png_chunk(b"IDAT", bytes(self._compressed)))
+            self._compressed.clear()
+
+    def finish(self) -> None:
+        self._compressed += self._compressor.flush()
+        self.file.write(_png_chunk(b"IDAT", bytes(self._compressed)) + _png_chunk(b"IEND", b""))
+
+
+class _PFMEncoder(_Encoder):
+    """
+    Little endian Portable Float Map, keeping the unclamped values. PFM stores rows from the bottom
+    up, so each batch is written at its offset from the end of the file.
+    """
+
+    def start(self) -> None:
+        header = f"PF\n{self.width} {self.height}\n-1.0\n".encode("ascii")
+        self.file.write(header)
+        self._data_start = len(header)
+        self._row_size = self.width * 3 * 4
+        self.file.truncate(self._data_start + self.height * self._row_size)
+
+    def write_rows(self, y0: int, pixels: np.ndarray) -> None:
+        self.file.seek(self._data_start + (self.height - y0 - len(pixels)) * self._row_size)
+        self.file.write(np.ascontiguousarray(pixels[::-1], dtype="<f4").tobytes())
+
+
+_ENCODERS: dict[str, type[_Encoder]] = {
+    "p3": _P3Encoder,
+    "p6": _P6Encoder,
+    "png": _PNGEncoder,
+    "pfm": _PFMEncoder,
+}
+
+
+class ImageSink:
+    """
+    Streams an image to disk as blocks of it are rendered, so the whole frame never has to be held in
+    memory, either as pixels or as encoded text.
+
+    Blocks may arrive in any order but must not overlap. Rows are buffered until they are complete
+    and encoded as soon as every row above them has been written; any pixels never written are black
+    once the sink is closed. Use it as a context manager, or call `close` when done.
+    """
+
+    def __init__(self, path: Path, width: int, height: int, fmt: str | None = None) -> None:
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fmt = format_for(path, fmt)
+
+        self._file = path.open("wb")
+        self._encoder = _ENCODERS[self.fmt](self._file, width, height)
+        self._encoder.start()
+
+        self._next_row = 0
+        self._pending: dict[int, np.ndarray] = {}
+        self._filled: dict[int, int] = {}
+
+    def __enter__(self) -> ImageSink:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def write_block(self, x0: int, y0: int, pixels: np.ndarray) -> None:
+        """Write an (h, w, 3) block of pixels with its top left corner at `(x0, y0)`."""
+        height, width, _ = pixels.shape
+        if x0 < 0 or y0 < 0 or x0 + width > self.width or y0 + height > self.height:
+            raise ValueError(
+                f"Block of {width}x{height} at ({x0}, {y0}) is outside the {self.width}x{self.height} image."
+            )
+        if y0 < self._next_row:
+            raise ValueError(f"Row {y0} has already been written.")
+
+        if x0 == 0 and width == self.width and y0 == self._next_row and not self._pending:
+            # Complete rows that are next in line go straight to the encoder
+            self._encoder.write_rows(y0, pixels)
+            self._next_row += height
+            return
+
+        for dy, row in enumerate(pixels):
+            y = y0 + dy
+            if y not in self._pending:
+                self._pending[y] = np.zeros((self.width, 3))
+                self._filled[y] = 0
+            self._pending[y][x0:x0 + width] = row
+            self._filled[y] += width
+
+        self._flush()
+
+    def _flush(self, force: bool = False) -> None:
+        rows = []
+        y0 = self._next_row
+        while self._next_row < self.height and (force or self._filled.get(self._next_row, 0) >= self.width):
+            self._filled.pop(self._next_row, None)
+            rows.append(self._pending.pop(self._next_row, np.zeros((self.width, 3))))
+            self._next_row += 1
+
+        if rows:
+            self._encoder.write_rows(y0, np.stack(rows))
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+
+        self._flush(force=True)
+        self._encoder.finish()
+        self._file.close()
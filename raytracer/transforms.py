@@ -1,53 +1,45 @@
 from raytracer import NUMERIC_T
-from raytracer.matrix import Matrix
+from raytracer.matrix import Affine, Matrix  # noqa: F401 (re-exported)
 from raytracer.tuple import Tuple, cross
-import numpy as np
 from math import sin, cos
 
 
-def translation(x: NUMERIC_T, y: NUMERIC_T, z: NUMERIC_T) -> Matrix:
+def translation(x: NUMERIC_T, y: NUMERIC_T, z: NUMERIC_T) -> Affine:
     """moves a point from one position to another in a 3D space"""
-    identity = np.identity(4)
-    identity[0:3, 3] = [x, y, z]
-    return Matrix(matrix=identity)
+    return Affine.from_rows((1.0, 0.0, 0.0, x, 0.0, 1.0, 0.0, y, 0.0, 0.0, 1.0, z))
 
 
-def scaling(x: NUMERIC_T, y: NUMERIC_T, z: NUMERIC_T) -> Matrix:
+def scaling(x: NUMERIC_T, y: NUMERIC_T, z: NUMERIC_T) -> Affine:
     """scales a point up or down in a 3D space"""
-    identity = np.identity(4)
-    identity[0, 0] = x
-    identity[1, 1] = y
-    identity[2, 2] = z
-    return Matrix(matrix=identity)
+    return Affine.from_rows((x, 0.0, 0.0, 0.0, 0.0, y, 0.0, 0.0, 0.0, 0.0, z, 0.0))
 
 
-def rotate_x(a: NUMERIC_T) -> Matrix:
+def rotate_x(a: NUMERIC_T) -> Affine:
     """means rotating around the x axis by moving from the y axis towards the z axis"""
-    identity = np.identity(4)
-    identity[1, [1, 2]] = (cos(a), -sin(a))
-    identity[2, [1, 2]] = (sin(a), cos(a))
-    return Matrix(identity)
+    c, s = cos(a), sin(a)
+    return Affine.from_rows((1.0, 0.0, 0.0, 0.0, 0.0, c, -s, 0.0, 0.0, s, c, 0.0))
 
 
-def rotate_y(a: NUMERIC_T) -> Matrix:
+def rotate_y(a: NUMERIC_T) -> Affine:
+    c, s = cos(a), sin(a)
+    return Affine.from_rows((c, 0.0, s, 0.0, 0.0, 1.0, 0.0, 0.0, -s, 0.0, c, 0.0))
 
-    identity = np.identity(4)
-    identity[0, [0, 2]] = (cos(a), sin(a))
-    identity[2, [0, 2]] = (-sin(a), cos(a))
-    return Matrix(identity)
 
+def rotate_z(a: NUMERIC_T) -> Affine:
+    c, s = cos(a), sin(a)
+    return Affine.from_rows((c, -s, 0.0, 0.0, s, c, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0))
 
-def rotate_z(a: NUMERIC_T) -> Matrix:
 
-    identity = np.identity(4)
-    identity[0, [0, 1]] = (cos(a), -sin(a))
-    identity[1, [0, 1]] = (sin(a), cos(a))
-    return Matrix(identity)
-
-
-def rotate(x: float = 0, y: float = 0, z: float = 0) -> Matrix:
-    # reverse the dot product
-    return rotate_z(z) * rotate_y(y) * rotate_x(x)
+def rotate(x: float = 0, y: float = 0, z: float = 0) -> Affine:
+    """rotate_z(z) * rotate_y(y) * rotate_x(x), multiplied out in closed form"""
+    cx, sx = cos(x), sin(x)
+    cy, sy = cos(y), sin(y)
+    cz, sz = cos(z), sin(z)
+    return Affine.from_rows((
+        cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx, 0.0,
+        sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx, 0.0,
+        -sy, cy * sx, cy * cx, 0.0,
+    ))
 
 
 def shearing(
@@ -57,28 +49,19 @@ def shearing(
     y_z: NUMERIC_T = 0,
     z_x: NUMERIC_T = 0,
     z_y: NUMERIC_T = 0,
-) -> Matrix:
-    matrix = np.array(
-        [
-            [1, x_y, x_z, 0],
-            [y_x, 1, y_z, 0],
-            [z_x, z_y, 1, 0],
-            [0, 0, 0, 1],
-        ]
-    )
+) -> Affine:
+    return Affine.from_rows((1.0, x_y, x_z, 0.0, y_x, 1.0, y_z, 0.0, z_x, z_y, 1.0, 0.0))
 
-    return Matrix(matrix)
 
-
-def view_transform(from_p: Tuple, to_p: Tuple, up_v: Tuple) -> Matrix:
+def view_transform(from_p: Tuple, to_p: Tuple, up_v: Tuple) -> Affine:
     forward = (to_p - from_p).normalize()
     up_norm = up_v.normalize()
     left = cross(forward, up_norm)
     true_up = cross(left, forward)
 
-    orientation = np.identity(4)
-    orientation[0, 0:3] = [*left]
-    orientation[1, 0:3] = [*true_up]
-    orientation[2, 0:3] = [*-forward]
-
-    return Matrix(orientation) * translation(-from_p.x, -from_p.y, -from_p.z)
+    # The orientation followed by moving the eye to the origin, multiplied out
+    return Affine.from_rows((
+        left.x, left.y, left.z, -(left.x * from_p.x + left.y * from_p.y + left.z * from_p.z),
+        true_up.x, true_up.y, true_up.z, -(true_up.x * from_p.x + true_up.y * from_p.y + true_up.z * from_p.z),
+        -forward.x, -forward.y, -forward.z, forward.x * from_p.x + forward.y * from_p.y + forward.z * from_p.z,
+    ))
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import typing as t
+
+import numpy as np
+
+from raytracer import EPSILON
+from raytracer.tuple import Tuple, TupleType
+
+if t.TYPE_CHECKING:
+    from raytracer.matrix import Matrix
+
+
+class TupleArray:
+    """
+    Struct of arrays counterpart to `Tuple`: N points or vectors stored in a single (N, 4) float array
+    laid out like `Tuple.as_array`, so whole batches are operated on without allocating a `Tuple` per
+    element. Use `Points` or `Vectors` rather than instantiating this directly.
+
+    Columns of the underlying array are exposed as `x`, `y`, `z` and `w` views.
+    """
+    __slots__ = ("data",)
+    __hash__ = None  # type: ignore[assignment]
+
+    w_type: t.ClassVar[TupleType]
+
+    def __init__(self, data: t.Any) -> None:
+        data = np.asarray(data, dtype=float)
+        if data.ndim != 2 or data.shape[1] not in (3, 4):
+            raise ValueError(f"Expected an (N, 3) or (N, 4) array. Received shape: {data.shape}.")
+
+        if data.shape[1] == 3:
+            data = np.hstack((data, np.full((len(data), 1), float(self.w_type))))
+        self.data = data
+
+    @classmethod
+    def from_tuples(cls, tuples: t.Iterable[Tuple]) -> TupleArray:
+        tuples = list(tuples)
+        if any(tup.w != cls.w_type for tup in tuples):
+            raise ValueError(f"Every tuple must be a {cls.w_type.name.lower()}.")
+
+        return cls(np.array([(tup.x, tup.y, tup.z) for tup in tuples], dtype=float).reshape(-1, 3))
+
+    def to_tuples(self) -> list[Tuple]:
+        return [Tuple(x, y, z, self.w_type) for x, y, z in self.data[:, :3].tolist()]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> t.Iterator[Tuple]:
+        return iter(self.to_tuples())
+
+    def __getitem__(self, key: t.Any) -> t.Any:
+        if isinstance(key, (int, np.integer)):
+            x, y, z = self.data[key, :3].tolist()
+            return Tuple(x, y, z, self.w_type)
+
+        return type(self)(self.data[key])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TupleArray):
+            return NotImplemented
+        return (
+            self.w_type == other.w_type
+            and self.data.shape == other.data.shape
+            and bool(np.allclose(self.data, other.data, rtol=0, atol=EPSILON))
+        )
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.data[:, :3].tolist()})"
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @property
+    def z(self) -> np.ndarray:
+        return self.data[:, 2]
+
+    @property
+    def w(self) -> np.ndarray:
+        return self.data[:, 3]
+
+    def transform(self, matrix: Matrix) -> TupleArray:
+        """Apply the transformation matrix to every element in a single matmul."""
+        return type(self)(self.data @ matrix.matrix.T)
+
+
+class Points(TupleArray):
+    __slots__ = ()
+    w_type = TupleType.POINT
+
+    def __add__(self, other: object) -> Points:
+        if not isinstance(other, Vectors):
+            return NotImplemented
+        return Points(self.data + other.data)
+
+    def __sub__(self, other: object) -> Points | Vectors:
+        if isinstance(other, Points):
+            return Vectors(self.data - other.data)
+        if isinstance(other, Vectors):
+            return Points(self.data - other.data)
+        return NotImplemented
+
+
+class Vectors(TupleArray):
+    __slots__ = ()
+    w_type = TupleType.VECTOR
+
+    def __add__(self, other: object) -> Vectors | Points:
+        if isinstance(other, Vectors):
+            return Vectors(self.data + other.data)
+        if isinstance(other, Points):
+            return Points(self.data + other.data)
+        return NotImplemented
+
+    def __sub__(self, other: object) -> Vectors:
+        if not isinstance(other, Vectors):
+            return NotImplemented
+        return Vectors(self.data - other.data)
+
+    def __neg__(self) -> Vectors:
+        return Vectors(-self.data)
+
+    def __mul__(self, other: object) -> Vectors:
+        """Scale by a number, or element-wise by an (N,) array of numbers."""
+        if isinstance(other, (int, float)):
+            return Vectors(self.data * other)
+        if isinstance(other, np.ndarray) and other.shape == (len(self),):
+            return Vectors(self.data * other[:, np.newaxis])
+        return NotImplemented
+
+    def __rmul__(self, other: object) -> Vectors:
+        return self * other
+
+    def __truediv__(self, other: object) -> Vectors:
+        if isinstance(other, (int, float)):
+            return Vectors(self.data / other)
+        if isinstance(other, np.ndarray) and other.shape == (len(self),):
+            return Vectors(self.data / other[:, np.newaxis])
+        return NotImplemented
+
+    def magnitude(self) -> np.ndarray:
+        return np.sqrt(dot(self, self))
+
+    def normalize(self) -> Vectors:
+        """Normalize every vector into a unit vector."""
+        return self / self.magnitude()
+
+    def reflect(self, normals: Vectors) -> Vectors:
+        """Calculate the reflected vectors."""
+        if not isinstance(normals, Vectors):
+            raise ValueError("Normals must be vectors.")
+
+        return self - normals * (2 * dot(self, normals))
+
+
+def dot(left: TupleArray, right: TupleArray) -> np.ndarray:
+    """Element-wise dot products of two vector arrays."""
+    if not (isinstance(left, Vectors) and isinstance(right, Vectors)):
+        raise ValueError(f"Both operands must be vectors. Received: {type(left).__name__} and {type(right).__name__}.")
+
+    return np.einsum("ij,ij->i", left.data[:, :3], right.data[:, :3])
+
+
+def cross(left: TupleArray, right: TupleArray) -> Vectors:
+    """Element-wise cross products of two vector arrays."""
+    if not (isinstance(left, Vectors) and isinstance(right, Vectors)):
+        raise ValueError(f"Both operands must be vectors. Received: {type(left).__name__} and {type(right).__name__}.")
+
+    return Vectors(np.cross(left.data[:, :3], right.data[:, :3]))
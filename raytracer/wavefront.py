@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import numpy as np
+
+from raytracer import precision, render_stats
+from raytracer.compiler import CompiledScene, compile_world
+from raytracer.intersections import schlick_batch
+from raytracer.world import REF_LIMIT, World
+
+
+def _dot(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", left, right)
+
+
+def trace(
+    world: World,
+    origins: np.ndarray,
+    directions: np.ndarray,
+    remaining: int = REF_LIMIT,
+    ray_counts: np.ndarray | None = None,
+    scene: CompiledScene | None = None,
+) -> np.ndarray:
+    """
+    Calculate the color seen by each of N rays, given as (N, 4) origin and direction arrays.
+
+    This is the batched counterpart of `World.color_at`, returning an (N, 3) array of colors. Rays are
+    traced as generations of arrays: all hits of a generation are shaded at once, then the reflection
+    and refraction rays they spawn are compacted into the next generation, carrying a per-ray weight
+    and the index of the output row they contribute to.
+
+    Given an (N,) `ray_counts` array, the number of rays each of the N rays led to, itself included, is
+    added to it.
+
+    Rays are traced against the world's `CompiledScene`, compiled on every call unless a `scene`
+    compiled from the world is passed in. They are traced, and their colors returned, in the scene's
+    precision.
+    """
+    stats = render_stats.active
+    if scene is None:
+        scene = compile_world(world)
+    dtype = scene.dtype
+    origins, directions = origins.astype(dtype, copy=False), directions.astype(dtype, copy=False)
+    light = world.light
+    light_pos = np.array([*light.position, 1], dtype=dtype)
+    colors = np.zeros((len(origins), 3), dtype=dtype)
+
+    # Each ray in the current generation knows which output row it contributes to, and how much
+    ray_idx = np.arange(len(origins))
+    weights = np.ones((len(origins), 3), dtype=dtype)
+
+    for depth in range(remaining + 1):
+        if not len(origins):
+            break
+
+        hits = scene.closest(origins, directions)
+        hit = np.isfinite(hits.t)
+        if ray_counts is not None:
+            np.add.at(ray_counts, ray_idx, 1)
+        if stats is not None:
+            stats.end_rays(hit, depth)
+
+        # Rays that miss contribute black, so compact the generation down to the hits
+        origins, directions, hits = origins[hit], directions[hit], hits[hit]
+        ray_idx, weights = ray_idx[hit], weights[hit]
+
+        points = origins + directions * hits.t[:, np.newaxis]
+        eye_v = -directions
+        normals = scene.normals(hits, points)
+
+        inside = _dot(normals, eye_v) < 0
+        normals[inside] = -normals[inside]
+        reflect_v = directions - normals * 2 * _dot(directions, normals)[:, np.newaxis]
+        offsets = normals * precision.surface_offsets(points, hits.t)[:, np.newaxis]
+        over_points = points + offsets
+        under_points = points - offsets
+
+        light_v = light_pos - over_points
+        light_dist = np.sqrt(_dot(light_v, light_v))
+        light_dirs = light_v / light_dist[:, np.newaxis]
+        shadowed = scene.occluded(over_points, light_dirs, light_dist)
+        if ray_counts is not None:
+            np.add.at(ray_counts, ray_idx, 1)
+        if stats is not None:
+            stats.shadow_rays += len(over_points)
+            stats.end_rays(shadowed)
+
+        surface = scene.shade(light, hits, points, eye_v, normals, shadowed)
+        np.add.at(colors, ray_idx, surface * weights)
+
+        if depth == remaining:
+            break
+
+        reflective = scene.reflective[hits.material]
+        transparency = scene.transparency[hits.material]
+        reflect_weight = reflective.copy()
+        refract_weight = transparency.copy()
+
+        refracting = transparency > 0
+        refract_dirs = np.empty((0, 4), dtype=dtype)
+        if refracting.any():
+            n1, n2 = scene.refractive_indices(origins[refracting], directions[refracting], hits[refracting])
+            r_eye, r_normals = eye_v[refracting], normals[refracting]
+
+            # Surfaces that are both reflective and transparent are blended by Schlick's approximation
+            reflectance = schlick_batch(r_eye, r_normals, n1, n2)
+            blended = reflective[refracting] > 0
+            reflect_weight[refracting] *= np.where(blended, reflectance, 1)
+            refract_weight[refracting] *= np.where(blended, 1 - reflectance, 1)
+
+            n_ratio = n1 / n2
+            cos_i = _dot(r_eye, r_normals)
+            sin2_t = n_ratio**2 * (1 - cos_i**2)
+            total_internal = sin2_t > 1
+            cos_t = np.sqrt(np.where(total_internal, 0, 1.0 - sin2_t))
+            refract_dirs = (
+                r_normals * (n_ratio * cos_i - cos_t)[:, np.newaxis] - r_eye * n_ratio[:, np.newaxis]
+            )[~total_internal]
+            refracting[refracting] = ~total_internal
+
+        reflecting = reflective > 0
+        if stats is not None:
+            stats.reflection_rays += int(reflecting.sum())
+            stats.refraction_rays += int(refracting.sum())
+        origins = np.concatenate((over_points[reflecting], under_points[refracting]))
+        directions = np.concatenate((reflect_v[reflecting], refract_dirs))
+        ray_idx = np.concatenate((ray_idx[reflecting], ray_idx[refracting]))
+        weights = np.concatenate((
+            weights[reflecting] * reflect_weight[reflecting, np.newaxis],
+            weights[refracting] * refract_weight[refracting, np.newaxis],
+        ))
+
+    return colors
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 import math
-from dataclasses import dataclass
+import typing as t
+from dataclasses import dataclass, field
 
+from raytracer import render_stats
+from raytracer.bvh import BVH
 from raytracer.color import BLACK, WHITE, Color
-from raytracer.intersections import IntersectionComp, Intersections, prepare_computation, schlick
+from raytracer.intersections import IntersectionComp, Intersection, Intersections, prepare_computation, schlick
 from raytracer.lights import PointLight, lighting
 from raytracer.materials import Material
 from raytracer.tuple import Tuple, dot, point
 from raytracer.rays import Ray
-from raytracer.shapes import Shape, Sphere
+from raytracer.shapes import Shape, Sphere, hierarchy_version
 from raytracer.transforms import scaling
 
+if t.TYPE_CHECKING:
+    from raytracer.compiler import CompiledScene
+
 DEFAULT_LIGHT = PointLight(point(-10, 10, -10), WHITE)
 
 REF_LIMIT = 5
@@ -19,19 +25,74 @@ REF_LIMIT = 5
 
 @dataclass(slots=True)
 class World:
+    """
+    Objects lit by a light. `objects` is kept as given, so the caller's list and the world's are
+    the same one.
+    """
     light: PointLight
     objects: list[Shape]
+    _bvh: BVH | None = field(default=None, init=False, repr=False, compare=False)
+    # The objects list the BVH was built over, its objects at the time and the `hierarchy_version`
+    _bvh_objects: list[Shape] | None = field(default=None, init=False, repr=False, compare=False)
+    _bvh_snapshot: tuple[Shape, ...] = field(default=(), init=False, repr=False, compare=False)
+    _bvh_version: int = field(default=-1, init=False, repr=False, compare=False)
+    # Scene compiled by `compile_world`, and the BVH that was current when it was compiled
+    _compiled: tuple[BVH, CompiledScene] | None = field(default=None, init=False, repr=False, compare=False)
+    # Last object found to shadow a point from each light; neighbouring shadow rays are usually
+    # blocked by the same object, so it is tested first
+    _last_occluder: dict[PointLight, Shape] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @property
+    def bvh(self) -> BVH:
+        """
+        Bounding volume hierarchy over the leaves of the world's objects, in world space so nested
+        groups cost no more to trace than flat ones. Built on first use and rebuilt when objects are
+        added or removed, the objects list is swapped for another, or any shape in the world is
+        moved. Objects replaced in place, keeping the list's length, are only noticed by `freeze`,
+        as comparing every object on each query would make it as slow as having no BVH.
+        """
+        if (
+            self._bvh is None
+            or self.objects is not self._bvh_objects
+            or len(self.objects) != len(self._bvh_snapshot)
+            or self._bvh_version != hierarchy_version()
+        ):
+            self._build_bvh()
+        return self._bvh
+
+    def _build_bvh(self) -> None:
+        # Freezing the objects is what lets later changes to them bump `hierarchy_version`
+        for obj in self.objects:
+            obj.freeze()
+        self._bvh = BVH((leaf for obj in self.objects for leaf in obj.leaves()), world=True)
+        self._bvh_objects, self._bvh_snapshot = self.objects, tuple(self.objects)
+        self._bvh_version = hierarchy_version()
+        self._last_occluder.clear()
+
+    def invalidate_bvh(self) -> None:
+        self._bvh = None
+        self._last_occluder.clear()
+
+    def freeze(self) -> None:
+        """
+        Precompute every object's composed transforms and build the BVH over the leaves of their
+        hierarchies ahead of a render. Nothing is rebuilt if the world hasn't changed since.
+        """
+        self.bvh
+        if any(a is not b for a, b in zip(self.objects, self._bvh_snapshot)):
+            self._build_bvh()
 
     def intersect_world(self, ray: Ray) -> Intersections:
         """
         Calculate the `Ray`'s intersections with all objects in the current world.
         """
-        all_intersections = Intersections([])
-        for obj in self.objects:
-            all_intersections.extend(obj.intersect(ray))
+        return self.bvh.intersect(ray)
 
-        all_intersections.sort()
-        return all_intersections
+    def closest_hit(self, ray: Ray) -> Intersection | None:
+        """
+        Find the `Ray`'s hit in the current world without collecting every intersection.
+        """
+        return self.bvh.closest_hit(ray)
 
     def _shade_hit(self, comps: IntersectionComp, remaining: int = REF_LIMIT) -> Color:
         """
@@ -63,11 +124,22 @@ class World:
         """
         Calculate the color at the `Ray`'s first intersection point in the world.
         """
-        hit = self.intersect_world(r).hit
+        hit = self.closest_hit(r)
+        if hit and hit.obj.material.transparency > 0:
+            # Refraction needs every intersection to work out which objects contain the hit
+            intersections = self.intersect_world(r)
+            hit = intersections.hit
+
+        stats = render_stats.active
+        if stats is not None:
+            stats.end_ray(0 if hit is None else 1, depth=REF_LIMIT - remaining)
+
         if not hit:
             return BLACK
-
-        comps = prepare_computation(hit, r)
+        if hit.obj.material.transparency > 0:
+            comps = prepare_computation(hit, r, intersections)
+        else:
+            comps = prepare_computation(hit, r)
         return self._shade_hit(comps, remaining=remaining)
 
     def is_shadowed(self, pt: Tuple) -> bool:
@@ -77,12 +149,23 @@ class World:
         pt_dir = pt_v.normalize()
         r = Ray(pt, pt_dir)
 
-        intersections = self.intersect_world(r)
-        h = intersections.hit
-        if h and h.t < pt_dist:  # Make sure hit isn't past the light source
-            return True
+        # Only an occluder before the light source matters, and any one will do. Fetching the BVH
+        # first drops the cached occluder if the objects changed.
+        bvh = self.bvh
+        last = self._last_occluder.get(self.light)
+        if last is not None and last.occludes(r, pt_dist, world=True):
+            shadowed = True
         else:
-            return False
+            occluder = bvh.occluder(r, pt_dist)
+            if occluder is not None:
+                self._last_occluder[self.light] = occluder
+            shadowed = occluder is not None
+
+        stats = render_stats.active
+        if stats is not None:
+            stats.shadow_rays += 1
+            stats.end_ray(1 if shadowed else 0)
+        return shadowed
 
     def reflected_color(self, comps: IntersectionComp, remaining: int = REF_LIMIT) -> Color:
         """
@@ -94,6 +177,9 @@ class World:
             return BLACK
 
         reflect_ray = Ray(comps.over_point, comps.reflect_v)
+        stats = render_stats.active
+        if stats is not None:
+            stats.reflection_rays += 1
         col = self.color_at(reflect_ray, remaining=remaining - 1)
         return col * comps.obj.material.reflective
 
@@ -116,6 +202,9 @@ class World:
         cos_t = math.sqrt(1.0 - sin2_t)
         direction = comps.normal * (n_ratio * cos_i - cos_t) - comps.eye_v * n_ratio
         refract_ray = Ray(comps.under_point, direction)
+        stats = render_stats.active
+        if stats is not None:
+            stats.refraction_rays += 1
 
         color = self.color_at(refract_ray, remaining - 1) * comps.obj.material.transparency
         return color
@@ -11,7 +11,7 @@ from raytracer.transforms import rotate, scaling, translation, view_transform
 from raytracer.world import World
 
 
-def first_camera() -> None:
+def first_camera_scene() -> tuple[World, Camera]:
     # Create the floor & walls as extremely flattened spheres with a matte texture
     flatten_sphere = scaling(10, 0.01, 10)
     floor_material = Material(Color(1, 0.9, 0.9), specular=0)
@@ -48,6 +48,11 @@ def first_camera() -> None:
         pi / 3,
         transform=view_transform(point(0, 1.5, -5), point(0, 1, 0), vector(0, 1, 0)),
     )
+    return world, camera
+
+
+def first_camera() -> None:
+    world, camera = first_camera_scene()
     canvas = camera.render(world)
 
     canvas.to_file(Path("./raytracer_demo/output/chapter_7.ppm"))
@@ -0,0 +1,81 @@
+"""Scenes and rays shared by several test modules."""
+from dataclasses import dataclass
+
+import numpy as np
+
+from raytracer.color import WHITE, Color
+from raytracer.lights import PointLight
+from raytracer.materials import Material
+from raytracer.patterns import Stripe
+from raytracer.shapes import Group, Instance, Plane, Sphere, Triangle, TriangleMesh
+from raytracer.transforms import rotate, scaling, translation
+from raytracer.tuple import point
+from raytracer.world import World
+
+
+def random_rays(n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    origins = np.ones((n, 4))
+    origins[:, :3] = rng.uniform(-5, 5, (n, 3))
+    directions = np.zeros((n, 4))
+    directions[:, :3] = rng.normal(size=(n, 3))
+    directions /= np.linalg.norm(directions, axis=1)[:, np.newaxis]
+
+    return origins, directions
+
+
+def sphere_mesh(smooth: bool, rings: int = 8, segments: int = 12) -> TriangleMesh:
+    """UV sphere of radius 1, with its own normals as the vertex normals when `smooth`."""
+    theta = np.linspace(0, np.pi, rings + 1)[:, np.newaxis]
+    phi = np.linspace(0, 2 * np.pi, segments, endpoint=False)[np.newaxis, :]
+    vertices = np.stack(
+        [np.sin(theta) * np.cos(phi), np.cos(theta) * np.ones_like(phi), np.sin(theta) * np.sin(phi)], axis=-1
+    ).reshape(-1, 3)
+
+    faces = []
+    for r in range(rings):
+        for s in range(segments):
+            a, b = r * segments + s, r * segments + (s + 1) % segments
+            c, d = a + segments, b + segments
+            faces += [(a, c, b), (b, c, d)]
+
+    faces = np.array(faces)
+    if not smooth:
+        return TriangleMesh(vertices=vertices, faces=faces)
+    return TriangleMesh(vertices=vertices, faces=faces, normals=vertices, normal_faces=faces)
+
+
+def glass_world() -> World:
+    floor = Plane(material=Material(pattern=Stripe(transform=scaling(0.5, 0.5, 0.5)), reflective=0.5))
+    glass = Sphere(
+        translation(0, 1, 0),
+        Material(Color(0.1, 0.1, 0.1), transparency=0.9, reflective=0.9, refractive_index=1.5),
+    )
+    bubble = Sphere(translation(0, 1, 0) * scaling(0.5, 0.5, 0.5), Material(transparency=1, refractive_index=1.0))
+    group = Group(translation(2, 0, 1))
+    group.add_child(Sphere(translation(0, 1, 0), Material(Color(1, 0.2, 0.2))))
+    mirror = Sphere(translation(-2, 1, 1), Material(Color(0, 0, 0), reflective=1))
+
+    return World(PointLight(point(-10, 10, -10), WHITE), [floor, glass, bubble, group, mirror])
+
+
+@dataclass(slots=True, eq=False)
+class Ellipsoid(Sphere):
+    """Sphere subclass, which the compiler has no kernel for."""
+
+
+def mixed_world() -> World:
+    stripes = Stripe(Color(1, 0, 0), Color(0, 0, 1), scaling(0.3, 0.3, 0.3))
+    group = Group(rotate(y=0.5) * translation(1, 0, 0))
+    group.add_child(Sphere(scaling(0.5, 1, 0.5), Material(pattern=stripes, shininess=50)))
+    group.add_child(Triangle(p1=point(0, 2, 0), p2=point(-1, 1, 0), p3=point(1, 1, 0)))
+    mesh = sphere_mesh(smooth=True)
+    mesh.transform = translation(-2, 0, 1)
+    objects = [
+        Plane(translation(0, -2, 0), Material(pattern=stripes, reflective=0.4)),
+        group,
+        mesh,
+        Instance(translation(2, 1, 2), shape=sphere_mesh(smooth=False), material_override=Material(ambient=0.5)),
+        Ellipsoid(translation(0, 0, 3) * scaling(2, 1, 1), Material(transparency=0.5, refractive_index=1.3)),
+    ]
+    return World(PointLight(point(-10, 10, -10), WHITE), objects)
@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks.run import find_regressions, main, run_benchmark
+from benchmarks.scenes import SCENES
+
+
+@pytest.mark.parametrize("name", SCENES)
+def test_scenes_render(name: str) -> None:
+    result = run_benchmark(name, SCENES[name], 6, 4, measure_memory=False)
+
+    assert result["rays"] == 15
+    assert result["seconds"] > 0
+    assert result["rays_per_second"] == pytest.approx(15 / result["seconds"])
+    assert result["peak_memory_bytes"] is None
+
+
+def test_benchmark_precision() -> None:
+    result = run_benchmark("glass", SCENES["glass"], 6, 4, measure_memory=False, precision="float32")
+    assert result["precision"] == "float32"
+
+
+def test_benchmark_measures_memory() -> None:
+    result = run_benchmark("default_world", SCENES["default_world"], 8, 6, engine="scalar")
+    assert result["peak_memory_bytes"] > 0
+
+
+def result(rays_per_second: float, memory: int | None = 1000, scene: str = "glass") -> dict:
+    return {
+        "scene": scene,
+        "width": 8,
+        "height": 6,
+        "engine": "wavefront",
+        "rays_per_second": rays_per_second,
+        "peak_memory_bytes": memory,
+    }
+
+
+REGRESSION_CASES = (
+    (result(90), result(100), 0),
+    (result(70), result(100), 1),
+    (result(100, 1300), result(100, 1000), 1),
+    (result(100, None), result(100, 1000), 0),
+    (result(10), result(100, scene="deep_group"), 0),
+    ({**result(10), "precision": "float32"}, result(100), 0),
+    ({**result(70), "precision": "float32"}, {**result(100), "precision": "float32"}, 1),
+)
+
+
+@pytest.mark.parametrize(("current", "baseline", "truth"), REGRESSION_CASES)
+def test_find_regressions(current: dict, baseline: dict, truth: int) -> None:
+    assert len(find_regressions([current], [baseline], threshold=0.2)) == truth
+
+
+def test_main_fails_on_regression(tmp_path: Path) -> None:
+    args = ["--scene", "default_world", "--resolution", "6x4", "--no-memory", "--output", str(tmp_path / "run.json")]
+    assert main(args) == 0
+
+    results = json.loads((tmp_path / "run.json").read_text())
+    assert [(r["scene"], r["width"], r["height"]) for r in results] == [("default_world", 6, 4)]
+
+    results[0]["rays_per_second"] *= 1000
+    (tmp_path / "baseline.json").write_text(json.dumps(results))
+    assert main([*args, "--baseline", str(tmp_path / "baseline.json")]) == 1
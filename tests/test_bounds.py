@@ -0,0 +1,119 @@
+import math
+
+import pytest
+
+from raytracer.bounds import EMPTY_BOX, INFINITE_BOX, BoundingBox
+from raytracer.rays import Ray
+from raytracer.shapes import Group, Plane, Sphere
+from raytracer.transforms import rotate_x, rotate_y, scaling, translation
+from raytracer.tuple import point, vector
+
+INF = math.inf
+
+
+def test_empty_box() -> None:
+    assert EMPTY_BOX.is_empty()
+    assert EMPTY_BOX.minimum == point(INF, INF, INF)
+    assert EMPTY_BOX.maximum == point(-INF, -INF, -INF)
+
+
+def test_add_points() -> None:
+    box = EMPTY_BOX.add_point(point(-5, 2, 0)).add_point(point(7, 0, -3))
+
+    assert box.minimum == point(-5, 0, -3)
+    assert box.maximum == point(7, 2, 0)
+
+
+def test_merge() -> None:
+    box1 = BoundingBox(point(-5, -2, 0), point(7, 4, 4))
+    box2 = BoundingBox(point(8, -7, -2), point(14, 2, 8))
+
+    box = box1.merge(box2)
+    assert box.minimum == point(-5, -7, -2)
+    assert box.maximum == point(14, 4, 8)
+
+
+CONTAINS_POINT_CASES = (
+    (point(5, -2, 0), True),
+    (point(11, 4, 7), True),
+    (point(8, 1, 3), True),
+    (point(3, 0, 3), False),
+    (point(8, -4, 3), False),
+    (point(8, 1, -1), False),
+    (point(13, 1, 3), False),
+    (point(8, 5, 3), False),
+    (point(8, 1, 8), False),
+)
+
+
+@pytest.mark.parametrize(("pt", "truth"), CONTAINS_POINT_CASES)
+def test_contains_point(pt, truth: bool) -> None:
+    box = BoundingBox(point(5, -2, 0), point(11, 4, 7))
+    assert box.contains_point(pt) is truth
+
+
+def test_contains_box() -> None:
+    box = BoundingBox(point(5, -2, 0), point(11, 4, 7))
+
+    assert box.contains_box(BoundingBox(point(6, -1, 1), point(10, 3, 6)))
+    assert not box.contains_box(BoundingBox(point(4, -3, -1), point(10, 3, 6)))
+
+
+def test_transform() -> None:
+    box = BoundingBox(point(-1, -1, -1), point(1, 1, 1))
+
+    transformed = box.transform(rotate_x(math.pi / 4) * rotate_y(math.pi / 4))
+    assert transformed.minimum == point(-1.41421, -1.70711, -1.70711)
+    assert transformed.maximum == point(1.41421, 1.70711, 1.70711)
+
+
+def test_transform_infinite() -> None:
+    assert Plane().bounds().transform(translation(1, 2, 3)) == INFINITE_BOX
+
+
+INTERSECTS_CASES = (
+    (point(5, 0.5, 0), vector(-1, 0, 0), True),
+    (point(-5, 0.5, 0), vector(1, 0, 0), True),
+    (point(0.5, 5, 0), vector(0, -1, 0), True),
+    (point(0, 0.5, 0), vector(0, 0, 1), True),
+    (point(-2, 0, 0), vector(2, 4, 6), False),
+    (point(0, -2, 0), vector(6, 2, 4), False),
+    (point(2, 0, 2), vector(0, 0, -1), False),
+    (point(0, 2, 2), vector(0, -1, 0), False),
+    (point(2, 2, 0), vector(-1, 0, 0), False),
+)
+
+
+@pytest.mark.parametrize(("origin", "direction", "truth"), INTERSECTS_CASES)
+def test_intersects(origin, direction, truth: bool) -> None:
+    box = BoundingBox(point(-1, -1, -1), point(1, 1, 1))
+    assert box.intersects(Ray(origin, direction.normalize())) is truth
+
+
+def test_shape_bounds() -> None:
+    assert Sphere().bounds() == BoundingBox(point(-1, -1, -1), point(1, 1, 1))
+    assert not Plane().bounds().is_finite()
+
+    s = Sphere(translation(1, -3, 5) * scaling(0.5, 2, 4))
+    assert s.parent_space_bounds() == BoundingBox(point(0.5, -5, 1), point(1.5, -1, 9))
+
+
+def test_group_bounds() -> None:
+    g = Group()
+    g.add_child(Sphere(translation(2, 5, -3) * scaling(2, 2, 2)))
+    g.add_child(Sphere(translation(-4, -1, 4) * scaling(0.5, 1, 0.5)))
+
+    assert g.bounds() == BoundingBox(point(-4.5, -2, -5), point(4, 7, 4.5))
+
+
+def test_group_bounds_follow_children() -> None:
+    g = Group()
+    s = Sphere()
+    g.add_child(s)
+    assert g.bounds() == BoundingBox(point(-1, -1, -1), point(1, 1, 1))
+
+    s.transform = translation(2, 0, 0)
+    assert g.bounds() == BoundingBox(point(1, -1, -1), point(3, 1, 1))
+
+    g.add_child(Sphere(translation(-2, 0, 0)))
+    assert g.bounds() == BoundingBox(point(-3, -1, -1), point(3, 1, 1))
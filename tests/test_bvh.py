@@ -0,0 +1,220 @@
+import numpy as np
+import pytest
+
+from raytracer.bvh import LEAF_SIZE, BVH, BVHNode, build_index_tree, flatten_index_tree, unflatten_index_tree
+from raytracer.intersections import Intersections
+from raytracer.lights import PointLight
+from raytracer.color import WHITE
+from raytracer.rays import Ray
+from raytracer.shapes import Group, Plane, Shape, Sphere
+from raytracer.transforms import scaling, translation
+from raytracer.tuple import point, vector
+from raytracer.world import World
+
+
+def sphere_cloud(n: int, seed: int = 0) -> list[Shape]:
+    rng = np.random.default_rng(seed)
+    return [
+        Sphere(translation(*rng.uniform(-10, 10, 3)) * scaling(*rng.uniform(0.2, 1, 3)))
+        for _ in range(n)
+    ]
+
+
+def random_rays(n: int, seed: int = 0) -> list[Ray]:
+    rng = np.random.default_rng(seed)
+    return [
+        Ray(point(*rng.uniform(-15, 15, 3)), vector(*rng.normal(size=3)).normalize())
+        for _ in range(n)
+    ]
+
+
+def brute_force(shapes: list[Shape], ray: Ray) -> Intersections:
+    xs = Intersections([])
+    for shape in shapes:
+        xs.extend(shape.intersect(ray))
+    xs.sort()
+    return xs
+
+
+def test_bvh_splits() -> None:
+    bvh = BVH(sphere_cloud(200))
+
+    assert len(bvh) == 200
+    assert bvh.root is not None
+    assert bvh.root.shapes is None
+    assert 1 < bvh.root.depth() < 200 // LEAF_SIZE
+
+
+def test_bvh_small_is_leaf() -> None:
+    bvh = BVH(sphere_cloud(LEAF_SIZE))
+    assert bvh.root.shapes is not None
+
+
+def test_bvh_unbounded() -> None:
+    p = Plane()
+    bvh = BVH([p, Sphere()])
+
+    assert bvh.unbounded == [p]
+    assert [s for s in bvh.candidates(Ray(point(0, 5, 0), vector(1, 0, 0)))] == [p]
+
+
+def test_bvh_coincident_centroids() -> None:
+    shapes = [Sphere(scaling(s, s, s)) for s in range(1, 20)]
+    bvh = BVH(shapes)
+
+    xs = bvh.intersect(Ray(point(0, 0, -50), vector(0, 0, 1)))
+    assert len(xs) == 2 * len(shapes)
+
+
+@pytest.mark.parametrize("ray", random_rays(50))
+def test_bvh_matches_brute_force(ray: Ray) -> None:
+    shapes = sphere_cloud(300) + [Plane(translation(0, -5, 0))]
+    bvh = BVH(shapes)
+
+    truth = brute_force(shapes, ray)
+    xs = bvh.intersect(ray)
+    assert [i.t for i in xs] == pytest.approx([i.t for i in truth])
+
+
+def test_group_uses_bvh() -> None:
+    g = Group(scaling(2, 2, 2))
+    shapes = sphere_cloud(49) + [Sphere()]
+    for s in shapes:
+        g.add_child(s)
+
+    assert len(g.bvh) == 50
+    r = Ray(point(0, 0, -50), vector(0, 0, 1))
+    truth = brute_force([g], r)
+    assert [i.t for i in g.intersect(r)] == pytest.approx([i.t for i in truth])
+    assert len(truth) > 0
+
+
+def test_group_bvh_invalidated() -> None:
+    g = Group()
+    s = Sphere()
+    g.add_child(s)
+    r = Ray(point(5, 0, -5), vector(0, 0, 1))
+    assert len(g.intersect(r)) == 0
+
+    s.transform = translation(5, 0, 0)
+    assert len(g.intersect(r)) == 2
+
+    g.add_child(Sphere(translation(5, 0, 3)))
+    assert len(g.intersect(r)) == 4
+
+    # Swapping a child for another keeps the count the same
+    g.remove_child(s)
+    g.add_child(Sphere(translation(0, 0, 3)))
+    assert len(g.intersect(r)) == 2
+
+
+def test_world_uses_bvh() -> None:
+    shapes = sphere_cloud(100)
+    w = World(PointLight(point(-10, 10, -10), WHITE), shapes[:50])
+    assert len(w.bvh) == 50
+
+    w.objects.extend(shapes[50:])
+    r = Ray(point(0, 0, -50), vector(0, 0, 1))
+    assert [i.t for i in w.intersect_world(r)] == pytest.approx([i.t for i in brute_force(shapes, r)])
+    assert len(w.bvh) == 100
+
+    shapes[0].transform = translation(100, 100, 100)
+    assert [i.t for i in w.intersect_world(r)] == pytest.approx([i.t for i in brute_force(shapes, r)])
+
+
+def nested(shape: Shape, depth: int) -> Group:
+    """Wrap the shape in `depth` transformed groups."""
+    for level in range(depth):
+        group = Group(translation(0.1 * level, 0, 0) * scaling(1.1, 1.1, 1.1))
+        group.add_child(shape)
+        shape = group
+    return shape
+
+
+@pytest.mark.parametrize("ray", random_rays(10, seed=3))
+def test_world_bvh_flattens_groups(ray: Ray) -> None:
+    shapes = sphere_cloud(20)
+    roots = [nested(shape, i % 5) for i, shape in enumerate(shapes)]
+    w = World(PointLight(point(-10, 10, -10), WHITE), roots)
+
+    # Leaves are reached in world space without passing through their groups
+    assert set(w.bvh.shapes) == set(shapes)
+    assert [i.t for i in w.intersect_world(ray)] == pytest.approx([i.t for i in brute_force(roots, ray)])
+    truth = brute_force(roots, ray).hit
+    hit = w.closest_hit(ray)
+    assert (hit is None) is (truth is None)
+    if hit is not None:
+        assert hit.obj is truth.obj
+
+
+def test_group_flat_bvh() -> None:
+    s = Sphere()
+    g = nested(s, 6)
+    r = Ray(point(0, 0, -50), vector(0, 0, 1))
+    assert g.flat_bvh.shapes == [s]
+    assert [i.t for i in g.flat_bvh.intersect(r)] == pytest.approx([i.t for i in g.intersect(r)])
+
+    s.transform = translation(100, 0, 0)
+    assert g.flat_bvh.intersect(r) == []
+
+
+@pytest.mark.parametrize("ray", random_rays(20, seed=1))
+def test_bvh_occluder_matches_brute_force(ray: Ray) -> None:
+    shapes = sphere_cloud(300)
+    bvh = BVH(shapes)
+
+    for distance in (1, 5, 20):
+        truth = any(0 < i.t < distance for i in brute_force(shapes, ray))
+        occluder = bvh.occluder(ray, distance)
+        assert (occluder is not None) is truth
+        if occluder is not None:
+            assert any(0 < i.t < distance for i in occluder.intersect(ray))
+
+
+@pytest.mark.parametrize("ray", random_rays(30, seed=2))
+def test_bvh_closest_hit_matches_brute_force(ray: Ray) -> None:
+    shapes = sphere_cloud(300) + [Plane(translation(0, -5, 0))]
+    bvh = BVH(shapes)
+
+    truth = brute_force(shapes, ray).hit
+    hit = bvh.closest_hit(ray)
+    if truth is None:
+        assert hit is None
+    else:
+        assert hit.t == pytest.approx(truth.t)
+        assert hit.obj is truth.obj
+
+
+def test_bvh_closest_hit_t_max() -> None:
+    bvh = BVH([Sphere(translation(0, 0, z)) for z in (0, 5, 10)])
+    r = Ray(point(0, 0, -5), vector(0, 0, 1))
+
+    assert bvh.closest_hit(r).t == pytest.approx(4)
+    assert bvh.closest_hit(r, t_max=4) is None
+
+
+def leaf_sets(node: BVHNode) -> list[tuple[tuple[float, ...], tuple[float, ...], list[int]]]:
+    if node.shapes is not None:
+        return [(node.lo, node.hi, node.shapes.tolist())]
+    return [(node.lo, node.hi, [])] + leaf_sets(node.left) + leaf_sets(node.right)
+
+
+def test_index_tree_leaves_hold_indices() -> None:
+    rng = np.random.default_rng(0)
+    mins = rng.uniform(-10, 10, (100, 3))
+    root = build_index_tree(mins, mins + 0.5, leaf_size=8)
+
+    leaves = [idx for _, _, idx in leaf_sets(root) if idx]
+    assert sorted(i for idx in leaves for i in idx) == list(range(100))
+    assert max(len(idx) for idx in leaves) <= 8
+    assert build_index_tree(np.zeros((0, 3)), np.zeros((0, 3))) is None
+
+
+def test_flatten_index_tree_round_trips() -> None:
+    rng = np.random.default_rng(1)
+    mins = rng.uniform(-10, 10, (100, 3))
+    root = build_index_tree(mins, mins + 0.5, leaf_size=8)
+
+    arrays = flatten_index_tree(root)
+    assert leaf_sets(unflatten_index_tree(**arrays)) == leaf_sets(root)
+    assert unflatten_index_tree(**flatten_index_tree(None)) is None
@@ -1,10 +1,14 @@
+from itertools import product
 from math import pi, sqrt
+from pathlib import Path
 
+import numpy as np
 import pytest
 
 from raytracer import NUMERIC_T
 from raytracer.camera import Camera
-from raytracer.tuple import point, vector
+from raytracer.canvas import Canvas
+from raytracer.tuple import Tuple, point, vector
 from raytracer.color import Color
 from raytracer.rays import Ray
 from raytracer.transforms import Matrix, rotate_y, translation, view_transform
@@ -51,3 +55,103 @@ def test_render() -> None:
 
     img = c.render(w)
     assert img.pixel_at(5, 5) == Color(0.38066, 0.47583, 0.2855)
+
+
+def test_render_inverts_each_transform_once() -> None:
+    w = World.default_world()
+    trans = view_transform(point(0, 0, -5), point(0, 0, 0), vector(0, 1, 0))
+    c = Camera(11, 11, pi / 2, transform=trans)
+
+    Matrix.reset_inversions()
+    c.render(w)
+    # One inversion for the camera and one per sphere
+    assert Matrix.inversions == 3
+
+
+@pytest.mark.parametrize(("transform", "x", "y", "truth_ray"), RAY_FOR_PIXEL_CASES)
+def test_rays_for_pixels(transform: Matrix, x: int, y: int, truth_ray: Ray) -> None:
+    c = Camera(201, 101, pi / 2, transform=transform)
+    origins, directions = c.rays_for_pixels([x], [y])
+
+    assert origins.shape == directions.shape == (1, 4)
+    assert Tuple.from_array(origins[0]) == truth_ray.origin
+    assert Tuple.from_array(directions[0]) == truth_ray.direction
+
+
+def test_rays_for_tile_matches_ray_for_pixel() -> None:
+    trans = view_transform(point(0, 1.5, -5), point(0, 1, 0), vector(0, 1, 0))
+    c = Camera(20, 10, pi / 3, transform=trans)
+    origins, directions = c.rays_for_tile(3, 2, 8, 6)
+
+    assert origins.shape == directions.shape == (20, 4)
+    for i, (y, x) in enumerate(product(range(2, 6), range(3, 8))):
+        r = c.ray_for_pixel(x, y)
+        np.testing.assert_allclose(origins[i], r.origin.as_array(), atol=1e-12)
+        np.testing.assert_allclose(directions[i], r.direction.as_array(), atol=1e-12)
+
+
+def test_rays_for_image() -> None:
+    c = Camera(4, 3, pi / 2)
+    origins, directions = c.rays_for_image()
+
+    assert origins.shape == directions.shape == (12, 4)
+    assert (origins[:, 3] == 1).all()
+    assert (directions[:, 3] == 0).all()
+    np.testing.assert_allclose(np.linalg.norm(directions, axis=1), 1)
+
+
+def test_rays_for_pixels_mismatched_raises() -> None:
+    c = Camera(4, 3, pi / 2)
+    with pytest.raises(ValueError):
+        c.rays_for_pixels([0, 1], [0])
+
+
+def test_tiles_cover_render_area() -> None:
+    c = Camera(11, 7, pi / 2)
+    tiles = c.tiles(4)
+
+    covered = np.zeros((6, 10), dtype=int)
+    for x0, y0, x1, y1 in tiles:
+        covered[y0:y1, x0:x1] += 1
+    assert (covered == 1).all()
+
+
+@pytest.mark.parametrize("engine", ("scalar", "wavefront"))
+def test_render_parallel_matches_serial(engine: str, tmp_path: Path) -> None:
+    w = World.default_world()
+    trans = view_transform(point(0, 0, -5), point(0, 0, 0), vector(0, 1, 0))
+    c = Camera(13, 9, pi / 2, transform=trans)
+
+    serial = c.render(w, engine=engine)
+    parallel = c.render(w, engine=engine, workers=2, tile_size=4)
+    np.testing.assert_array_equal(parallel._pixels, serial._pixels)
+
+    serial.to_file(tmp_path / "serial.ppm")
+    parallel.to_file(tmp_path / "parallel.ppm")
+    assert (tmp_path / "serial.ppm").read_bytes() == (tmp_path / "parallel.ppm").read_bytes()
+
+
+@pytest.mark.parametrize(("workers", "tile_size"), ((0, 4), (2, 0)))
+def test_render_invalid_parallel_params_raise(workers: int, tile_size: int) -> None:
+    c = Camera(13, 9, pi / 2)
+    with pytest.raises(ValueError):
+        c.render(World.default_world(), workers=workers, tile_size=tile_size)
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_render_into_memmap_canvas(workers: int, tmp_path: Path) -> None:
+    w = World.default_world()
+    trans = view_transform(point(0, 0, -5), point(0, 0, 0), vector(0, 1, 0))
+    c = Camera(13, 9, pi / 2, transform=trans)
+
+    canvas = Canvas.memmap(tmp_path / "pixels.npy", 13, 9)
+    assert c.render(w, engine="wavefront", workers=workers, tile_size=4, canvas=canvas) is canvas
+
+    truth = c.render(w, engine="wavefront")
+    np.testing.assert_allclose(Canvas.open(tmp_path / "pixels.npy")._pixels, truth._pixels, rtol=1e-6)
+
+
+def test_render_into_mismatched_canvas_raises() -> None:
+    c = Camera(13, 9, pi / 2)
+    with pytest.raises(ValueError):
+        c.render(World.default_world(), canvas=Canvas(9, 13))
@@ -1,7 +1,11 @@
 from raytracer.canvas import Canvas, _build_ppm_header
 from raytracer.tuple import point
 from raytracer.color import Color
+import numpy as np
+import pickle
 import pytest
+import struct
+import zlib
 from pathlib import Path
 from textwrap import dedent
 
@@ -60,3 +64,159 @@ def test_ppm_write(tmp_path: Path) -> None:
         """
     )
     assert out_img.read_text() == truth
+
+
+@pytest.fixture
+def sample_canvas() -> Canvas:
+    c = Canvas(5, 3)
+    c.write_pixel(0, 0, Color(1.5, 0, 0))
+    c.write_pixel(2, 1, Color(0, 0.5, 0))
+    c.write_pixel(4, 2, Color(-0.5, 0, 1))
+    return c
+
+
+SAMPLE_BYTES = np.zeros((3, 5, 3), dtype=np.uint8)
+SAMPLE_BYTES[0, 0] = (255, 0, 0)
+SAMPLE_BYTES[1, 2] = (0, 127, 0)
+SAMPLE_BYTES[2, 4] = (0, 0, 255)
+
+
+def test_p6_write(tmp_path: Path, sample_canvas: Canvas) -> None:
+    out_img = tmp_path / "my_img.pnm"
+    sample_canvas.to_file(out_img)
+
+    data = out_img.read_bytes()
+    header = b"P6\n5 3\n255\n"
+    assert data.startswith(header)
+    assert data[len(header):] == SAMPLE_BYTES.tobytes()
+
+
+def test_p6_explicit_format(tmp_path: Path, sample_canvas: Canvas) -> None:
+    out_img = tmp_path / "my_img.ppm"
+    sample_canvas.to_file(out_img, fmt="p6")
+    assert out_img.read_bytes().startswith(b"P6\n")
+
+
+def read_png_chunks(data: bytes) -> list[tuple[bytes, bytes]]:
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    chunks = []
+    pos = 8
+    while pos < len(data):
+        (length,) = struct.unpack(">I", data[pos:pos + 4])
+        chunk_type = data[pos + 4:pos + 8]
+        chunk = data[pos + 8:pos + 8 + length]
+        (crc,) = struct.unpack(">I", data[pos + 8 + length:pos + 12 + length])
+        assert crc == zlib.crc32(chunk_type + chunk)
+        chunks.append((chunk_type, chunk))
+        pos += 12 + length
+
+    return chunks
+
+
+def test_png_write(tmp_path: Path, sample_canvas: Canvas) -> None:
+    out_img = tmp_path / "my_img.png"
+    sample_canvas.to_file(out_img)
+
+    chunks = read_png_chunks(out_img.read_bytes())
+    assert [chunk_type for chunk_type, _ in chunks] == [b"IHDR", b"IDAT", b"IEND"]
+    assert struct.unpack(">IIBBBBB", chunks[0][1]) == (5, 3, 8, 2, 0, 0, 0)
+
+    scanlines = np.frombuffer(zlib.decompress(chunks[1][1]), dtype=np.uint8).reshape(3, 16)
+    assert (scanlines[:, 0] == 0).all()
+    np.testing.assert_array_equal(scanlines[:, 1:].reshape(3, 5, 3), SAMPLE_BYTES)
+
+
+def test_pfm_write(tmp_path: Path, sample_canvas: Canvas) -> None:
+    out_img = tmp_path / "my_img.pfm"
+    sample_canvas.to_file(out_img)
+
+    data = out_img.read_bytes()
+    header = b"PF\n5 3\n-1.0\n"
+    assert data.startswith(header)
+
+    # Rows are stored bottom to top and values aren't clamped
+    pixels = np.frombuffer(data[len(header):], dtype="<f4").reshape(3, 5, 3)[::-1]
+    np.testing.assert_allclose(pixels, sample_canvas._pixels)
+    assert pixels[0, 0, 0] == 1.5
+
+
+def test_unknown_format_raises(tmp_path: Path, sample_canvas: Canvas) -> None:
+    with pytest.raises(ValueError):
+        sample_canvas.to_file(tmp_path / "my_img.jpg")
+    with pytest.raises(ValueError):
+        sample_canvas.to_file(tmp_path / "my_img.ppm", fmt="jpg")
+
+
+@pytest.mark.parametrize("dtype", (np.float32, np.float16))
+def test_canvas_dtype(dtype: type) -> None:
+    c = Canvas(4, 3, dtype=dtype)
+    c.write_pixel(1, 2, Color(0.5, 0.25, 1))
+
+    assert c.dtype == dtype
+    assert c.pixel_at(1, 2) == Color(0.5, 0.25, 1)
+
+
+def test_memmap_canvas(tmp_path: Path) -> None:
+    c = Canvas.memmap(tmp_path / "pixels.npy", 5, 3, dtype=np.float16)
+    c.write_pixel(4, 2, Color(1, 0.5, 0))
+    c.flush()
+
+    assert c.dtype == np.float16
+    assert c.pixel_at(4, 2) == Color(1, 0.5, 0)
+    reopened = Canvas.open(tmp_path / "pixels.npy")
+    assert (reopened.width, reopened.height) == (5, 3)
+    assert reopened.pixel_at(4, 2) == Color(1, 0.5, 0)
+
+
+def test_memmap_canvas_pickles_path(tmp_path: Path) -> None:
+    c = Canvas.memmap(tmp_path / "pixels.npy", 400, 300)
+    data = pickle.dumps(c)
+    assert len(data) < 1000
+
+    # The unpickled canvas writes into the same file
+    copy = pickle.loads(data)
+    copy.write_pixel(3, 2, Color(0, 1, 0))
+    copy.flush()
+    assert Canvas.open(tmp_path / "pixels.npy").pixel_at(3, 2) == Color(0, 1, 0)
+
+
+def test_memmap_canvas_to_file(tmp_path: Path, sample_canvas: Canvas) -> None:
+    c = Canvas.memmap(tmp_path / "pixels.npy", 5, 3)
+    c._pixels[:] = sample_canvas._pixels
+
+    c.to_file(tmp_path / "mapped.ppm")
+    sample_canvas.to_file(tmp_path / "memory.ppm")
+    assert (tmp_path / "mapped.ppm").read_bytes() == (tmp_path / "memory.ppm").read_bytes()
+
+
+def test_write_and_read_block() -> None:
+    c = Canvas(10, 20)
+    block = np.random.default_rng(0).uniform(0, 1, (4, 3, 3))
+
+    c.write_block(2, 5, block)
+    np.testing.assert_array_equal(c.read_block(2, 5, 3, 4), block)
+    assert c.pixel_at(4, 8) == Color(*block[3, 2])
+    assert c.pixel_at(5, 8) == Color(0, 0, 0)
+
+    # Reads are copies
+    c.read_block(2, 5, 3, 4)[:] = 0
+    np.testing.assert_array_equal(c.read_block(2, 5, 3, 4), block)
+
+
+BAD_BLOCKS = (
+    (8, 0, np.zeros((1, 3, 3))),
+    (0, -1, np.zeros((1, 1, 3))),
+    (0, 0, np.zeros((2, 2))),
+    (0, 0, np.zeros((2, 2, 4))),
+)
+
+
+@pytest.mark.parametrize(("x0", "y0", "block"), BAD_BLOCKS)
+def test_write_block_out_of_bounds_raises(x0: int, y0: int, block: np.ndarray) -> None:
+    with pytest.raises(ValueError):
+        Canvas(10, 20).write_block(x0, y0, block)
+
+
+def test_read_block_out_of_bounds_raises() -> None:
+    with pytest.raises(ValueError):
+        Canvas(10, 20).read_block(5, 18, 5, 3)
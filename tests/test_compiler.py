@@ -0,0 +1,236 @@
+from math import pi
+
+import numpy as np
+import pytest
+
+from raytracer import precision, render_stats
+from raytracer.camera import Camera
+from raytracer.color import WHITE
+from raytracer.compiler import compile_world
+from raytracer.intersections import hit_batch
+from raytracer.lights import PointLight, lighting_batch
+from raytracer.materials import Material
+from raytracer.rays import Ray
+from raytracer.shapes import Instance, Plane, Sphere
+from raytracer.transforms import scaling, translation, view_transform
+from raytracer.tuple import Tuple, point, vector
+from raytracer.wavefront import trace
+from raytracer.world import World
+from tests.scenes import Ellipsoid, mixed_world, random_rays, sphere_mesh
+
+
+def brute_force(world: World, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+    """(N, objects) hit times of each ray on each of the world's objects, through their own methods."""
+    return np.stack([
+        hit_batch(obj._local_intersect_batch(
+            obj.world_to_object_batch(origins), obj.world_to_object_batch(directions)
+        ))[0]
+        for obj in world.objects
+    ], axis=1)
+
+
+def test_compile_tables() -> None:
+    world = mixed_world()
+    scene = compile_world(world)
+
+    # 1 plane, 1 sphere, 1 triangle, a mesh, an instance and 1 shape without a kernel
+    assert [type(table).__name__ for table in scene.root.tables] == [
+        "_SphereTable", "_PlaneTable", "_TriangleTable", "_NestedTable", "_NestedTable", "_GenericTable"
+    ]
+    sphere_table, plane_table, triangle_table, mesh_table, instance_table, generic_table = scene.root.tables
+    assert isinstance(sphere_table.shape(0), Sphere)
+    assert isinstance(generic_table.shape(0), Ellipsoid)
+    faces = scene.faces(world.objects[2]).tables[0]
+    assert faces.mesh is world.objects[2] and len(faces) == 192
+    # The instanced mesh is compiled on its own, and both meshes' faces once each
+    assert instance_table.geometries == [scene.geometry(world.objects[3].shape)]
+    assert len(scene) == 6 + 1 + 192 * 2
+
+    # The plane and sphere share their pattern
+    assert len(scene.patterns) == 1
+    assert scene.pattern_id[sphere_table.material[0]] == scene.pattern_id[plane_table.material[0]] == 0
+    assert scene.shininess[sphere_table.material[0]] == 50
+    assert scene.reflective[plane_table.material[0]] == 0.4
+    assert scene.refractive_index[generic_table.material[0]] == 1.3
+    assert (scene.pattern_id[triangle_table.material] == -1).all()
+    assert (scene.pattern_id[faces.material] == -1).all()
+    # The instance overrides the material of the shapes in it
+    assert mesh_table.material[0] == -1
+    assert scene.ambient[instance_table.material[0]] == 0.5
+    assert len(scene.materials) == 5
+
+    # Every surface gets a key of its own, with each mesh's faces numbered within it
+    keys = np.concatenate([table.keys for table in scene.root.tables])
+    assert len(np.unique(keys)) == len(keys)
+    assert scene.root.surfaces == 388
+    assert instance_table.keys[0] - mesh_table.keys[0] == 192
+    np.testing.assert_array_equal(faces.keys, np.arange(192))
+
+
+def test_compile_meshes_without_triangles() -> None:
+    world = mixed_world()
+    mesh = world.objects[2]
+    scene = compile_world(world)
+    origins, directions = random_rays(400, seed=2)
+    origins[:, :3] *= 0.5
+
+    hits = scene.closest(origins, directions)
+    hits = hits[np.isfinite(hits.t)]
+    assert (hits.table == scene.faces(mesh).tables[0].id).any()
+    scene.normals(hits, origins[hits.ray] + directions[hits.ray] * hits.t[:, np.newaxis])
+    assert mesh._triangles == {}
+
+
+def test_compiled_scene_is_reused() -> None:
+    world = mixed_world()
+    scene = compile_world(world)
+    assert compile_world(world) is scene
+    assert compile_world(world, "float32") is not scene
+
+    # Moving, replacing or restyling a shape compiles the world again
+    scene = compile_world(world)
+    world.objects[0].transform = translation(0, -3, 0)
+    moved = compile_world(world)
+    assert moved is not scene
+    world.objects[4].material = Material(ambient=0.3)
+    restyled = compile_world(world)
+    assert restyled is not moved
+    assert restyled.ambient[restyled.tables[-1].material[0]] == 0.3
+    world.objects[1] = Sphere()
+    assert compile_world(world) is not restyled
+
+
+def test_compile_empty_world() -> None:
+    scene = compile_world(World(PointLight(point(0, 0, 0), WHITE), []))
+    origins, directions = random_rays(5)
+
+    assert np.isinf(scene.closest(origins, directions).t).all()
+    assert not scene.occluded(origins, directions, np.ones(5)).any()
+
+
+def test_compile_instances_once() -> None:
+    mesh = sphere_mesh(smooth=True)
+    glass = Material(transparency=0.8, refractive_index=1.5)
+    instances = [
+        Instance(translation(x, y, 0) * scaling(0.4, 0.4, 0.4), shape=mesh, material_override=glass if x == y else None)
+        for x in range(-3, 4) for y in range(-3, 4)
+    ]
+    world = World(PointLight(point(-10, 10, -10), WHITE), [Plane(translation(0, 0, 2)), *instances])
+    scene = compile_world(world)
+    assert len(scene) == 1 + 49 + 1 + len(mesh)
+
+    c = Camera(24, 24, pi / 2, view_transform(point(0, 0, -5), point(0, 0, 0), vector(0, 1, 0)))
+    scalar = c.render(world)
+    wavefront = c.render(world, engine="wavefront")
+    np.testing.assert_allclose(wavefront._pixels, scalar._pixels, atol=1e-9)
+
+
+def test_compiled_hits_map_back_to_shapes() -> None:
+    world = mixed_world()
+    scene = compile_world(world)
+    origins, directions = random_rays(400, seed=2)
+    origins[:, :3] *= 0.5
+
+    hits = scene.closest(origins, directions)
+    assert np.isfinite(hits.t).sum() > 100
+    np.testing.assert_allclose(hits.t, brute_force(world, origins, directions).min(axis=1))
+
+    hit = np.isfinite(hits.t)
+    hits = hits[hit]
+    points = origins[hit] + directions[hit] * hits.t[:, np.newaxis]
+    normals = scene.normals(hits, points)
+    for o, d, point_, normal in zip(origins[hit], directions[hit], points, normals):
+        truth = world.closest_hit(Ray(Tuple.from_array(o), Tuple.from_array(d)))
+        np.testing.assert_allclose(normal, truth.obj.normal_at(Tuple.from_array(point_), truth).as_array(), atol=1e-9)
+
+
+@pytest.mark.parametrize("distance", (0.5, 2, 10))
+def test_compiled_occluded_matches_brute_force(distance: float) -> None:
+    world = mixed_world()
+    scene = compile_world(world)
+    origins, directions = random_rays(400, seed=3)
+
+    truth = (brute_force(world, origins, directions) < distance).any(axis=1)
+    np.testing.assert_array_equal(scene.occluded(origins, directions, np.full(400, distance)), truth)
+
+
+def test_compiled_queries_cull_shapes() -> None:
+    spheres = [Sphere(translation(x, y, 0) * scaling(0.4, 0.4, 0.4)) for x in range(-10, 10) for y in range(-10, 10)]
+    scene = compile_world(World(PointLight(point(0, 0, -10), WHITE), spheres))
+    origins, directions = random_rays(200, seed=4)
+
+    with render_stats.collecting() as stats:
+        scene.closest(origins, directions)
+    assert 0 < stats.local_intersects < len(origins) * len(scene) / 10
+
+
+@pytest.mark.parametrize("in_shadow", (False, True))
+def test_compiled_shade_matches_lighting(in_shadow: bool) -> None:
+    world = mixed_world()
+    scene = compile_world(world)
+    origins, directions = random_rays(400, seed=2)
+    origins[:, :3] *= 0.5
+    hits = scene.closest(origins, directions)
+    hits = hits[np.isfinite(hits.t)][:20]
+
+    rng = np.random.default_rng(0)
+    points = np.ones((len(hits), 4))
+    points[:, :3] = rng.uniform(-1, 1, (len(hits), 3))
+    eye_v = np.zeros((len(hits), 4))
+    eye_v[:, :3] = rng.normal(size=(len(hits), 3))
+    normals = -eye_v / np.linalg.norm(eye_v, axis=1)[:, np.newaxis]
+    shadowed = np.full(len(hits), in_shadow)
+
+    colors = scene.shade(world.light, hits, points, eye_v, normals, shadowed)
+    for j, (table, row, material) in enumerate(zip(hits.table, hits.row, hits.material)):
+        shape = scene.tables[table].shape(row)
+        truth = lighting_batch(
+            scene.materials[material], shape, world.light,
+            points[j:j + 1], eye_v[j:j + 1], normals[j:j + 1], shadowed[j:j + 1],
+        )
+        np.testing.assert_allclose(colors[j], truth[0])
+
+
+def test_render_mixed_world_matches_scalar() -> None:
+    world = mixed_world()
+    c = Camera(16, 12, pi / 2, view_transform(point(0, 1, -6), point(0, 0, 0), vector(0, 1, 0)))
+
+    scalar = c.render(world)
+    wavefront = c.render(world, engine="wavefront")
+    np.testing.assert_allclose(wavefront._pixels, scalar._pixels, atol=1e-9)
+
+
+def test_compile_float32_tables() -> None:
+    world = mixed_world()
+    scene = compile_world(world, "float32")
+
+    assert scene.dtype == np.float32
+    assert scene.epsilon == precision.epsilon("float32")
+    assert scene.color.dtype == scene.refractive_index.dtype == np.float32
+    assert all(table.inverse.dtype == np.float32 for table in scene.root.tables)
+    assert all(table.p1.dtype == np.float32 for table in scene.tables if hasattr(table, "mesh"))
+    no_rays = np.zeros((0, 4), dtype=np.float32)
+    assert scene.closest(no_rays, no_rays).t.dtype == np.float32
+
+    origins, directions = random_rays(64, seed=5)
+    colors = trace(world, origins, directions, scene=scene)
+    assert colors.dtype == np.float32
+    # Float32 offsets grow with the hit distance, which can move a reflected ray across a stripe's edge
+    close = np.isclose(colors, trace(world, origins, directions), atol=1e-3).all(axis=1)
+    assert close.mean() > 0.95
+
+
+def test_render_float32() -> None:
+    world = mixed_world()
+    c = Camera(16, 12, pi / 2, view_transform(point(0, 1, -6), point(0, 0, 0), vector(0, 1, 0)))
+
+    full = c.render(world, engine="wavefront")
+    single = c.render(world, engine="wavefront", precision="float32")
+    assert single.dtype == np.float32
+    assert precision.active == np.float64
+    close = np.isclose(single._pixels, full._pixels, atol=1e-3).all(axis=-1)
+    assert close.mean() > 0.95
+    np.testing.assert_allclose(single._pixels, full._pixels, atol=1e-2)
+
+    with pytest.raises(ValueError):
+        c.render(world, engine="wavefront", precision="float16")
@@ -1,5 +1,8 @@
+import numpy as np
 import pytest
-from raytracer.intersections import Intersection, Intersections, IntersectionComp, prepare_computation, schlick
+from raytracer.intersections import (
+    Intersection, Intersections, IntersectionComp, hit_batch, prepare_computation, schlick, schlick_batch
+)
 from raytracer import EPSILON
 import math
 from raytracer.materials import Material
@@ -189,3 +192,25 @@ def test_total_internal_reflection_schlick_small_angle() -> None:
     comps = prepare_computation(inters[0], r, inters)
     # Truth reflectance tweaked from textbook to lazily fix floating point issues
     assert schlick(comps) == pytest.approx(0.4887308)
+
+
+def test_hit_batch() -> None:
+    ts = np.array([[1, 2], [-1, 1], [-2, -1], [np.inf, np.inf]])
+    nearest, mask = hit_batch(ts)
+
+    np.testing.assert_array_equal(nearest, [1, 1, np.inf, np.inf])
+    np.testing.assert_array_equal(mask, [True, True, False, False])
+
+
+@pytest.mark.parametrize("idx", range(6))
+def test_schlick_batch(idx: int, refraction_scenario: Intersections) -> None:
+    r = Ray(point(0, 0.5, -4), vector(0, 0.1, 1))
+    comps = prepare_computation(inter=refraction_scenario[idx], ray=r, all_inters=refraction_scenario)
+
+    reflectance = schlick_batch(
+        np.array([comps.eye_v.as_array()]),
+        np.array([comps.normal.as_array()]),
+        np.array([comps.n1]),
+        np.array([comps.n2]),
+    )
+    assert reflectance[0] == pytest.approx(schlick(comps))
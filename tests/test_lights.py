@@ -1,10 +1,11 @@
 import math
 from functools import partial
 
+import numpy as np
 import pytest
 
 from raytracer.color import BLACK, WHITE, Color
-from raytracer.lights import PointLight, lighting
+from raytracer.lights import PointLight, lighting, lighting_batch
 from raytracer.materials import Material
 from raytracer.patterns import Stripe
 from raytracer.tuple import Tuple, TupleType, point, vector
@@ -98,3 +99,34 @@ def test_lighting_with_pattern() -> None:
         material=m, obj=obj, light=light, surf_pos=point(1.1, 0, 0), eye_v=eye_v, normal=normal
     )
     assert c2 == BLACK
+
+
+@pytest.mark.parametrize("in_shadow", (False, True))
+@pytest.mark.parametrize(("eye_v", "light", "truth_lit"), ILLUMINATION_TEST_CASES)
+def test_lighting_batch(eye_v: Tuple, light: PointLight, truth_lit: Tuple, in_shadow: bool) -> None:
+    lit = lighting_batch(
+        material=BASE_MATERIAL,
+        obj=DUMMY_SHAPE,
+        light=light,
+        surf_pos=np.array([BASE_POSITION.as_array()]),
+        eye_v=np.array([eye_v.as_array()]),
+        normal=np.array([BASE_NORM.as_array()]),
+        in_shadow=np.array([in_shadow]),
+    )
+
+    truth = LIGHTING_P(light=light, eye_v=eye_v, in_shadow=in_shadow)
+    assert Color(*lit[0]) == truth
+
+
+def test_lighting_batch_with_pattern() -> None:
+    m = Material(pattern=Stripe(), ambient=1, diffuse=0, specular=0)
+    lit = lighting_batch(
+        material=m,
+        obj=Sphere(),
+        light=PointLight(point(0, 0, -10), WHITE),
+        surf_pos=np.array([[0.9, 0, 0, 1], [1.1, 0, 0, 1]]),
+        eye_v=np.array([[0, 0, -1, 0]] * 2, dtype=float),
+        normal=np.array([[0, 0, -1, 0]] * 2, dtype=float),
+    )
+
+    np.testing.assert_allclose(lit, [[1, 1, 1], [0, 0, 0]])
@@ -1,6 +1,11 @@
-from raytracer.matrix import Matrix
-from raytracer.tuple import Tuple
+from raytracer.matrix import Affine, Matrix
+from raytracer.patterns import Stripe
+from raytracer.shapes import Sphere
+from raytracer.transforms import rotate, scaling, translation
+from raytracer.tuple_array import Points, Vectors
+from raytracer.tuple import Tuple, TupleType, point, vector
 import numpy as np
+import pytest
 
 
 def test_equity():
@@ -48,3 +53,126 @@ def test_matrix_inverse():
                               -0.07895, -0.22368, -0.05263, 0.19737,
                               -0.52256, -0.81391, -0.30075, 0.30639]).reshape([4, 4]))
     assert a.inverse() == result
+
+
+def test_inverse_counter():
+    Matrix.reset_inversions()
+    a = Matrix.identity()
+    a.inverse()
+    a.inverse()
+
+    assert Matrix.reset_inversions() == 2
+    assert Matrix.inversions == 0
+
+
+def test_transformable_caches_inverse():
+    s = Sphere(transform=translation(1, 2, 3))
+    Matrix.reset_inversions()
+
+    for _ in range(3):
+        assert s.inverse == translation(-1, -2, -3)
+        assert s.inverse_transpose == translation(-1, -2, -3).transpose()
+
+    assert Matrix.inversions == 1
+
+
+def test_transformable_invalidates_on_reassignment():
+    s = Sphere(transform=translation(1, 2, 3))
+    assert s.inverse == translation(-1, -2, -3)
+
+    s.transform = scaling(2, 2, 2)
+    assert s.inverse == scaling(0.5, 0.5, 0.5)
+    assert s.inverse_transpose == scaling(0.5, 0.5, 0.5)
+
+
+def test_transformable_frozen_pattern():
+    p = Stripe(transform=scaling(2, 2, 2))
+    assert p.inverse == scaling(0.5, 0.5, 0.5)
+    assert p == Stripe(transform=scaling(2, 2, 2))
+
+
+def random_affine(rng: np.random.Generator) -> Affine:
+    return translation(*rng.uniform(-5, 5, 3)) * rotate(*rng.uniform(-3, 3, 3)) * scaling(*rng.uniform(0.5, 2, 3))
+
+
+def test_affine_inverse_matches_generic():
+    rng = np.random.default_rng(7)
+    for _ in range(20):
+        m = random_affine(rng)
+        inverse = m.inverse()
+
+        assert isinstance(inverse, Affine)
+        np.testing.assert_allclose(inverse.matrix, np.linalg.inv(m.matrix), atol=1e-12)
+        np.testing.assert_allclose(inverse.linear_transpose().matrix[:3, :3], inverse.matrix[:3, :3].T, atol=1e-12)
+
+
+def test_affine_singular():
+    with pytest.raises(np.linalg.LinAlgError):
+        scaling(1, 0, 1).inverse()
+
+
+def test_affine_matches_generic_matrix():
+    rng = np.random.default_rng(3)
+    a, b = random_affine(rng), random_affine(rng)
+    generic_a, generic_b = Matrix(a.matrix.copy()), Matrix(b.matrix.copy())
+    p, v = point(1, -2, 3), vector(0.5, 0.25, -1)
+
+    assert a == generic_a and generic_a == a
+    assert isinstance(a * b, Affine)
+    assert a * b == generic_a * generic_b
+    assert type(generic_a * b) is Matrix and generic_a * b == a * b
+    assert a * p == generic_a * p
+    assert a * v == generic_a * v
+    assert (a * v).w == TupleType.VECTOR
+    assert Affine(a.matrix.copy()).rows == a.rows
+
+
+def test_identity_is_affine():
+    assert isinstance(Matrix.identity(), Affine)
+    assert Matrix.identity() == Matrix(np.identity(4))
+
+
+def test_matrix_transforms_batches():
+    m = translation(1, 2, 3) * rotate(0.5, 0.2, -0.4) * scaling(2, 1, 0.5)
+    points = [point(1, -2, 3), point(0, 0, 0), point(-4, 5, 0.5)]
+    vectors = [vector(0, 1, 0), vector(2, -1, 0.25)]
+
+    assert (m * Points.from_tuples(points)).to_tuples() == [m * p for p in points]
+    assert isinstance(m * Vectors.from_tuples(vectors), Vectors)
+    assert (m * Vectors.from_tuples(vectors)).to_tuples() == [m * v for v in vectors]
+
+    array = np.array([tup.as_array() for tup in points + vectors])
+    for matrix in (m, Matrix(m.matrix.copy())):
+        transformed = matrix * array
+        assert [Tuple.from_array(row) for row in transformed] == [m * tup for tup in points + vectors]
+
+
+def test_matrix_batch_bad_shape_raises():
+    with pytest.raises(ValueError):
+        translation(1, 2, 3) * np.zeros((5, 3))
+
+
+def test_linear_transpose_agrees_with_affine():
+    rng = np.random.default_rng(11)
+    m = random_affine(rng)
+    generic = Matrix(m.matrix.copy()).linear_transpose()
+
+    assert isinstance(generic, Affine)
+    np.testing.assert_allclose(generic.matrix, m.linear_transpose().matrix, atol=1e-12)
+    np.testing.assert_array_equal(generic.matrix[3], [0, 0, 0, 1])
+    assert (generic * vector(1, 2, 3)).w == 0
+
+
+def test_affine_rows_never_go_stale():
+    m = translation(1, 2, 3)
+    assert m.rows[3] == 1
+    with pytest.raises(ValueError):
+        m.matrix[0, 3] = 5
+
+    m.matrix = scaling(2, 2, 2).matrix
+    assert m * point(1, 1, 1) == point(2, 2, 2)
+
+    # The caller's array is copied rather than locked
+    array = np.eye(4)
+    Affine(array)
+    array[0, 3] = 1
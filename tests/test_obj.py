@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pytest
+
+from raytracer import obj
+from raytracer.materials import Material
+from raytracer.obj import cache_path_for, load_obj, parse_obj
+from raytracer.rays import Ray
+from raytracer.shapes import SmoothTriangle, Triangle
+from raytracer.tuple import point, vector
+
+VERTICES = ["v -1 1 0", "v -1 0 0", "v 1 0 0", "v 1 1 0"]
+
+
+def test_parse_ignores_unrecognized_lines() -> None:
+    mesh = parse_obj(["There was a young lady named Bright", "# who traveled much faster than light", "", "g Group"])
+    assert len(mesh) == 0
+    assert len(mesh.vertices) == 0
+
+
+def test_parse_vertices_and_faces() -> None:
+    mesh = parse_obj(VERTICES + ["", "f 1 2 3", "f 1 3 4"])
+    np.testing.assert_array_equal(mesh.vertices, [[-1, 1, 0], [-1, 0, 0], [1, 0, 0], [1, 1, 0]])
+    np.testing.assert_array_equal(mesh.faces, [[0, 1, 2], [0, 2, 3]])
+
+    tri = mesh.triangle(1)
+    assert isinstance(tri, Triangle)
+    assert (tri.p1, tri.p2, tri.p3) == (point(-1, 1, 0), point(1, 0, 0), point(1, 1, 0))
+
+
+def test_parse_triangulates_polygons() -> None:
+    mesh = parse_obj(VERTICES + ["v 0 2 0", "f 1 2 3 4 5"])
+    np.testing.assert_array_equal(mesh.faces, [[0, 1, 2], [0, 2, 3], [0, 3, 4]])
+
+
+def test_parse_negative_indices_and_texture_coordinates() -> None:
+    mesh = parse_obj(VERTICES + ["vt 0 0", "f -4/1 -3/1 -2/1"])
+    np.testing.assert_array_equal(mesh.faces, [[0, 1, 2]])
+
+
+def test_parse_vertex_normals() -> None:
+    mesh = parse_obj(VERTICES + ["vn 0 0 1", "vn 0 1 0", "vn 1 0 0", "f 1//3 2//1 3//2", "f 1/0/3 2/0/1 3/0/2"])
+    np.testing.assert_array_equal(mesh.normal_faces, [[2, 0, 1], [2, 0, 1]])
+
+    tri = mesh.triangle(0)
+    assert isinstance(tri, SmoothTriangle)
+    assert (tri.n1, tri.n2, tri.n3) == (vector(1, 0, 0), vector(0, 0, 1), vector(0, 1, 0))
+
+
+def test_parse_fills_in_missing_normals() -> None:
+    mesh = parse_obj(VERTICES + ["vn 0 0 1", "f 1//1 2//1 3//1", "f 1 3 4"])
+    tri = mesh.triangle(1)
+    assert isinstance(tri, SmoothTriangle)
+    assert tri.n1 == tri.n2 == tri.n3 == tri.normal
+
+
+@pytest.mark.parametrize("line", ("f 1 2", "f 1 2 5", "f 0 1 2", "f 1 x 2"))
+def test_parse_invalid_faces(line: str) -> None:
+    with pytest.raises(ValueError, match="Line 5"):
+        parse_obj(VERTICES + [line])
+
+
+def test_load_obj(tmp_path) -> None:
+    path = tmp_path / "quad.obj"
+    path.write_text("\n".join(VERTICES + ["f 1 2 3 4"]))
+    material = Material(reflective=0.5)
+
+    mesh = load_obj(path, material)
+    assert len(mesh) == 2
+    assert mesh.material is material
+    assert mesh.triangle(0).material is material
+
+
+def test_load_obj_writes_and_reuses_cache(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "quad.obj"
+    path.write_text("\n".join(VERTICES + ["vn 0 0 1", "f 1//1 2//1 3//1 4//1"]))
+    mesh = load_obj(path)
+    assert cache_path_for(path).exists()
+
+    def fail(*args):
+        raise AssertionError("Parsed despite an up to date cache.")
+
+    with monkeypatch.context() as m:
+        m.setattr(obj, "parse_obj", fail)
+        cached = load_obj(path)
+
+    # Mapped read only from the cache rather than parsed into new arrays
+    assert not cached.vertices.flags.writeable
+    np.testing.assert_array_equal(cached.vertices, mesh.vertices)
+    np.testing.assert_array_equal(cached.faces, mesh.faces)
+    np.testing.assert_array_equal(cached.normals, mesh.normals)
+    np.testing.assert_array_equal(cached.normal_faces, mesh.normal_faces)
+    assert isinstance(cached.triangle(1), SmoothTriangle)
+
+    r = Ray(point(0, 0.5, -5), vector(0, 0, 1))
+    assert cached.intersect_closest(r).t == pytest.approx(5)
+
+
+def test_load_obj_rebuilds_changed_cache(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "quad.obj"
+    path.write_text("\n".join(VERTICES + ["f 1 2 3"]))
+    load_obj(path)
+    stat = path.stat()
+
+    # Touching the source only means hashing it again
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with monkeypatch.context() as m:
+        m.setattr(obj, "parse_obj", None)
+        assert len(load_obj(path)) == 1
+
+    path.write_text("\n".join(VERTICES + ["f 1 2 3 4"]))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    assert len(load_obj(path)) == 2
+    assert len(load_obj(path)) == 2
+
+
+def test_load_obj_ignores_corrupt_cache(tmp_path) -> None:
+    path = tmp_path / "quad.obj"
+    path.write_text("\n".join(VERTICES + ["f 1 2 3 4"]))
+    cache_path_for(path).write_bytes(b"RTMESH01garbage")
+
+    assert len(load_obj(path)) == 2
+    assert len(load_obj(path, cache=False)) == 2
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from raytracer.color import BLACK, WHITE, Color
@@ -51,3 +52,20 @@ def test_striped_pattern_object_transform() -> None:
 
     c = pattern.at_object(obj, point(2.5, 0, 0))
     assert c == WHITE
+
+
+def test_striped_colors_batch() -> None:
+    pattern = Stripe(WHITE, BLACK)
+    pts = np.array([pt.as_array() for pt, _ in STRIPED_TEST_CASES])
+
+    colors = pattern.at_point_batch(pts)
+    for color, (_, truth_color) in zip(colors, STRIPED_TEST_CASES):
+        assert Color(*color) == truth_color
+
+
+def test_striped_pattern_object_transform_batch() -> None:
+    obj = Sphere(transform=scaling(2, 2, 2))
+    pattern = Stripe(transform=translation(0.5, 0, 0))
+
+    colors = pattern.at_object_batch(obj, np.array([[2.5, 0, 0, 1], [3.5, 0, 0, 1]]))
+    np.testing.assert_allclose(colors, [[1, 1, 1], [0, 0, 0]])
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from raytracer import EPSILON, precision
+from raytracer.camera import Camera
+from raytracer.canvas import Canvas
+from raytracer_demo.first_camera import first_camera_scene
+
+
+@pytest.mark.parametrize("value", ("float32", np.float32, np.dtype("float32"), "f4"))
+def test_resolve(value: object) -> None:
+    assert precision.resolve(value) == np.float32
+
+
+@pytest.mark.parametrize("value", ("float16", "double precision", int))
+def test_resolve_unknown_raises(value: object) -> None:
+    with pytest.raises(ValueError):
+        precision.resolve(value)
+
+
+def test_epsilon_scales_with_precision() -> None:
+    assert precision.epsilon("float64") == EPSILON
+    assert precision.epsilon("float32") > 100 * np.finfo(np.float32).eps
+    assert precision.epsilon("float32") > EPSILON
+
+
+def test_working_precision() -> None:
+    assert precision.resolve() == np.float64
+
+    with precision.working_precision("float32") as dtype:
+        assert dtype == np.float32
+        assert precision.resolve() == np.float32
+        assert precision.epsilon() == precision.epsilon("float32")
+        assert Canvas(2, 2).dtype == np.float32
+
+    assert precision.resolve() == np.float64
+    assert Canvas(2, 2).dtype == np.float64
+
+
+def test_set_precision() -> None:
+    try:
+        precision.set_precision("float32")
+        assert precision.active == np.float32
+    finally:
+        precision.set_precision("float64")
+
+
+def test_surface_offsets_scale_with_hits() -> None:
+    points = np.array([[0, 0, 0, 1], [0, -200, 10, 1]], dtype=np.float32)
+    offsets = precision.surface_offsets(points, np.array([0, 50], dtype=np.float32))
+
+    assert offsets.dtype == np.float32
+    assert offsets[0] == pytest.approx(precision.epsilon("float32"))
+    assert offsets[1] == pytest.approx(251 * precision.epsilon("float32"))
+    # Far below float64's epsilon, the rounding error doesn't matter
+    np.testing.assert_array_equal(precision.surface_offsets(points.astype(np.float64), np.array([0, 50.0])), EPSILON)
+
+
+def test_float32_render_has_no_acne() -> None:
+    world, camera = first_camera_scene()
+    c = Camera(128, 96, camera.fov, camera.transform)
+
+    full = c.render(world, engine="wavefront")._pixels
+    single = c.render(world, engine="wavefront", precision="float32")._pixels
+    # Points falsely shadowed by their own surface would come out darker than in float64
+    darker = (full - single).sum(axis=-1) > 0.05
+    assert darker.sum() <= 0.001 * darker.size
@@ -0,0 +1,65 @@
+import time
+from math import pi
+from pathlib import Path
+
+import pytest
+
+from raytracer.camera import Camera
+from raytracer.profiling import SamplingProfiler
+from raytracer.transforms import view_transform
+from raytracer.tuple import point, vector
+from tests.scenes import glass_world
+
+
+def glass_camera() -> Camera:
+    return Camera(24, 12, pi / 3, view_transform(point(0, 1.5, -5), point(0, 1, 0), vector(0, 1, 0)))
+
+
+def busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_samples_from_the_profiled_block() -> None:
+    with SamplingProfiler(interval=0.001) as profiler:
+        busy(0.1)
+
+    assert profiler.samples > 0
+    # Stacks start inside the block, leaving out this test's callers
+    assert all(stack.split(";")[0].endswith(":busy") for stack in profiler.stacks)
+
+
+def test_collapsed_output(tmp_path: Path) -> None:
+    profiler = SamplingProfiler()
+    profiler.merge({"a;b": 3, "a;b;c": 2, "a": 1})
+    profiler.merge({"a;b": 1})
+
+    profiler.write_collapsed(tmp_path / "render.folded")
+    assert (tmp_path / "render.folded").read_text() == "a 1\na;b 4\na;b;c 2\n"
+
+
+def test_top() -> None:
+    profiler = SamplingProfiler()
+    profiler.merge({"a;b": 4, "a;b;c": 2, "a": 1, "d;c": 3})
+
+    assert profiler.top(2) == [("c", 5, 5), ("b", 4, 6)]
+    table = profiler.format_top(3).splitlines()
+    assert table[0].split() == ["self", "total", "function"]
+    assert table[1].split() == ["50.0%", "50.0%", "c"]
+    assert len(table) == 4
+
+
+def test_invalid_interval_raises() -> None:
+    with pytest.raises(ValueError):
+        SamplingProfiler(0)
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_profile_render(workers: int) -> None:
+    profiler = SamplingProfiler(interval=0.001)
+    glass_camera().render(glass_world(), workers=workers, tile_size=8, profiler=profiler)
+
+    assert profiler.samples > 0
+    functions = {func for func, _, _ in profiler.top(1000)}
+    assert "raytracer.world:World.color_at" in functions
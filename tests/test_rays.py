@@ -1,6 +1,7 @@
+import numpy as np
 import pytest
 from raytracer import NUMERIC_T
-from raytracer.rays import Ray
+from raytracer.rays import Ray, transform_batch
 from raytracer.tuple import Tuple, point, vector
 from raytracer.matrix import Matrix
 from raytracer.transforms import scaling, translation
@@ -45,3 +46,14 @@ def test_ray_nonvector_direction_raises() -> None:
 
     with pytest.raises(ValueError):
         _ = Ray(p, p)
+
+
+def test_transform_batch_matches_ray_transform() -> None:
+    rays = [Ray(point(1, 2, 3), vector(0, 1, 0)), Ray(point(-1, 0, 4), vector(0.5, -0.5, 1))]
+    origins = np.array([ray.origin.as_array() for ray in rays])
+    directions = np.array([ray.direction.as_array() for ray in rays])
+    matrix = translation(3, 4, 5) * scaling(2, 3, 4)
+
+    new_origins, new_directions = transform_batch(origins, directions, matrix)
+    for ray, origin, direction in zip(rays, new_origins, new_directions):
+        assert Ray(Tuple.from_array(origin), Tuple.from_array(direction)) == ray.transform(matrix)
@@ -0,0 +1,189 @@
+import typing as t
+from math import pi
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from raytracer import render_stats
+from raytracer.camera import Camera
+from raytracer.canvas import Canvas
+from raytracer.color import Color
+from raytracer.compiler import compile_world
+from raytracer.rays import Ray
+from raytracer.render_stats import HEATMAP_COLORS, CostMap, RenderStats
+from raytracer.shapes import Group, Sphere
+from raytracer.transforms import translation, view_transform
+from raytracer.tuple import point, vector
+from raytracer.world import World
+from tests.scenes import glass_world, mixed_world, sphere_mesh
+
+
+def glass_camera() -> Camera:
+    return Camera(16, 8, pi / 3, view_transform(point(0, 1.5, -5), point(0, 1, 0), vector(0, 1, 0)))
+
+
+def test_disabled_by_default() -> None:
+    assert render_stats.active is None
+    assert isinstance(glass_camera().render(glass_world()), Canvas)
+
+
+def test_collecting_restores_previous() -> None:
+    outer = RenderStats()
+    with render_stats.collecting(outer):
+        with render_stats.collecting() as inner:
+            assert render_stats.active is inner
+        assert render_stats.active is outer
+    assert render_stats.active is None
+
+
+def test_intersect_counts() -> None:
+    s = Sphere()
+    g = Group(translation(0, 0, 1))
+    g.add_child(Sphere())
+    r = Ray(point(0, 0, -5), vector(0, 0, 1))
+
+    with render_stats.collecting() as stats:
+        s.intersect(r)
+        g.intersect(r)
+        g.intersect_closest(r)
+        s.occludes(Ray(point(0, 5, -5), vector(0, 0, 1)), 10)
+    # Only the spheres are counted, not the group
+    assert stats.local_intersects == 4
+
+    mesh = sphere_mesh(smooth=False)
+    with render_stats.collecting() as stats:
+        mesh.intersect(r)
+    # Every face in the BVH leaves the ray reaches is a test
+    assert 0 < stats.local_intersects < len(mesh)
+
+
+def test_world_hits_per_ray() -> None:
+    w = World.default_world()
+    with render_stats.collecting() as stats:
+        w.color_at(Ray(point(0, 0, -5), vector(0, 0, 1)))
+        w.color_at(Ray(point(0, 0, -5), vector(0, 1, 0)))
+        # Starting between the spheres
+        w.color_at(Ray(point(0, 0, -0.75), vector(0, 0, 1)))
+
+    # Two traced rays hit, and the shadow ray from inside the outer sphere is blocked by it
+    assert stats.hits_per_ray == {1: 3, 0: 2}
+    assert stats.shadow_rays == 2
+
+
+@pytest.mark.parametrize(
+    "world", (World.default_world, glass_world, mixed_world), ids=("default", "glass", "mixed")
+)
+def test_engines_count_the_same_hits(world: t.Callable[[], World]) -> None:
+    c = Camera(11, 11, pi / 2, view_transform(point(0, 1, -5), point(0, 0, 0), vector(0, 1, 0)))
+    _, scalar = c.render(world(), stats=True)
+    _, wavefront = c.render(world(), engine="wavefront", stats=True)
+
+    assert scalar.hits_per_ray == wavefront.hits_per_ray
+    assert len(scalar.hits_per_ray) > 1
+
+
+def test_scalar_render_stats() -> None:
+    c = Camera(11, 11, pi / 2, view_transform(point(0, 0, -5), point(0, 0, 0), vector(0, 1, 0)))
+    canvas, stats = c.render(World.default_world(), stats=True)
+
+    assert isinstance(canvas, Canvas)
+    assert stats.primary_rays == 100
+    # Every primary ray that hits casts a shadow ray, and nothing in the default world reflects
+    assert 0 < stats.shadow_rays < 100
+    assert stats.reflection_rays == stats.refraction_rays == 0
+    assert stats.max_depth == 0
+    assert sum(stats.hits_per_ray.values()) == stats.rays
+    assert stats.local_intersects > 0
+    assert stats.seconds > 0
+    assert stats.rays_per_second == pytest.approx(stats.rays / stats.seconds)
+
+
+@pytest.mark.parametrize("engine", ("scalar", "wavefront"))
+def test_recursive_rays_counted(engine: str) -> None:
+    _, stats = glass_camera().render(glass_world(), engine=engine, stats=True)
+
+    assert stats.reflection_rays > 0
+    assert stats.refraction_rays > 0
+    assert stats.max_depth == 5
+    assert sum(stats.hits_per_ray.values()) == stats.rays
+
+
+def test_engines_cast_the_same_rays() -> None:
+    _, scalar = glass_camera().render(glass_world(), stats=True)
+    _, wavefront = glass_camera().render(glass_world(), engine="wavefront", stats=True)
+
+    counts = ("primary_rays", "shadow_rays", "reflection_rays", "refraction_rays", "max_depth")
+    assert [getattr(scalar, c) for c in counts] == [getattr(wavefront, c) for c in counts]
+
+
+def test_parallel_stats_are_merged() -> None:
+    serial_canvas, serial = glass_camera().render(glass_world(), stats=True)
+    parallel_canvas, parallel = glass_camera().render(glass_world(), workers=2, tile_size=4, stats=True)
+
+    np.testing.assert_array_equal(parallel_canvas._pixels, serial_canvas._pixels)
+    # Workers each keep their own last shadow occluder, so only the intersection tests may differ
+    counts = ("primary_rays", "shadow_rays", "reflection_rays", "refraction_rays", "max_depth", "hits_per_ray")
+    assert [getattr(parallel, c) for c in counts] == [getattr(serial, c) for c in counts]
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_cost_map_matches_stats(workers: int) -> None:
+    cost_map = CostMap(16, 8)
+    _, stats = glass_camera().render(glass_world(), workers=workers, tile_size=4, stats=True, cost_map=cost_map)
+
+    assert cost_map.rays.sum() == stats.rays
+    # The image's last row and column aren't rendered
+    assert (cost_map.rays[:-1, :-1] >= 1).all()
+    assert (cost_map.rays[-1] == 0).all() and (cost_map.rays[:, -1] == 0).all()
+    assert (cost_map.seconds[:-1, :-1] > 0).all()
+
+
+def test_engines_count_the_same_rays_per_pixel() -> None:
+    scalar, wavefront = CostMap(16, 8), CostMap(16, 8)
+    glass_camera().render(glass_world(), cost_map=scalar)
+    glass_camera().render(glass_world(), engine="wavefront", cost_map=wavefront)
+
+    np.testing.assert_array_equal(scalar.rays, wavefront.rays)
+    assert wavefront.seconds.sum() > 0
+
+
+def test_cost_map_only_counts_rays() -> None:
+    cost_map = CostMap(16, 8)
+    _, stats = glass_camera().render(glass_world(), stats=True)
+    glass_camera().render(glass_world(), cost_map=cost_map)
+    assert cost_map.rays.sum() == stats.rays
+
+    with render_stats.collecting(RenderStats(count_tests=False)) as counter:
+        Sphere().intersect(Ray(point(0, 0, -5), vector(0, 0, 1)))
+        compile_world(glass_world()).closest(np.array([[0.0, 1, -5, 1]]), np.array([[0.0, 0, 1, 0]]))
+    assert counter.local_intersects == 0
+
+
+def test_heatmap() -> None:
+    cost_map = CostMap(3, 1)
+    cost_map.rays[0] = [1, 3, 5]
+    cost_map.seconds[0] = [0, 0, 0]
+
+    heatmap = cost_map.heatmap("rays")
+    assert heatmap.pixel_at(0, 0) == Color(*HEATMAP_COLORS[0])
+    assert heatmap.pixel_at(1, 0) == Color(*HEATMAP_COLORS[2])
+    assert heatmap.pixel_at(2, 0) == Color(*HEATMAP_COLORS[-1])
+    # Without any spread, every pixel is the cheapest color
+    assert cost_map.heatmap("seconds").pixel_at(2, 0) == Color(0, 0, 0)
+
+    with pytest.raises(ValueError):
+        cost_map.heatmap("colors")
+
+
+def test_cost_map_to_file(tmp_path: Path) -> None:
+    cost_map = CostMap(16, 8)
+    glass_camera().render(glass_world(), cost_map=cost_map)
+
+    cost_map.to_file(tmp_path / "heatmap.ppm", metric="rays", log=True)
+    assert (tmp_path / "heatmap.ppm").read_text().startswith("P3\n16 8\n255\n")
+
+
+def test_mismatched_cost_map_raises() -> None:
+    with pytest.raises(ValueError):
+        glass_camera().render(glass_world(), cost_map=CostMap(8, 16))
@@ -0,0 +1,436 @@
+import math
+
+import numpy as np
+import pytest
+
+from raytracer.intersections import Intersection
+from raytracer.rays import Ray
+from raytracer.materials import Material
+from raytracer.matrix import Matrix
+from raytracer.shapes import (
+    Group, Instance, InstancedShape, Plane, Shape, SmoothTriangle, Sphere, Triangle, TriangleMesh
+)
+from raytracer.transforms import rotate, scaling, translation
+from raytracer.tuple import Tuple, dot, point, vector
+from tests.scenes import random_rays, sphere_mesh
+
+
+def scalar_hits(shape: Shape, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+    hits = []
+    for o, d in zip(origins, directions):
+        h = shape.intersect(Ray(Tuple.from_array(o), Tuple.from_array(d))).hit
+        hits.append(np.inf if h is None else h.t)
+
+    return np.array(hits)
+
+
+def test_plane_intersect_parallel() -> None:
+    p = Plane()
+    assert len(p.intersect(Ray(point(0, 10, 0), vector(0, 0, 1)))) == 0
+
+
+def test_plane_intersect_from_above() -> None:
+    p = Plane()
+    xs = p.intersect(Ray(point(0, 1, 0), vector(0, -1, 0)))
+
+    assert len(xs) == 1
+    assert xs[0].t == 1
+    assert xs[0].obj is p
+
+
+def test_sphere_intersections_batch() -> None:
+    s = Sphere()
+    origins = np.array([[0, 0, -5, 1], [0, 2, -5, 1], [0, 1, -5, 1]], dtype=float)
+    directions = np.array([[0, 0, 1, 0]] * 3, dtype=float)
+
+    ts = s.intersections_batch(origins, directions)
+    np.testing.assert_allclose(ts, [[4, 6], [np.inf, np.inf], [5, 5]])
+
+
+def test_plane_intersections_batch() -> None:
+    p = Plane()
+    origins = np.array([[0, 1, 0, 1], [0, 10, 0, 1], [0, -1, 0, 1]], dtype=float)
+    directions = np.array([[0, -1, 0, 0], [0, 0, 1, 0], [0, -1, 0, 0]], dtype=float)
+
+    ts = p.intersections_batch(origins, directions)
+    np.testing.assert_allclose(ts, [[1], [np.inf], [-1]])
+
+
+BATCH_SHAPES = (
+    Sphere(),
+    Sphere(translation(1, 2, 3) * scaling(2, 0.5, 1)),
+    Plane(),
+    Plane(rotate(x=math.pi / 3, z=0.2) * translation(0, -1, 0)),
+)
+
+
+@pytest.mark.parametrize("shape", BATCH_SHAPES)
+def test_intersect_batch_matches_scalar(shape: Shape) -> None:
+    origins, directions = random_rays(500)
+    ts, mask = shape.intersect_batch(origins, directions)
+
+    truth = scalar_hits(shape, origins, directions)
+    np.testing.assert_array_equal(mask, np.isfinite(truth))
+    np.testing.assert_allclose(ts[mask], truth[mask])
+
+
+def test_group_intersect_batch_matches_scalar() -> None:
+    g = Group(transform=scaling(2, 2, 2))
+    inner = Group(transform=translation(0.5, 0, 0))
+    g.add_child(Sphere(translation(0, 0, -3)))
+    g.add_child(inner)
+    inner.add_child(Sphere(translation(5, 0, 0)))
+
+    origins, directions = random_rays(500, seed=1)
+    ts, mask = g.intersect_batch(origins, directions)
+
+    truth = scalar_hits(g, origins, directions)
+    np.testing.assert_array_equal(mask, np.isfinite(truth))
+    np.testing.assert_allclose(ts[mask], truth[mask])
+
+
+def test_empty_group_intersect_batch() -> None:
+    origins, directions = random_rays(3)
+    ts, mask = Group().intersect_batch(origins, directions)
+
+    assert ts.shape == (3,)
+    assert not mask.any()
+
+
+@pytest.mark.parametrize("shape", BATCH_SHAPES)
+def test_normal_at_batch_matches_scalar(shape: Shape) -> None:
+    shape = type(shape)(shape.transform)
+    g = Group(transform=rotate(y=0.4) * scaling(1, 2, 1))
+    g.add_child(shape)
+    pts = np.array([[1, 2, 3, 1], [-0.5, 0.2, 0.1, 1], [0, 0, -4, 1]], dtype=float)
+
+    normals = shape.normal_at_batch(pts)
+    for pt, normal in zip(pts, normals):
+        truth = shape.normal_at(Tuple.from_array(pt), Intersection(0, shape))
+        assert Tuple.from_array(normal) == truth
+
+
+OCCLUDES_CASES = (
+    (Ray(point(0, 0, -5), vector(0, 0, 1)), 10, True),
+    (Ray(point(0, 0, -5), vector(0, 0, 1)), 3, False),
+    (Ray(point(0, 0, 0), vector(0, 0, 1)), 3, True),
+    (Ray(point(0, 0, 5), vector(0, 0, 1)), 10, False),
+    (Ray(point(0, 5, -5), vector(0, 0, 1)), 10, False),
+)
+
+
+@pytest.mark.parametrize(("ray", "distance", "truth"), OCCLUDES_CASES)
+def test_occludes(ray: Ray, distance: float, truth: bool) -> None:
+    assert Sphere().occludes(ray, distance) is truth
+
+    g = Group(translation(0, 0, 1))
+    g.add_child(Sphere(translation(0, 0, -1)))
+    assert g.occludes(ray, distance) is truth
+
+
+CLOSEST_CASES = (
+    (Ray(point(0, 0, -5), vector(0, 0, 1)), math.inf, 4),
+    (Ray(point(0, 0, -5), vector(0, 0, 1)), 4, None),
+    (Ray(point(0, 0, 0), vector(0, 0, 1)), math.inf, 1),
+    (Ray(point(0, 0, 5), vector(0, 0, 1)), math.inf, None),
+    (Ray(point(0, 5, -5), vector(0, 0, 1)), math.inf, None),
+)
+
+
+@pytest.mark.parametrize(("ray", "t_max", "truth_t"), CLOSEST_CASES)
+def test_intersect_closest(ray: Ray, t_max: float, truth_t: float | None) -> None:
+    s = Sphere()
+    g = Group(translation(0, 0, 1))
+    inner = Sphere(translation(0, 0, -1))
+    g.add_child(inner)
+
+    for shape, truth_obj in ((s, s), (g, inner)):
+        hit = shape.intersect_closest(ray, t_max)
+        if truth_t is None:
+            assert hit is None
+        else:
+            assert hit.t == pytest.approx(truth_t)
+            assert hit.obj is truth_obj
+
+
+@pytest.mark.parametrize("shape", BATCH_SHAPES)
+def test_intersect_closest_matches_hit(shape: Shape) -> None:
+    origins, directions = random_rays(200, seed=3)
+    for o, d in zip(origins, directions):
+        r = Ray(Tuple.from_array(o), Tuple.from_array(d))
+        truth = shape.intersect(r).hit
+        assert shape.intersect_closest(r) == truth
+
+
+def test_triangle_precomputes_edges_and_normal() -> None:
+    tri = Triangle(p1=point(0, 1, 0), p2=point(-1, 0, 0), p3=point(1, 0, 0))
+    assert tri.e1 == vector(-1, -1, 0)
+    assert tri.e2 == vector(1, -1, 0)
+    assert tri.normal == vector(0, 0, -1)
+    assert tri.normal_at(point(0, 0.5, 0), Intersection(1, tri)) == vector(0, 0, -1)
+
+
+TRIANGLE_MISSES = (
+    Ray(point(0, -1, -2), vector(0, 1, 0)),
+    Ray(point(1, 1, -2), vector(0, 0, 1)),
+    Ray(point(-1, 1, -2), vector(0, 0, 1)),
+    Ray(point(0, -1, -2), vector(0, 0, 1)),
+)
+
+
+@pytest.mark.parametrize("ray", TRIANGLE_MISSES)
+def test_triangle_misses(ray: Ray) -> None:
+    tri = Triangle(p1=point(0, 1, 0), p2=point(-1, 0, 0), p3=point(1, 0, 0))
+    assert len(tri.intersect(ray)) == 0
+
+
+def test_triangle_hit_records_uv() -> None:
+    tri = Triangle(p1=point(0, 1, 0), p2=point(-1, 0, 0), p3=point(1, 0, 0))
+    xs = tri.intersect(Ray(point(-0.2, 0.3, -2), vector(0, 0, 1)))
+    assert len(xs) == 1
+    assert xs[0].t == pytest.approx(2)
+    assert xs[0].u == pytest.approx(0.45)
+    assert xs[0].v == pytest.approx(0.25)
+
+
+def smooth_triangle() -> SmoothTriangle:
+    return SmoothTriangle(
+        p1=point(0, 1, 0),
+        p2=point(-1, 0, 0),
+        p3=point(1, 0, 0),
+        n1=vector(0, 1, 0),
+        n2=vector(-1, 0, 0),
+        n3=vector(1, 0, 0),
+    )
+
+
+def test_smooth_triangle_interpolates_normal() -> None:
+    tri = smooth_triangle()
+    assert tri.normal_at(point(0, 0, 0), Intersection(1, tri, 0.45, 0.25)) == vector(-0.5547, 0.83205, 0)
+
+    pts = np.array([[-0.2, 0.3, 0, 1], [0.5, 0.25, 0, 1]])
+    for pt, normal in zip(pts, tri.normal_at_batch(pts)):
+        hit = tri.intersect(Ray(Tuple.from_array(pt) - vector(0, 0, 1), vector(0, 0, 1)))[0]
+        assert Tuple.from_array(normal) == tri.normal_at(Tuple.from_array(pt), hit)
+
+
+def test_triangle_intersect_batch_matches_scalar() -> None:
+    tri = Triangle(translation(0, 0, 1) * scaling(3, 3, 3), p1=point(0, 1, 0), p2=point(-1, 0, 0), p3=point(1, 0, 0))
+    origins, directions = random_rays(500)
+    # Aim the rays near the triangle so a fair share of them hit
+    directions[:, :3] = rng_targets(500) - origins[:, :3]
+    directions /= np.linalg.norm(directions, axis=1)[:, np.newaxis]
+
+    ts, mask = tri.intersect_batch(origins, directions)
+    truth = scalar_hits(tri, origins, directions)
+    assert mask.any()
+    np.testing.assert_array_equal(mask, np.isfinite(truth))
+    np.testing.assert_allclose(ts[mask], truth[mask])
+
+
+def rng_targets(n: int, seed: int = 1) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-3, 3, (n, 3)) * [1, 1, 0] + [0, 1.5, 1]
+
+
+def test_mesh_triangles() -> None:
+    mesh = sphere_mesh(smooth=True)
+    assert len(mesh) == 8 * 12 * 2
+    tri = mesh.triangle(5)
+    assert isinstance(tri, SmoothTriangle)
+    assert tri is mesh.triangle(5)
+    assert tri.parent is mesh
+    assert tri.material is mesh.material
+    assert isinstance(sphere_mesh(smooth=False).triangle(5), Triangle)
+
+
+def test_mesh_needs_normals_with_normal_faces() -> None:
+    with pytest.raises(ValueError):
+        TriangleMesh(vertices=np.zeros((3, 3)), faces=[[0, 1, 2]], normals=np.zeros((3, 3)))
+
+
+@pytest.mark.parametrize("smooth", (False, True))
+def test_mesh_matches_its_triangles(smooth: bool) -> None:
+    mesh = sphere_mesh(smooth)
+    mesh.transform = translation(0.5, 0, 0) * scaling(2, 2, 2)
+    group = Group(mesh.transform)
+    for face in range(len(mesh)):
+        tri = mesh.triangle(face)
+        corners = {name: getattr(tri, name) for name in ("p1", "p2", "p3", "n1", "n2", "n3") if hasattr(tri, name)}
+        group.add_child(type(tri)(**corners))
+
+    origins, directions = random_rays(200, seed=4)
+    ts, mask = mesh.intersect_batch(origins, directions)
+    truth = scalar_hits(group, origins, directions)
+    assert mask.any()
+    np.testing.assert_array_equal(mask, np.isfinite(truth))
+    np.testing.assert_allclose(ts[mask], truth[mask])
+
+    for o, d, truth_t in zip(origins, directions, truth):
+        r = Ray(Tuple.from_array(o), Tuple.from_array(d))
+        xs = mesh.intersect(r)
+        np.testing.assert_allclose([i.t for i in xs], [i.t for i in group.intersect(r)])
+        hit = mesh.intersect_closest(r)
+        assert xs.hit == hit
+        if hit is None:
+            assert not np.isfinite(truth_t)
+            continue
+
+        assert hit.t == pytest.approx(truth_t)
+        assert hit.obj.parent is mesh
+        assert mesh.occludes(r, truth_t + 0.01)
+        assert not mesh.occludes(r, truth_t - 0.01)
+
+        normal = hit.obj.normal_at(r.position(hit.t), hit)
+        if smooth:
+            # Interpolated vertex normals of a sphere point roughly away from its center
+            assert dot(normal, (r.position(hit.t) - point(0.5, 0, 0)).normalize()) > 0.9
+
+
+def two_spheres() -> Group:
+    g = Group(scaling(1, 2, 1))
+    g.add_child(Sphere(translation(-1, 0, 0) * scaling(0.5, 0.5, 0.5)))
+    g.add_child(Sphere(translation(1, 0, 0), Material(reflective=0.5)))
+    return g
+
+
+def test_instance_matches_copy() -> None:
+    shared = two_spheres()
+    instance = Instance(translation(0, 1, 2) * rotate(y=0.5), shape=shared)
+    copy = Group(instance.transform)
+    copy.add_child(two_spheres())
+
+    origins, directions = random_rays(300, seed=5)
+    ts, mask = instance.intersect_batch(origins, directions)
+    truth = scalar_hits(copy, origins, directions)
+    assert mask.any()
+    np.testing.assert_array_equal(mask, np.isfinite(truth))
+    np.testing.assert_allclose(ts[mask], truth[mask])
+
+    for o, d, truth_t in zip(origins, directions, truth):
+        r = Ray(Tuple.from_array(o), Tuple.from_array(d))
+        xs = instance.intersect(r)
+        copy_xs = copy.intersect(r)
+        np.testing.assert_allclose([i.t for i in xs], [i.t for i in copy_xs])
+        assert instance.occludes(r, 100) is copy.occludes(r, 100)
+
+        hit = instance.intersect_closest(r)
+        assert xs.hit == hit
+        if hit is None:
+            continue
+
+        assert isinstance(hit.obj, InstancedShape)
+        assert hit.obj.shape in shared.children
+        assert hit.obj.material is hit.obj.shape.material
+        copy_hit = copy_xs.hit
+        pt = r.position(hit.t)
+        assert hit.obj.normal_at(pt, hit) == copy_hit.obj.normal_at(pt, copy_hit)
+        assert hit.obj.world_to_object(pt) == copy_hit.obj.world_to_object(pt)
+
+        pts = np.array([pt.as_array()])
+        np.testing.assert_allclose(hit.obj.normal_at_batch(pts), copy_hit.obj.normal_at_batch(pts), atol=1e-9)
+
+
+def test_instance_views_are_stable() -> None:
+    shared = Sphere()
+    instance = Instance(shape=shared)
+    xs = instance.intersect(Ray(point(0, 0, -5), vector(0, 0, 1)))
+    assert xs[0].obj == xs[1].obj == instance.instanced(shared)
+    assert hash(xs[0].obj) == hash(xs[1].obj)
+
+    # The same shape placed by another instance is a different surface
+    assert Instance(shape=shared).instanced(shared) != instance.instanced(shared)
+    assert not hasattr(instance, "_views")
+
+
+def test_instance_material_override() -> None:
+    glass = Material(transparency=1, refractive_index=1.5)
+    instance = Instance(shape=two_spheres(), material_override=glass)
+    hit = instance.intersect_closest(Ray(point(1, 0, -5), vector(0, 0, 1)))
+    assert hit.obj.material is glass
+
+
+def test_instance_of_instance() -> None:
+    inner = Instance(translation(0, 0, 1), shape=Sphere())
+    outer = Instance(scaling(2, 2, 2), shape=inner)
+    hit = outer.intersect_closest(Ray(point(0, 0, -10), vector(0, 0, 1)))
+
+    assert hit.t == pytest.approx(10)
+    assert hit.obj.shape.shape is inner.shape
+    assert hit.obj.normal_at(point(0, 0, 0), hit) == vector(0, 0, -1)
+
+
+def test_instance_bounds() -> None:
+    instance = Instance(translation(5, 0, 0), shape=two_spheres())
+    box = instance.parent_space_bounds()
+    assert box.minimum == point(3.5, -2, -1)
+    assert box.maximum == point(7, 2, 1)
+
+
+def test_instanced_shape_needs_no_parent() -> None:
+    shared = two_spheres()
+    with pytest.raises(ValueError):
+        Instance(shape=next(iter(shared.children)))
+
+
+def nested_groups(depth: int) -> tuple[list[Group], Sphere]:
+    groups = [
+        Group(rotate(x=0.3, y=0.2 * i) * translation(0.1, 0.2, -0.3) * scaling(1.1, 0.9, 1)) for i in range(depth)
+    ]
+    for parent, child in zip(groups, groups[1:]):
+        parent.add_child(child)
+    leaf = Sphere(translation(1, 0, 0))
+    groups[-1].add_child(leaf)
+    return groups, leaf
+
+
+def chained_normal(shape: Shape, pt: Tuple) -> Tuple:
+    """Normal at a world space point by walking the parent chain, one transform at a time."""
+    chain = []
+    while shape is not None:
+        chain.append(shape)
+        shape = shape.parent
+
+    for s in reversed(chain):
+        pt = s.transform.inverse() * pt
+    normal = chain[0]._local_normal_at(pt, Intersection(0, chain[0]))
+    for s in chain:
+        normal = vector(*(s.transform.inverse().transpose() * normal)).normalize()
+    return normal
+
+
+def test_world_transforms_compose_ancestors() -> None:
+    groups, leaf = nested_groups(12)
+    pt = leaf.world_inverse.inverse() * point(0, 1, 0)
+
+    assert leaf.normal_at(pt, Intersection(0, leaf)) == chained_normal(leaf, pt)
+    np.testing.assert_allclose(leaf.normal_at_batch(np.array([pt.as_array()]))[0], [*chained_normal(leaf, pt), 0])
+    assert leaf.world_to_object(pt) == point(0, 1, 0)
+
+
+def test_freeze_precomputes_world_transforms() -> None:
+    groups, leaf = nested_groups(12)
+    groups[0].freeze()
+    pt = leaf.world_inverse.inverse() * point(0, 1, 0)
+
+    Matrix.reset_inversions()
+    for _ in range(3):
+        leaf.normal_at(pt, Intersection(0, leaf))
+        leaf.world_to_object(pt)
+    assert Matrix.inversions == 0
+
+
+def test_world_transforms_invalidated_by_ancestors() -> None:
+    groups, leaf = nested_groups(5)
+    groups[0].freeze()
+    pt = point(0.5, 0.5, 0.5)
+
+    groups[2].transform = scaling(2, 1, 1)
+    assert leaf.normal_at(pt, Intersection(0, leaf)) == chained_normal(leaf, pt)
+
+    # Reparenting changes the chain as well
+    other = Group(translation(5, 0, 0))
+    other.freeze()
+    other.add_child(groups[1])
+    assert leaf.normal_at(pt, Intersection(0, leaf)) == chained_normal(leaf, pt)
+    other.transform = rotate(z=1)
+    assert leaf.normal_at(pt, Intersection(0, leaf)) == chained_normal(leaf, pt)
@@ -0,0 +1,109 @@
+import struct
+import zlib
+from math import pi
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from raytracer.camera import Camera
+from raytracer.canvas import Canvas
+from raytracer.sinks import ImageSink, _PNGEncoder
+from raytracer.transforms import view_transform
+from raytracer.tuple import point, vector
+from raytracer.world import World
+
+
+@pytest.fixture
+def random_canvas() -> Canvas:
+    c = Canvas(23, 17)
+    c._pixels = np.random.default_rng(0).uniform(-0.2, 1.5, (17, 23, 3))
+    return c
+
+
+def shuffled_tiles(width: int, height: int, size: int, seed: int = 0) -> list[tuple[int, int, int, int]]:
+    tiles = [
+        (x0, y0, min(x0 + size, width), min(y0 + size, height))
+        for y0 in range(0, height, size)
+        for x0 in range(0, width, size)
+    ]
+    order = np.random.default_rng(seed).permutation(len(tiles))
+    return [tiles[i] for i in order]
+
+
+@pytest.mark.parametrize("suffix", (".ppm", ".pnm", ".png", ".pfm"))
+def test_streamed_tiles_match_canvas(suffix: str, tmp_path: Path, random_canvas: Canvas) -> None:
+    random_canvas.to_file(tmp_path / f"canvas{suffix}")
+
+    with ImageSink(tmp_path / f"sink{suffix}", random_canvas.width, random_canvas.height) as sink:
+        for x0, y0, x1, y1 in shuffled_tiles(random_canvas.width, random_canvas.height, 5):
+            sink.write_block(x0, y0, random_canvas._pixels[y0:y1, x0:x1])
+
+    assert (tmp_path / f"sink{suffix}").read_bytes() == (tmp_path / f"canvas{suffix}").read_bytes()
+
+
+def test_p3_lines_wrap_at_70_columns(tmp_path: Path, random_canvas: Canvas) -> None:
+    with ImageSink(tmp_path / "sink.ppm", random_canvas.width, random_canvas.height) as sink:
+        for y in range(random_canvas.height):
+            sink.write_block(0, y, random_canvas._pixels[y:y + 1])
+
+    text = (tmp_path / "sink.ppm").read_text()
+    assert text.endswith("\n")
+    lines = text.splitlines()[3:]
+    assert max(len(line) for line in lines) <= 70
+    # No line could have fit the first value of the next one
+    for line, following in zip(lines, lines[1:]):
+        assert len(line) + 1 + len(following.split()[0]) > 70
+    assert len(" ".join(lines).split()) == random_canvas.width * random_canvas.height * 3
+
+
+def test_png_splits_idat_chunks(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(_PNGEncoder, "chunk_size", 16)
+    pixels = np.random.default_rng(1).uniform(0, 1, (200, 30, 3))
+    with ImageSink(tmp_path / "sink.png", 30, 200) as sink:
+        for y0 in range(0, 200, 8):
+            sink.write_block(0, y0, pixels[y0:y0 + 8])
+
+    data = (tmp_path / "sink.png").read_bytes()
+    pos, idat = 8, []
+    while pos < len(data):
+        (length,) = struct.unpack(">I", data[pos:pos + 4])
+        if data[pos + 4:pos + 8] == b"IDAT":
+            idat.append(data[pos + 8:pos + 8 + length])
+        pos += 12 + length
+
+    assert len(idat) > 1
+    scanlines = np.frombuffer(zlib.decompress(b"".join(idat)), dtype=np.uint8).reshape(200, 91)
+    np.testing.assert_array_equal(scanlines[:, 1:].reshape(200, 30, 3), (pixels * 255).astype(np.uint8))
+
+
+def test_unwritten_pixels_are_black(tmp_path: Path) -> None:
+    with ImageSink(tmp_path / "sink.pfm", 4, 3) as sink:
+        sink.write_block(1, 1, np.ones((1, 2, 3)))
+
+    pixels = np.frombuffer((tmp_path / "sink.pfm").read_bytes()[len(b"PF\n4 3\n-1.0\n"):], dtype="<f4")
+    truth = np.zeros((3, 4, 3))
+    truth[1, 1:3] = 1
+    np.testing.assert_array_equal(pixels.reshape(3, 4, 3)[::-1], truth)
+
+
+def test_invalid_blocks_raise(tmp_path: Path) -> None:
+    with ImageSink(tmp_path / "sink.ppm", 4, 3) as sink:
+        with pytest.raises(ValueError):
+            sink.write_block(3, 0, np.zeros((1, 2, 3)))
+        sink.write_block(0, 0, np.zeros((1, 4, 3)))
+        with pytest.raises(ValueError):
+            sink.write_block(0, 0, np.zeros((1, 4, 3)))
+
+
+@pytest.mark.parametrize("workers", (1, 2))
+def test_render_into_sink(workers: int, tmp_path: Path) -> None:
+    w = World.default_world()
+    trans = view_transform(point(0, 0, -5), point(0, 0, 0), vector(0, 1, 0))
+    c = Camera(13, 9, pi / 2, transform=trans)
+
+    c.render(w, engine="wavefront").to_file(tmp_path / "canvas.ppm")
+    with ImageSink(tmp_path / "sink.ppm", c.h_size, c.v_size) as sink:
+        assert c.render(w, engine="wavefront", workers=workers, tile_size=4, sink=sink) is None
+
+    assert (tmp_path / "sink.ppm").read_bytes() == (tmp_path / "canvas.ppm").read_bytes()
@@ -179,3 +179,10 @@ VIEW_TRANSFORM_CASES = (
 @pytest.mark.parametrize(("from_p", "to_p", "up_v", "truth_trans"), VIEW_TRANSFORM_CASES)
 def test_view_transform(from_p: Tuple, to_p: Tuple, up_v: Tuple, truth_trans: Matrix) -> None:
     assert view_transform(from_p, to_p, up_v) == truth_trans
+
+
+def test_rotate_matches_composition() -> None:
+    angles = (0.3, -1.2, 2.5)
+    composed = rotate_z(angles[2]) * rotate_y(angles[1]) * rotate_x(angles[0])
+
+    np.testing.assert_allclose(rotate(*angles).matrix, composed.matrix, atol=1e-12)
@@ -0,0 +1,107 @@
+import math
+
+import numpy as np
+import pytest
+
+from raytracer.transforms import rotate_y, scaling, translation
+from raytracer.tuple import TupleType, point, vector
+from raytracer.tuple import cross as tuple_cross
+from raytracer.tuple import dot as tuple_dot
+from raytracer.tuple_array import Points, Vectors, cross, dot
+
+POINTS = [point(1, 2, 3), point(-4.5, 0, 2), point(0, 0, 0)]
+VECTORS = [vector(1, 0, 0), vector(-2, 3.5, 1), vector(0.1, -0.2, 4)]
+
+
+def test_from_to_tuples() -> None:
+    pts = Points.from_tuples(POINTS)
+    vecs = Vectors.from_tuples(VECTORS)
+
+    assert pts.data.shape == vecs.data.shape == (3, 4)
+    assert (pts.w == 1).all()
+    assert (vecs.w == 0).all()
+    assert pts.to_tuples() == POINTS
+    assert list(vecs) == VECTORS
+    assert pts[1] == POINTS[1]
+    assert pts[1].w == TupleType.POINT
+
+
+def test_from_tuples_wrong_type_raises() -> None:
+    with pytest.raises(ValueError):
+        Points.from_tuples(VECTORS)
+
+
+def test_from_xyz_array() -> None:
+    pts = Points(np.array([[1, 2, 3]]))
+    np.testing.assert_array_equal(pts.data, [[1, 2, 3, 1]])
+
+
+def test_bad_shape_raises() -> None:
+    with pytest.raises(ValueError):
+        Points(np.zeros((3, 5)))
+
+
+def test_slicing_keeps_type() -> None:
+    pts = Points.from_tuples(POINTS)
+    assert pts[1:] == Points.from_tuples(POINTS[1:])
+    assert pts[np.array([True, False, True])] == Points.from_tuples([POINTS[0], POINTS[2]])
+
+
+ARITHMETIC_CASES = (
+    (lambda a, b: a + b, Points, Vectors),
+    (lambda a, b: b + a, Points, Vectors),
+    (lambda a, b: a - b, Points, Points),
+    (lambda a, b: a - b, Points, Vectors),
+    (lambda a, b: a + b, Vectors, Vectors),
+    (lambda a, b: a - b, Vectors, Vectors),
+)
+
+
+@pytest.mark.parametrize(("op", "left_t", "right_t"), ARITHMETIC_CASES)
+def test_arithmetic_matches_tuple(op, left_t, right_t) -> None:
+    left = POINTS if left_t is Points else VECTORS
+    right = POINTS[::-1] if right_t is Points else VECTORS[::-1]
+
+    result = op(left_t.from_tuples(left), right_t.from_tuples(right))
+    assert result.to_tuples() == [op(a, b) for a, b in zip(left, right)]
+
+
+def test_vector_ops_match_tuple() -> None:
+    vecs = Vectors.from_tuples(VECTORS)
+    others = Vectors.from_tuples(VECTORS[::-1])
+
+    assert (-vecs).to_tuples() == [-v for v in VECTORS]
+    assert (vecs * 2.5).to_tuples() == [v * 2.5 for v in VECTORS]
+    assert (2.5 * vecs).to_tuples() == [v * 2.5 for v in VECTORS]
+    assert (vecs / 2).to_tuples() == [v / 2 for v in VECTORS]
+    assert (vecs * np.array([1, 2, 3])).to_tuples() == [v * s for v, s in zip(VECTORS, (1, 2, 3))]
+    np.testing.assert_allclose(vecs.magnitude(), [v.magnitude() for v in VECTORS])
+    assert vecs.normalize().to_tuples() == [v.normalize() for v in VECTORS]
+    np.testing.assert_allclose(dot(vecs, others), [tuple_dot(a, b) for a, b in zip(VECTORS, VECTORS[::-1])])
+    assert cross(vecs, others).to_tuples() == [tuple_cross(a, b) for a, b in zip(VECTORS, VECTORS[::-1])]
+
+
+def test_reflect_matches_tuple() -> None:
+    normals = [vector(0, 1, 0), vector(math.sqrt(2) / 2, math.sqrt(2) / 2, 0), vector(0, 0, 1)]
+    reflected = Vectors.from_tuples(VECTORS).reflect(Vectors.from_tuples(normals))
+
+    assert reflected.to_tuples() == [v.reflect(n) for v, n in zip(VECTORS, normals)]
+
+
+def test_points_dot_raises() -> None:
+    with pytest.raises(ValueError):
+        dot(Points.from_tuples(POINTS), Vectors.from_tuples(VECTORS))
+    with pytest.raises(ValueError):
+        cross(Vectors.from_tuples(VECTORS), Points.from_tuples(POINTS))
+
+
+@pytest.mark.parametrize("matrix", (translation(1, -2, 3), scaling(2, 3, 4), rotate_y(0.7) * translation(4, 0, 1)))
+def test_transform_matches_tuple(matrix) -> None:
+    assert Points.from_tuples(POINTS).transform(matrix).to_tuples() == [matrix * p for p in POINTS]
+    assert Vectors.from_tuples(VECTORS).transform(matrix).to_tuples() == [matrix * v for v in VECTORS]
+
+
+def test_equality() -> None:
+    assert Points.from_tuples(POINTS) == Points.from_tuples(POINTS)
+    assert Points.from_tuples(POINTS) != Vectors(Points.from_tuples(POINTS).data[:, :3])
+    assert Points.from_tuples(POINTS) != Points.from_tuples(POINTS[:2])
@@ -0,0 +1,89 @@
+from math import pi
+
+import numpy as np
+import pytest
+
+from raytracer.camera import Camera
+from raytracer.color import WHITE, Color
+from raytracer.lights import PointLight
+from raytracer.materials import Material
+from raytracer.obj import parse_obj
+from raytracer.patterns import Stripe
+from raytracer.rays import Ray
+from raytracer.shapes import Group, Instance, Plane, Sphere
+from raytracer.transforms import scaling, translation, view_transform
+from raytracer.tuple import Tuple, point, vector
+from raytracer.wavefront import trace
+from raytracer.world import World
+from tests.scenes import glass_world
+
+
+def mesh_world() -> World:
+    """Octahedron mesh with smooth normals, over a floor."""
+    octahedron = parse_obj(
+        ["v 1 0 0", "v -1 0 0", "v 0 1 0", "v 0 -1 0", "v 0 0 1", "v 0 0 -1"]
+        + ["vn 1 0 0", "vn -1 0 0", "vn 0 1 0", "vn 0 -1 0", "vn 0 0 1", "vn 0 0 -1"]
+        + [f"f {a}//{a} {b}//{b} {c}//{c}" for a in (1, 2) for b in (3, 4) for c in (5, 6)],
+        Material(Color(0.8, 0.5, 0.2), reflective=0.3),
+    )
+    octahedron.transform = translation(0, 1, 0)
+    floor = Plane(material=Material(pattern=Stripe(transform=scaling(0.5, 0.5, 0.5))))
+    return World(PointLight(point(-10, 10, -10), WHITE), [floor, octahedron])
+
+
+def instance_world() -> World:
+    """Shared glass and mirror spheres placed three times, once as solid color."""
+    shared = Group(scaling(0.5, 0.5, 0.5))
+    shared.add_child(Sphere(material=Material(Color(0.1, 0.1, 0.1), transparency=0.9, refractive_index=1.5)))
+    shared.add_child(Sphere(translation(0, 2, 0), Material(Color(0, 0, 0), reflective=1)))
+    instances = [
+        Instance(translation(-1.5, 0.5, 0), shape=shared),
+        Instance(translation(0, 0.5, 1) * scaling(1.5, 1.5, 1.5), shape=shared),
+        Instance(translation(1.5, 0.5, 0), shape=shared, material_override=Material(Color(0.2, 0.8, 0.2))),
+    ]
+    floor = Plane(material=Material(pattern=Stripe(transform=scaling(0.5, 0.5, 0.5))))
+    return World(PointLight(point(-10, 10, -10), WHITE), [floor, *instances])
+
+
+def test_trace_matches_color_at() -> None:
+    w = glass_world()
+    c = Camera(16, 8, pi / 3, view_transform(point(0, 1.5, -5), point(0, 1, 0), vector(0, 1, 0)))
+    origins, directions = c.rays_for_image()
+
+    colors = trace(w, origins, directions)
+    for o, d, color in zip(origins, directions, colors):
+        truth = w.color_at(Ray(Tuple.from_array(o), Tuple.from_array(d)))
+        assert Color(*color) == truth
+
+
+def test_trace_respects_remaining() -> None:
+    w = glass_world()
+    origins = np.array([[-2, 1, -5, 1]], dtype=float)
+    directions = np.array([[0, 0, 1, 0]], dtype=float)
+
+    for remaining in range(3):
+        colors = trace(w, origins, directions, remaining=remaining)
+        truth = w.color_at(Ray(point(-2, 1, -5), vector(0, 0, 1)), remaining=remaining)
+        assert Color(*colors[0]) == truth
+
+
+def test_trace_empty_world() -> None:
+    w = World(PointLight(point(-10, 10, -10), WHITE), [])
+    colors = trace(w, np.array([[0, 0, -5, 1]], dtype=float), np.array([[0, 0, 1, 0]], dtype=float))
+
+    np.testing.assert_array_equal(colors, [[0, 0, 0]])
+
+
+@pytest.mark.parametrize("world", (World.default_world(), glass_world(), mesh_world(), instance_world()))
+def test_render_wavefront_matches_scalar(world: World) -> None:
+    c = Camera(20, 10, pi / 3, view_transform(point(0, 1.5, -5), point(0, 1, 0), vector(0, 1, 0)))
+
+    scalar = c.render(world)
+    wavefront = c.render(world, engine="wavefront")
+    np.testing.assert_allclose(wavefront._pixels, scalar._pixels, atol=1e-9)
+
+
+def test_render_unknown_engine_raises() -> None:
+    c = Camera(20, 10, pi / 3)
+    with pytest.raises(ValueError):
+        c.render(World.default_world(), engine="nope")
@@ -0,0 +1,186 @@
+import math
+
+import pytest
+
+from raytracer.color import WHITE, Color
+from raytracer.lights import PointLight
+from raytracer.materials import Material
+from raytracer.rays import Ray
+from raytracer.shapes import Group, Plane, Sphere
+from raytracer.transforms import translation
+from raytracer.tuple import Tuple, point, vector
+from raytracer.world import World
+
+RT2_O2 = math.sqrt(2) / 2
+
+SHADOW_CASES = (
+    (point(0, 10, 0), False),  # Nothing collinear with point & light
+    (point(10, -10, 10), True),  # Object between point & light
+    (point(-20, 20, -20), False),  # Object behind light
+    (point(-2, 2, -2), False),  # Object behind point
+)
+
+
+@pytest.mark.parametrize(("pt", "truth"), SHADOW_CASES)
+def test_is_shadowed(pt: Tuple, truth: bool) -> None:
+    w = World.default_world()
+    assert w.is_shadowed(pt) is truth
+
+
+def test_is_shadowed_remembers_occluder() -> None:
+    w = World.default_world()
+    assert w.is_shadowed(point(10, -10, 10))
+
+    occluder = w._last_occluder[w.light]
+    assert occluder in w.objects
+    assert w.is_shadowed(point(10, -10, 9))
+    assert w._last_occluder[w.light] is occluder
+
+
+def test_is_shadowed_stale_occluder() -> None:
+    w = World.default_world()
+    assert w.is_shadowed(point(10, -10, 10))
+
+    # The remembered occluder no longer blocks the light, so the rest of the world is searched
+    w.objects.append(Sphere(translation(5, -5, 5)))
+    w.objects[0].transform = translation(100, 0, 0)
+    w.objects[1].transform = translation(100, 0, 0)
+    w.bvh
+    w._last_occluder[w.light] = w.objects[0]
+    assert w.is_shadowed(point(10, -10, 10))
+    assert w._last_occluder[w.light] is w.objects[2]
+
+
+def test_is_shadowed_per_light() -> None:
+    w = World.default_world()
+    assert w.is_shadowed(point(10, -10, 10))
+
+    w.light = PointLight(point(10, 10, -10), WHITE)
+    assert not w.is_shadowed(point(10, -10, 10))
+    assert w.light not in w._last_occluder
+
+
+def test_intersect_world() -> None:
+    w = World.default_world()
+    xs = w.intersect_world(Ray(point(0, 0, -5), vector(0, 0, 1)))
+
+    assert [i.t for i in xs] == pytest.approx([4, 4.5, 5.5, 6])
+
+
+def test_closest_hit() -> None:
+    w = World.default_world()
+
+    hit = w.closest_hit(Ray(point(0, 0, -5), vector(0, 0, 1)))
+    assert hit.t == pytest.approx(4)
+    assert hit.obj is w.objects[0]
+
+    hit = w.closest_hit(Ray(point(0, 0, 0), vector(0, 0, 1)))
+    assert hit.t == pytest.approx(0.5)
+    assert hit.obj is w.objects[1]
+
+    assert w.closest_hit(Ray(point(0, 0, -5), vector(0, 1, 0))) is None
+
+
+COLOR_AT_CASES = (
+    (Ray(point(0, 0, -5), vector(0, 1, 0)), Color(0, 0, 0)),
+    (Ray(point(0, 0, -5), vector(0, 0, 1)), Color(0.38066, 0.47583, 0.2855)),
+)
+
+
+@pytest.mark.parametrize(("ray", "truth"), COLOR_AT_CASES)
+def test_color_at(ray: Ray, truth: Color) -> None:
+    assert World.default_world().color_at(ray) == truth
+
+
+def test_color_at_refraction_uses_containers() -> None:
+    floor = Plane(translation(0, -1, 0), Material(transparency=0.5, refractive_index=1.5))
+    ball = Sphere(translation(0, -3.5, -0.5), Material(Color(1, 0, 0), ambient=0.5))
+    w = World.default_world()
+    w.objects.extend([floor, ball])
+
+    c = w.color_at(Ray(point(0, 0, -3), vector(0, -RT2_O2, RT2_O2)))
+    assert c == Color(0.93642, 0.68642, 0.68642)
+
+
+def test_freeze() -> None:
+    w = World.default_world()
+    w.freeze()
+
+    assert w._bvh is not None
+    assert all(obj._world_normal is not None for obj in w.objects)
+
+
+def test_freeze_keeps_current_bvh() -> None:
+    w = World.default_world()
+    w.freeze()
+    bvh = w._bvh
+
+    w.freeze()
+    assert w._bvh is bvh
+
+    w.objects[0].transform = translation(1, 0, 0)
+    w.freeze()
+    assert w._bvh is not bvh
+    assert w.objects[0]._world_normal is not None
+
+
+def test_bvh_follows_replaced_objects() -> None:
+    w = World.default_world()
+    r = Ray(point(0, 0, -5), vector(0, 0, 1))
+    w.freeze()
+
+    # Replacing an object in place is picked up by the next freeze, as renders do
+    w.objects[0] = Sphere(translation(0, 0, 10))
+    w.freeze()
+    assert [i.t for i in w.intersect_world(r)] == pytest.approx([4.5, 5.5, 14, 16])
+
+    w.objects = [Sphere(translation(0, 0, 20))]
+    assert [i.t for i in w.intersect_world(r)] == pytest.approx([24, 26])
+
+
+def test_world_keeps_callers_list() -> None:
+    objects = []
+    w = World(PointLight(point(-10, 10, -10), WHITE), objects)
+    r = Ray(point(0, 0, -5), vector(0, 0, 1))
+    assert w.closest_hit(r) is None
+
+    objects.append(Sphere())
+    assert w.objects is objects
+    assert w.closest_hit(r).obj is objects[0]
+
+    objects.remove(objects[0])
+    assert w.closest_hit(r) is None
+
+
+def test_bvh_follows_moved_objects() -> None:
+    w = World.default_world()
+    r = Ray(point(0, 0, -5), vector(0, 0, 1))
+    for obj in w.objects:
+        obj.transform = translation(100, 0, 0)
+    w.freeze()
+    assert w.intersect_world(r) == []
+
+    # Moving frozen objects back into view, without telling the world
+    w.objects[0].transform = translation(0, 0, 0)
+    assert [i.t for i in w.intersect_world(r)] == pytest.approx([4, 6])
+    assert w.closest_hit(r).obj is w.objects[0]
+    assert w.is_shadowed(point(10, -10, 10))
+
+
+def test_bvh_follows_moved_group_children() -> None:
+    s = Sphere(translation(100, 0, 0))
+    g = Group()
+    g.add_child(s)
+    w = World(PointLight(point(-10, 10, -10), WHITE), [g])
+    r = Ray(point(0, 0, -5), vector(0, 0, 1))
+    assert w.intersect_world(r) == []
+
+    s.transform = translation(0, 0, 0)
+    assert [i.t for i in w.intersect_world(r)] == pytest.approx([4, 6])
+
+    g.add_child(Sphere(translation(0, 0, 10)))
+    assert [i.t for i in w.intersect_world(r)] == pytest.approx([4, 6, 14, 16])
+
+    g.remove_child(s)
+    assert [i.t for i in w.intersect_world(r)] == pytest.approx([14, 16])
+    assert s.parent is None